@@ -9,6 +9,7 @@ legacy_migration_subagent = {
         pdf_da_metadata_toc,
         test_solution_clean_markdown,
         test_solution_structured_extraction,
+        test_solution_structured_extraction_batch,
         consolidate_test_solution_structured,
     ],
     "model": "openai:gpt-5-mini"
@@ -30,6 +31,7 @@ side_by_side_subagent = {
         sbs_proposed_column_to_pdf_md,
         test_solution_clean_markdown_sbs,
         test_solution_structured_extraction,
+        test_solution_structured_extraction_batch,
         consolidate_test_solution_structured,
     ],
     "model": "openai:gpt-5-mini"
@@ -41,8 +43,10 @@ reference_methods_subagent = {
     "system_prompt": REFERENCE_METHODS_AGENT_INSTRUCTIONS,
     "tools": [
         pdf_da_metadata_toc,
+        pdf_da_metadata_toc_batch,
         test_solution_clean_markdown,
         test_solution_structured_extraction,
+        test_solution_structured_extraction_batch,
         consolidate_test_solution_structured
     ],
     "model": "openai:gpt-5-mini"
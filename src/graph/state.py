@@ -25,24 +25,39 @@ class Todo(TypedDict):
 
 
 def file_reducer(left, right):
-    """Merge two file dictionaries, with right side taking precedence.
+    """Apply a delta of file changes to the virtual file system.
 
-    Used as a reducer function for the files field in agent state,
-    allowing incremental updates to the virtual file system.
+    Used as a reducer function for the files field in agent state. Tools
+    return only the paths they created, modified or deleted (a delta), not a
+    full copy of the file system. A ``None`` value is a tombstone: the path is
+    removed from the merged result. Only the mapping is copied; unchanged
+    entries are shared with ``left``.
+
+    The graph built with ``create_deep_agent`` merges ``files`` with the
+    reducer of deepagents' ``FilesystemMiddleware`` (``_file_data_reducer``),
+    which has these same semantics; this one keeps ``DeepAgentState`` (the
+    schema the tools use for ``InjectedState``) consistent with it.
 
     Args:
         left: Left side dictionary (existing files)
-        right: Right side dictionary (new/updated files)
+        right: Right side dictionary (delta: new/updated files, ``None`` to delete)
 
     Returns:
-        Merged dictionary with right values overriding left values
+        Merged dictionary with right values overriding left values and
+        tombstoned paths removed
     """
-    if left is None:
-        return right
-    elif right is None:
+    if right is None:
         return left
-    else:
-        return {**left, **right}
+    if left is None:
+        return {path: value for path, value in right.items() if value is not None}
+
+    merged = dict(left)
+    for path, value in right.items():
+        if value is None:
+            merged.pop(path, None)
+        else:
+            merged[path] = value
+    return merged
 
 
 class DeepAgentState(AgentState):
@@ -25,6 +25,8 @@ Todas las rutas de archivo deben comenzar con un `/`.
 * **glob**: encontrar archivos que coincidan con un patrón (ej. `**/*.py`)
 * **grep**: buscar texto dentro de archivos
 
+Los textos grandes (markdown OCR) se guardan fuera del estado: en los JSON aparecen como `{"$blob": "sha256:...", "bytes": n}`. `read_file` y `grep` solo ven esa referencia; las herramientas de extracción la resuelven por su cuenta.
+
 ## `task` (lanzador de subagentes)
 
 Tienes acceso a una herramienta `task` para lanzar subagentes de corta duración que manejan tareas aisladas. Estos agentes son efímeros: solo viven durante la duración de la tarea y devuelven un único resultado.
@@ -183,13 +185,10 @@ Usa un ciclo de `read_todos` -\> `task` -\> `think_tool` -\> `write_todos`. Sigu
 **CUANDO el TODO `in_progress` contiene "Analizar Métodos de Referencia":**
 
   * **Agente a Llamar:** `subagent_type="reference_methods_agent"`
-  * **PROCESAMIENTO EN PARALELO:** Si hay múltiples archivos de referencia (ej. USP, Farmacopea Europea), DEBES llamar a `task` varias veces en el mismo turno (uno por archivo).
-  * **Ejemplo de llamadas `task` (paralelo)**:
+  * **PROCESAMIENTO EN LOTE:** Si hay múltiples archivos de referencia (ej. USP, Farmacopea Europea), llama a `task` UNA sola vez listando todas las rutas; el subagente los ingiere en lote con un único pool de OCR.
+  * **Ejemplo de llamada `task` (lote)**:
     ```json
-    [
-      {{ "name": "task", "args": {{ "description": "Analizar método de referencia USP: 'anexo_USP.pdf'", "subagent_type": "reference_methods_agent" }} }},
-      {{ "name": "task", "args": {{ "description": "Analizar método de referencia Ph. Eur.: 'anexo_PhEur.pdf'", "subagent_type": "reference_methods_agent" }} }}
-    ]
+    {{ "name": "task", "args": {{ "description": "Analizar métodos de referencia: 'anexo_USP.pdf', 'anexo_PhEur.pdf'", "subagent_type": "reference_methods_agent" }} }}
     ```
   * **Al Terminar:** El subagente guardará los archivos (ej. `/new/reference_methods.json`). Usa `think_tool` y avanza el `TODO`.
 
@@ -13,7 +13,7 @@ PDF_DA_METADATA_TOC_TOOL_DESC = """
     - El markdown consolidado del documento para posteriores extracciones de pruebas/soluciones.
 
   ## Buenas Prácticas
-  - **Modelo fijo:** La extracción se realiza con el modelo Pydantic `MetodoAnaliticoDA` y luego se transforma en `MetodoAnaliticoCompleto` agregando `full_markdown`. No selecciones modelos manualmente.
+  - **Modelo fijo:** La extracción se realiza con el modelo Pydantic `MetodoAnaliticoDA` y luego se transforma en `MetodoAnaliticoCompleto` agregando `markdown_completo`. No selecciones modelos manualmente.
   - **PDF obligatorio:** Solo acepta archivos con extensión `.pdf`. Valida la ruta antes de llamar la herramienta.
   - **Chunking automático:** El OCR administra la división del PDF y la comunicación con Mistral, no intentes dividirlo manualmente.
   - **TOC exhaustiva:** Siempre busca capturar todos los sub-encabezados numerados (ej. `5.1`, `5.1.1`, etc.) dentro de `tabla_de_contenidos`.
@@ -27,13 +27,36 @@ PDF_DA_METADATA_TOC_TOOL_DESC = """
   - **ToolMessage:** Devuelve un resumen con el número de campos poblados, la longitud del markdown consolidado, y el `source_file_name` a usar en las siguientes herramientas.
   - **Estado (`state['files']`):**
     - Guarda el JSON estructurado en `{base_path}/method_metadata_TOC_{source_file_name}.json`.
-    - `state['files'][...]['data']` contiene el objeto `MetodoAnaliticoCompleto` (incluyendo `full_markdown` y `source_file_name`).
+    - El archivo contiene el JSON del objeto `MetodoAnaliticoCompleto` (incluyendo `markdown_completo` y `source_file_name`).
+    - Si el markdown es grande, `markdown_completo` es una referencia `{"$blob": "sha256:...", "bytes": n}` al blob store en disco, no el texto. `read_file` muestra esa referencia; no intentes leer el markdown desde el archivo: `test_solution_clean_markdown` lo resuelve.
 
   ## Siguiente paso esperado
   - Tras ejecutar esta herramienta, pasa a `test_solution_clean_markdown(source_file_name="...")` usando el `source_file_name` indicado en el ToolMessage.
   - No vuelvas a ejecutar esta herramienta para el mismo PDF a menos que haya cambios en el documento fuente.
 """
 
+#############################################################################################################
+# PDF DA Metadata TOC batch tool description
+#############################################################################################################
+PDF_DA_METADATA_TOC_BATCH_TOOL_DESC = """
+  Versión en lote de `pdf_da_metadata_toc`: procesa VARIOS PDFs de métodos analíticos en una sola llamada. Los chunks de todos los documentos se planifican juntos y se envían a OCR en un único pool compartido; todos los `method_metadata_TOC_{source_file_name}.json` se escriben en un solo update de estado.
+
+  ## Cuándo usar
+  - Cuando recibas dos o más rutas de métodos analíticos en PDF que deban ingerirse con el mismo `base_path` (típicamente varios métodos de referencia en `/proposed_method`).
+  - Para un único PDF usa `pdf_da_metadata_toc`.
+
+  ## Parámetros
+  - `dir_methods (List[str])`: Rutas absolutas a los archivos PDF. Las rutas repetidas se procesan una sola vez.
+  - `base_path (str)`: Ruta base donde se guardarán los archivos. Default: `/actual_method`. Usa `/proposed_method` para métodos de referencia.
+
+  ## Salida y efectos en el estado
+  - **ToolMessage:** Un resumen por documento (con su `source_file_name`) y la lista de rutas que no se pudieron procesar (ruta inexistente o formato no PDF), si las hay.
+  - **Estado (`state['files']`):** Un archivo `{base_path}/method_metadata_TOC_{source_file_name}.json` por documento, con el mismo contenido que genera `pdf_da_metadata_toc`.
+
+  ## Siguiente paso esperado
+  - Para cada `source_file_name` reportado, continúa con `test_solution_clean_markdown(source_file_name="...", base_path=...)`.
+"""
+
 #############################################################################################################
 # Test/Solution Clean Markdown tool description
 #############################################################################################################
@@ -60,6 +83,7 @@ TEST_SOLUTION_CLEAN_MARKDOWN_TOOL_DESC = """
     - `full_markdown`: texto consolidado del método.
     - `toc_entries`: TOC usado para la inferencia.
     - `items`: lista de `{raw, title, section_id, markdown}` para cada prueba o solución.
+    - Los textos grandes (`full_markdown` y el `markdown` de cada ítem) se guardan como referencia `{"$blob": "sha256:...", "bytes": n}` al blob store; `read_file` muestra la referencia, no el texto. `test_solution_structured_extraction` y su versión batch la resuelven solas.
 
   ## Siguiente Paso Esperado
   - Con este archivo disponible, ejecuta `test_solution_structured_extraction(id=..., source_file_name="...")` para cada ítem.
@@ -95,6 +119,7 @@ TEST_SOLUTION_CLEAN_MARKDOWN_SBS_TOOL_DESC = """
     - `full_markdown`: texto consolidado del metodo propuesto.
     - `toc_entries`: encabezados identificados.
     - `items`: lista de `{raw, title, section_id, markdown}` para cada prueba o solucion.
+    - Los textos grandes (`full_markdown` y el `markdown` de cada item) se guardan como referencia `{"$blob": "sha256:...", "bytes": n}` al blob store; `read_file` muestra la referencia, no el texto. `test_solution_structured_extraction` y su version batch la resuelven solas.
 
   ## Siguiente Paso Esperado
   - Con este archivo disponible, ejecuta `test_solution_structured_extraction(id=..., source_file_name="...", base_path="/proposed_method")` para cada item.
@@ -132,6 +157,26 @@ TEST_SOLUTION_STRUCTURED_EXTRACTION_TOOL_DESC = """
   - Una vez que hayas generado todos los archivos individuales, ejecuta `consolidate_test_solution_structured(source_file_name="...")` para construir el archivo consolidado final.
 """
 
+TEST_SOLUTION_STRUCTURED_EXTRACTION_BATCH_TOOL_DESC = """
+  Versión en lote de `test_solution_structured_extraction`: estructura VARIAS pruebas/soluciones (o todas) de un mismo `source_file_name` en una sola llamada. Las llamadas al LLM se ejecutan en paralelo con concurrencia acotada y todos los `/temp_{base_path}/{source_file_name}/{{id}}.json` se escriben en un solo update de estado.
+
+  ## Cuándo usar
+  - Inmediatamente después de `test_solution_clean_markdown`, para estructurar todas las entradas de `{base_path}/test_solution_markdown_{source_file_name}.json` con una sola llamada (`ids="all"`).
+  - Para reprocesar un único `id` (p. ej. uno reportado con error) usa `test_solution_structured_extraction`.
+
+  ## Parámetros
+  - `source_file_name (str)`: Nombre del archivo de origen (sin extensión). **OBLIGATORIO**.
+  - `ids (List[int] | "all")`: Ids de `items` a procesar. Default: `"all"` (todos los ítems del archivo de markdown). Los ids repetidos se procesan una sola vez.
+  - `base_path (str)`: Ruta base. Default: `/actual_method`. Usa `/proposed_method` para side-by-side o métodos de referencia.
+
+  ## Salida y efectos en el estado
+  - **ToolMessage:** Cuántas pruebas/soluciones se estructuraron, los ids sin markdown asociado y los ids que fallaron (con su error), si los hay.
+  - **Estado (`state['files']`):** Un archivo `/temp_{base_path}/{source_file_name}/{{id}}.json` por id procesado, con el mismo contenido que genera `test_solution_structured_extraction`.
+
+  ## Siguiente paso esperado
+  - Reintenta los ids fallidos con `test_solution_structured_extraction` si los hay y luego ejecuta `consolidate_test_solution_structured(source_file_name="...", base_path=...)`.
+"""
+
 #############################################################################################################
 # Test/Solution Structured Consolidation tool description
 #############################################################################################################
@@ -17,7 +17,6 @@ warnings.filterwarnings(
 
 import json
 import logging
-from datetime import datetime, timezone
 from typing import Annotated, Any, Optional, Literal, List, Dict
 
 from langchain.chat_models import init_chat_model
@@ -34,6 +33,7 @@ from src.prompts.tool_llm_calls_prompts import (
     UNIFIED_CHANGE_HUMAN_ANALYSIS_PROMPT,
     UNIFIED_CHANGE_SYSTEM_ANALYSIS_PROMPT,
 )
+from src.utils.vfs import list_paths, make_file_entry, read_file_data
 
 # --- Configuración ---
 logger = logging.getLogger(__name__)
@@ -153,26 +153,10 @@ def _normalize_name(name: Optional[str]) -> Optional[str]:
 
 def _safe_get_file_data(files: dict[str, Any], path: str) -> Optional[Any]:
     """
-    Lee files[path]["data"] de forma segura.
-    Fallback: si no existe "data" pero sí "content" (string JSON), intenta json.loads(content).
+    Lee el JSON de files[path] de forma segura (``content`` como lista de líneas
+    o string; también el "data" de checkpoints anteriores).
     """
-    entry = files.get(path)
-    if not isinstance(entry, dict):
-        return None
-
-    data = entry.get("data")
-    if data is not None:
-        return data
-
-    content = entry.get("content")
-    if isinstance(content, str) and content.strip():
-        try:
-            return json.loads(content)
-        except Exception:
-            logger.exception(f"No se pudo parsear content JSON en {path}")
-            return None
-
-    return None
+    return read_file_data(files.get(path), path)
 
 
 def _collect_prueba_records_with_index(
@@ -240,7 +224,7 @@ def _collect_cambios_from_structured(cc_payload: dict[str, Any]) -> dict[str, li
     Extrae únicamente:
       - cambios_pruebas_analiticas
       - pruebas_nuevas
-    desde cc_payload (que corresponde a files[...]['data']).
+    desde cc_payload (el JSON parseado de files[...]).
 
     No aplica transformaciones adicionales.
     """
@@ -450,13 +434,11 @@ STRUCTURED_CONTENT_PATTERN = re.compile(r"test_solution_structured_content_(.+)\
 
 def _find_structured_content_files(files: Dict[str, Any], base_dir: str) -> List[str]:
     """Encuentra todos los archivos test_solution_structured_content_*.json en un directorio."""
-    found = []
     prefix = base_dir.rstrip("/") + "/"
-    for path in files.keys():
-        if isinstance(path, str) and path.startswith(prefix):
-            if STRUCTURED_CONTENT_PATTERN.search(path):
-                found.append(path)
-    return sorted(found)
+    return [
+        path for path in list_paths(files, prefix)
+        if STRUCTURED_CONTENT_PATTERN.search(path)
+    ]
 
 
 def _load_all_tests_from_directory(files: Dict[str, Any], base_dir: str) -> List[Dict[str, Any]]:
@@ -509,10 +491,7 @@ def _load_analytical_tests_registry(files: Dict[str, Any]) -> Dict[str, List[Dic
     
     prefix = ANALYTICAL_TESTS_DIR.rstrip("/") + "/"
     
-    for path, entry in files.items():
-        if not isinstance(path, str) or not path.startswith(prefix):
-            continue
-        
+    for path in list_paths(files, prefix):
         payload = _safe_get_file_data(files, path)
         if not isinstance(payload, dict):
             continue
@@ -525,7 +504,6 @@ def _load_analytical_tests_registry(files: Dict[str, Any]) -> Dict[str, List[Dic
     return registry
 
 
-
 @tool(description=CHANGE_CONTROL_ANALYSIS_TOOL_DESCRIPTION)
 def analyze_change_impact(
     state: Annotated[DeepAgentState, InjectedState],
@@ -688,12 +666,8 @@ def analyze_change_impact(
     # --- Paso 7: Guardar resultado ---
     plan_payload = response.model_dump()
 
-    files_update = dict(files)
-    files_update[CHANGE_IMPLEMENTATION_PLAN_PATH] = {
-        "content": json.dumps(plan_payload, ensure_ascii=False, indent=2),
-        "data": plan_payload,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    files_update = {}
+    files_update[CHANGE_IMPLEMENTATION_PLAN_PATH] = make_file_entry(plan_payload)
 
     logger.info(f"✓ Plan guardado en {CHANGE_IMPLEMENTATION_PLAN_PATH}")
 
@@ -60,6 +60,7 @@ from src.models.structured_test_model import (
     TestSolution,
     MetodoAnaliticoFinal,
 )
+from src.utils.vfs import list_paths, make_file_entry, read_file_data, read_file_text
 
 logger = logging.getLogger(__name__)
 
@@ -315,34 +316,8 @@ def _load_json_payload(files: Dict[str, Any], path: str) -> Optional[Dict[str, A
     
     Retorna dict, list, o None si no se encuentra o hay error de parseo.
     """
-    entry = files.get(path)
-    if entry is None:
-        return None
-
-    if isinstance(entry, dict):
-        # Caso: entry tiene estructura {"data": ..., "content": ...}
-        if "data" in entry and isinstance(entry["data"], (dict, list)):
-            return entry["data"]
-        if isinstance(entry.get("content"), str):
-            try:
-                return json.loads(entry["content"])
-            except json.JSONDecodeError:
-                logger.warning(f"Error parseando JSON desde 'content' en {path}")
-                return None
-        # Si no tiene 'data' ni 'content', asumimos que es el payload directo
-        return entry
-
-    if isinstance(entry, str):
-        try:
-            return json.loads(entry)
-        except json.JSONDecodeError:
-            logger.warning(f"Error parseando JSON string en {path}")
-            return None
-    
-    if isinstance(entry, list):
-        return entry
-
-    return None
+    payload = read_file_data(files.get(path), path)
+    return payload if isinstance(payload, (dict, list)) else None
 
 
 def _find_structured_content_files(files: Dict[str, Any], directory: str) -> List[str]:
@@ -356,12 +331,11 @@ def _find_structured_content_files(files: Dict[str, Any], directory: str) -> Lis
     Returns:
         Lista de rutas de archivos encontrados
     """
-    found = []
     dir_prefix = directory.rstrip("/") + "/"
-    for path in files.keys():
-        if path.startswith(dir_prefix) and STRUCTURED_CONTENT_PATTERN.search(path):
-            found.append(path)
-    return sorted(found)
+    return [
+        path for path in list_paths(files, dir_prefix)
+        if STRUCTURED_CONTENT_PATTERN.search(path)
+    ]
 
 
 def _load_all_tests_from_directory(files: Dict[str, Any], directory: str) -> Tuple[List[Dict[str, Any]], List[str]]:
@@ -412,15 +386,14 @@ def _build_method_summary(method_payload: dict[str, Any]) -> dict[str, Any]:
     }
 
 
-def _append_log(files: dict[str, Any], entry: dict[str, Any]) -> None:
+def _append_log(files_update: dict[str, Any], files: dict[str, Any], entry: dict[str, Any]) -> None:
     payload = json.dumps(entry, ensure_ascii=False)
     log_entry = payload + "\n"
 
-    existing = files.get(PATCH_LOG_PATH)
-    if isinstance(existing, dict) and isinstance(existing.get("content"), str):
-        log_entry = existing["content"] + log_entry
+    existing = files_update.get(PATCH_LOG_PATH) or files.get(PATCH_LOG_PATH)
+    log_entry = read_file_text(existing) + log_entry
 
-    files[PATCH_LOG_PATH] = {"content": log_entry, "data": None, "modified_at": datetime.now(timezone.utc).isoformat()}
+    files_update[PATCH_LOG_PATH] = make_file_entry(log_entry)
 
 
 def _format_indices(indices: Iterable[int]) -> str:
@@ -479,11 +452,7 @@ def _save_patch(
         "contenido": prueba_json,
     }
     patch_path = f"{PATCHES_DIR}/{action_index}.json"
-    files[patch_path] = {
-        "content": json.dumps(patch_payload, ensure_ascii=False, indent=2),
-        "data": patch_payload,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    files[patch_path] = make_file_entry(patch_payload)
 
 
 @tool(description=APPLY_METHOD_PATCH_TOOL_DESCRIPTION)
@@ -647,14 +616,10 @@ def apply_method_patch(
             updated_tests.pop(target_idx)
         
         updated_payload = {"pruebas": updated_tests}
-        files_update = dict(files)
-        files_update[new_method_path] = {
-            "content": json.dumps(updated_payload, ensure_ascii=False, indent=2),
-            "data": updated_payload,
-            "modified_at": datetime.now(timezone.utc).isoformat(),
-        }
+        files_update = {}
+        files_update[new_method_path] = make_file_entry(updated_payload)
         _save_patch(files_update, action_index, accion, None, legacy_id, legacy_name)
-        _append_log(files_update, {
+        _append_log(files_update, files, {
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "plan_path": plan_path,
             "method_path": new_method_path,
@@ -726,14 +691,10 @@ def apply_method_patch(
         return Command(update={"messages": [ToolMessage(content=msg, tool_call_id=tool_call_id)]})
 
     updated_payload = {"pruebas": updated_tests}
-    files_update = dict(files)
-    files_update[new_method_path] = {
-        "content": json.dumps(updated_payload, ensure_ascii=False, indent=2),
-        "data": updated_payload,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    files_update = {}
+    files_update[new_method_path] = make_file_entry(updated_payload)
     _save_patch(files_update, action_index, accion, prueba_json, legacy_id, legacy_name)
-    _append_log(files_update, {
+    _append_log(files_update, files, {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "plan_path": plan_path,
         "method_path": new_method_path,
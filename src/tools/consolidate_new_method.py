@@ -10,12 +10,10 @@ warnings.filterwarnings(
     module="pydantic.*"
 )
 
-import json
 import logging
 import re
 import unicodedata
 from copy import deepcopy
-from datetime import datetime, timezone
 from typing import Annotated, Any, Optional, List, Tuple
 
 from langchain_core.messages import ToolMessage
@@ -26,6 +24,7 @@ from pydantic import ValidationError
 
 from src.graph.state import DeepAgentState
 from src.prompts.tool_description_prompts import CONSOLIDATE_NEW_METHOD_TOOL_DESCRIPTION
+from src.utils.vfs import list_paths, make_file_entry, read_file_data
 # Ya no se usa MetodoAnaliticoNuevo - trabajamos directamente con dicts de TestSolution
 
 logger = logging.getLogger(__name__)
@@ -66,34 +65,8 @@ def _load_json_payload(files: dict[str, Any], path: str) -> Optional[dict[str, A
     
     Retorna dict, list, o None si no se encuentra o hay error de parseo.
     """
-    entry = files.get(path)
-    if entry is None:
-        return None
-
-    if isinstance(entry, dict):
-        # Caso: entry tiene estructura {"data": ..., "content": ...}
-        if "data" in entry and isinstance(entry["data"], (dict, list)):
-            return entry["data"]
-        if isinstance(entry.get("content"), str):
-            try:
-                return json.loads(entry["content"])
-            except json.JSONDecodeError:
-                logger.warning(f"Error parseando JSON desde 'content' en {path}")
-                return None
-        # Si no tiene 'data' ni 'content', asumimos que es el payload directo
-        return entry
-
-    if isinstance(entry, str):
-        try:
-            return json.loads(entry)
-        except json.JSONDecodeError:
-            logger.warning(f"Error parseando JSON string en {path}")
-            return None
-    
-    if isinstance(entry, list):
-        return entry
-
-    return None
+    payload = read_file_data(files.get(path), path)
+    return payload if isinstance(payload, (dict, list)) else None
 
 
 def _normalize_text(value: Optional[str]) -> Optional[str]:
@@ -182,24 +155,22 @@ def _find_metadata_files(files: dict[str, Any], directory: str) -> List[str]:
     """
     Busca archivos con patrón method_metadata_TOC_*.json en un directorio.
     """
-    found = []
     dir_prefix = directory.rstrip("/") + "/"
-    for path in files.keys():
-        if path.startswith(dir_prefix) and METADATA_TOC_PATTERN.search(path):
-            found.append(path)
-    return sorted(found)
+    return [
+        path for path in list_paths(files, dir_prefix)
+        if METADATA_TOC_PATTERN.search(path)
+    ]
 
 
 def _find_structured_content_files(files: dict[str, Any], directory: str) -> List[str]:
     """
     Busca archivos con patrón test_solution_structured_content_*.json en un directorio.
     """
-    found = []
     dir_prefix = directory.rstrip("/") + "/"
-    for path in files.keys():
-        if path.startswith(dir_prefix) and STRUCTURED_CONTENT_PATTERN.search(path):
-            found.append(path)
-    return sorted(found)
+    return [
+        path for path in list_paths(files, dir_prefix)
+        if STRUCTURED_CONTENT_PATTERN.search(path)
+    ]
 
 
 def _load_first_metadata(files: dict[str, Any], directory: str) -> Tuple[Optional[dict[str, Any]], Optional[str]]:
@@ -220,11 +191,10 @@ def _load_first_metadata(files: dict[str, Any], directory: str) -> Tuple[Optiona
 def _iter_patch_payloads(files: dict[str, Any], patches_dir: str) -> List[Tuple[str, dict[str, Any]]]:
     prefix = patches_dir.rstrip("/") + "/"
     collected: List[Tuple[str, dict[str, Any]]] = []
-    for path, entry in files.items():
-        if isinstance(path, str) and path.startswith(prefix):
-            payload = _load_json_payload(files, path)
-            if isinstance(payload, dict):
-                collected.append((path, payload))
+    for path in list_paths(files, prefix):
+        payload = _load_json_payload(files, path)
+        if isinstance(payload, dict):
+            collected.append((path, payload))
     return sorted(collected, key=lambda item: item[1].get("action_index", 0))
 
 
@@ -240,13 +210,7 @@ def consolidate_new_method(
     logger.info("Iniciando 'consolidate_new_method'")
     
     # Archivos originales para leer entradas
-    source_files = dict(state.get("files", {}) or {})
-    
-    # Archivos base que queremos retener (sin las ramas paralelas de patches)
-    base_files = {
-        k: v for k, v in source_files.items()
-        if not k.startswith(patches_dir.rstrip("/") + "/")
-    }
+    source_files = state.get("files", {}) or {}
 
     base_payload = _load_json_payload(source_files, base_method_path)
     base_source = base_method_path
@@ -375,11 +339,10 @@ def consolidate_new_method(
     logger.info(f"Metadata copiada: {metadata_fields_copied} campos de {len(METADATA_FIELDS)} posibles")
     
     method_dump = final_method
-    method_str = json.dumps(method_dump, ensure_ascii=False, indent=2)
 
-    # Resultado final: base_files + método consolidado
-    files_update = base_files.copy()
-    files_update[output_path] = {"content": method_str, "data": method_dump, "modified_at": datetime.now(timezone.utc).isoformat()}
+    # Delta de estado: solo el método consolidado (los parches se conservan)
+    files_update = {}
+    files_update[output_path] = make_file_entry(method_dump)
 
     metadata_msg = f", metadata copiada: {metadata_fields_copied} campos" if metadata_loaded else ", sin metadata"
     base_msg = f" (base: {base_source})" if base_source != base_method_path else ""
@@ -9,7 +9,6 @@ warnings.filterwarnings(
 )
 
 import copy
-import json
 import logging
 from datetime import datetime, timezone
 from typing import Annotated, Any, Dict, List, Optional
@@ -28,6 +27,7 @@ from .test_solution_structured_extraction import (
     TEMP_DIR_MAPPING,
     _get_temp_dir,
 )
+from src.utils.vfs import list_paths, make_file_entry, read_file_data
 
 logger = logging.getLogger(__name__)
 
@@ -36,23 +36,8 @@ ANALYTICAL_TESTS_DIR = "/analytical_tests"
 
 
 def _load_structured_entry(path: str, file_entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    entry_data = file_entry.get("data")
-    if isinstance(entry_data, dict):
-        return entry_data
-
-    entry_content = file_entry.get("content")
-    if isinstance(entry_content, str):
-        try:
-            parsed = json.loads(entry_content)
-        except json.JSONDecodeError:
-            logger.warning(
-                "No se pudo parsear el archivo %s como JSON válido durante la consolidación.",
-                path,
-            )
-            return None
-        if isinstance(parsed, dict):
-            return parsed
-    return None
+    parsed = read_file_data(file_entry, path)
+    return parsed if isinstance(parsed, dict) else None
 
 
 def _infer_source_id_from_path(path: str) -> Optional[int]:
@@ -145,7 +130,7 @@ def consolidate_test_solution_structured(
         base_path: Ruta base (/actual_method o /proposed_method)
     """
     # Archivos originales para leer entradas individuales
-    archivos_entrada = dict(state.get("files", {}))
+    archivos_entrada = state.get("files", {})
     
     # Rutas calculadas
     temp_dir = _temp_structured_dir(base_path, source_file_name)
@@ -153,23 +138,12 @@ def consolidate_test_solution_structured(
     analytical_tests_path = _analytical_tests_path(source_file_name)
     markdown_doc_path = f"{base_path.rstrip('/')}/test_solution_markdown_{source_file_name}.json"
 
-    # Archivos base que queremos retener (sin las ramas paralelas temporales)
-    archivos_resultado = {
-        k: v for k, v in archivos_entrada.items() 
-        if not k.startswith(temp_dir + "/")
-    }
-
     candidate_entries: List[Dict[str, Any]] = []
     consumed_paths: List[str] = []
 
     # Buscar archivos en la carpeta temporal
-    for path, file_entry in archivos_entrada.items():
-        if not isinstance(path, str):
-            continue
-
-        if not path.startswith(f"{temp_dir}/"):
-            continue
-
+    for path in list_paths(archivos_entrada, f"{temp_dir}/"):
+        file_entry = archivos_entrada[path]
         if not isinstance(file_entry, dict):
             continue
 
@@ -204,31 +178,21 @@ def consolidate_test_solution_structured(
 
     candidate_entries.sort(key=_sort_key)
 
-    # Resultado final: archivos_resultado + nuevo consolidado
-    archivos_resultado_final = archivos_resultado.copy()
+    # Delta de estado: nuevo consolidado + registro + tombstones de temporales
+    archivos_resultado_final: Dict[str, Any] = {}
 
     # Guardar archivo consolidado en la carpeta final (no temporal)
-    content_str = json.dumps(candidate_entries, indent=2, ensure_ascii=False)
-    archivos_resultado_final[structured_content_path] = {
-        "content": content_str.split("\n"),
-        "data": candidate_entries,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    archivos_resultado_final[structured_content_path] = make_file_entry(candidate_entries)
     
     # Generar registro de pruebas analíticas en /analytical_tests/
     analytical_registry = _extract_analytical_tests_registry(
         candidate_entries, source_file_name, base_path
     )
-    analytical_content_str = json.dumps(analytical_registry, indent=2, ensure_ascii=False)
-    archivos_resultado_final[analytical_tests_path] = {
-        "content": analytical_content_str.split("\n"),
-        "data": analytical_registry,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    archivos_resultado_final[analytical_tests_path] = make_file_entry(analytical_registry)
     
-    # Eliminar archivos temporales consumidos
+    # Eliminar archivos temporales consumidos (``None`` = tombstone en file_reducer)
     for consumed_path in consumed_paths:
-        archivos_resultado_final.pop(consumed_path, None)
+        archivos_resultado_final[consumed_path] = None
 
     num_tests = len(analytical_registry.get("tests", []))
     summary_message = (
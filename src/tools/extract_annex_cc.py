@@ -8,15 +8,14 @@ warnings.filterwarnings(
     module="pydantic.*"
 )
 
+import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime, timezone
 
 from pydantic import BaseModel, Field
-from typing import Annotated, Dict, List, Literal, Optional, Type, Union, Any
+from typing import Annotated, Dict, List, Literal, Union, Any
 
 from langgraph.types import Command
-from langchain_core.tools import InjectedToolCallId, tool
+from langchain_core.tools import InjectedToolCallId, StructuredTool
 from langchain_core.messages import ToolMessage, HumanMessage
 from langgraph.prebuilt import InjectedState
 from langchain.chat_models import init_chat_model
@@ -27,11 +26,6 @@ import tempfile
 import shutil
 from pathlib import Path
 from docx2pdf import convert as docx_to_pdf_convert
-from PyPDF2 import PdfReader, PdfWriter
-from mistralai import Mistral
-from mistralai.extra import response_format_from_pydantic_model
-import time
-import base64
 import json
 from contextlib import contextmanager
 
@@ -43,6 +37,9 @@ from src.prompts.tool_llm_calls_prompts import (
 from src.prompts.tool_description_prompts import EXTRACT_STRUCTURED_DATA_PROMPT_TOOL_DESC
 from src.models import *
 from src.graph.state import DeepAgentState
+from src.utils.canonical import canonical_fingerprint
+from src.utils.mistral_ocr import aprocess_document, process_document
+from src.utils.vfs import make_file_entry
 
 logger = logging.getLogger(__name__)
 
@@ -119,181 +116,38 @@ def _prepare_pdf_document(document_path: str):
 
     raise ValueError(f"Formato de archivo no soportado para {document_path}. Solo se permiten PDF o DOCX.")
 
-## Document Annotation
-def get_pdf_page_count(pdf_path: str) -> int:
-    """Get the number of pages in a PDF."""
-    try:
-        with open(pdf_path, "rb") as pdf_file:
-            reader = PdfReader(pdf_file)
-            return len(reader.pages)
-    except Exception as e:
-        logger.error(f"Error counting pages in {pdf_path}: {e}")
-        return 0
-
-def split_pdf_into_chunks(pdf_path: str, max_pages_per_chunk: int = 8, chunk_overlap_pages: int = 2) -> list[str]:
-    """Split PDF into chunks of pages with overlap and temporary files."""
-    chunk_files: list[str] = []
-    try:
-        reader = PdfReader(pdf_path)
-        total_pages = len(reader.pages)
-        if total_pages == 0:
-            return []
-
-        overlap = max(chunk_overlap_pages, 0)
-        chunk_size = max(max_pages_per_chunk, 1)
-        step = max(chunk_size - overlap, 1)
-
-        for start in range(0, total_pages, step):
-            end = min(start + chunk_size, total_pages)
-            chunk_writer = PdfWriter()
-            for page_idx in range(start, end):
-                chunk_writer.add_page(reader.pages[page_idx])
-
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as chunk_pdf:
-                chunk_writer.write(chunk_pdf)
-                chunk_files.append(chunk_pdf.name)
-
-        return chunk_files
-    except Exception as e:  # pragma: no cover - defensive
-        logger.error(f"Error splitting PDF into chunks: {e}")
-        for chunk_file in chunk_files:
-            try:
-                os.unlink(chunk_file)
-            except OSError:
-                pass
-        return []
-
-def encode_pdf(pdf_path: str) -> str:
-    """Encode the pdf to base64."""
-    try:
-        with open(pdf_path, "rb") as pdf_file:
-            return base64.b64encode(pdf_file.read()).decode('utf-8')
-    except Exception as e:
-        logger.error(f"Error encoding PDF {pdf_path}: {e}")
-        return None
-
-def process_chunk(pdf_path: str, extraction_model: Type[BaseModel], chunk_retry_backoff_seconds: int = 5, chunk_retry_attempts: int = 3):
-    """Process a single PDF chunk with Mistral OCR."""
-    base64_pdf = encode_pdf(pdf_path)
-    if not base64_pdf:
-        return None
-    
-    api_key = os.getenv("MISTRAL_API_KEY")
-    if not api_key:
-        raise EnvironmentError("Defina MISTRAL_API_KEY en el entorno o en el archivo .env")
-    ocr_client = Mistral(api_key=api_key, timeout_ms=300000)
-
-    request_params = {
-        "model": "mistral-ocr-latest",
-        "document": {
-            "type": "document_url",
-            "document_url": f"data:application/pdf;base64,{base64_pdf}"
-        },
-        "include_image_base64": False,
-    }
-
-    if extraction_model:
-        try:
-            request_params["document_annotation_format"] = response_format_from_pydantic_model(extraction_model)
-        except Exception as exc:
-            logger.warning(f"No se pudo generar schema pydantic para {pdf_path}: {exc}")
-
-    last_exception: Optional[Exception] = None
-    total_attempts = max(chunk_retry_attempts, 1)
-
-    for attempt in range(1, total_attempts + 1):
-        try:
-            return ocr_client.ocr.process(**request_params)
-        except Exception as exc:
-            last_exception = exc
-            if attempt >= total_attempts:
-                break
-            wait_seconds = chunk_retry_backoff_seconds * attempt
-            logger.warning(
-                f"Retrying chunk {pdf_path} after error: {exc}. Intento {attempt}/{chunk_retry_attempts} en {wait_seconds}s"
-            )
-            time.sleep(wait_seconds)
-
-    logger.error(f"Error processing chunk {pdf_path}: {last_exception}")
-    return None
-
-def process_document(
-    pdf_path: str,
-    extraction_model: Type[BaseModel],
-    max_pages_per_chunk: int = 8,
-    chunk_overlap_pages: int = 2,
-) -> list:
-    """Process PDF with automatic chunking if needed. Uses parallel chunk annotation for long docs."""
-    total_pages = get_pdf_page_count(pdf_path)
-    logger.info(f"Processing PDF {pdf_path} with {total_pages} pages")
-    if total_pages == 0:
-        logger.error(f"Skipping {pdf_path}: could not read any pages")
-        return []
-    
-    if total_pages <= max_pages_per_chunk:
-        # Process directly if within limit
-        result = process_chunk(pdf_path, extraction_model, chunk_retry_backoff_seconds=5, chunk_retry_attempts=3)
-        return [result] if result else []
-    
-    # Split into chunks and process each
-    chunk_files = split_pdf_into_chunks(
-        pdf_path,
-        max_pages_per_chunk=max_pages_per_chunk,
-        chunk_overlap_pages=chunk_overlap_pages,
-    )
-    if not chunk_files:
-        return []
-
-    indexed_results: list[tuple[int, Any]] = []
-    
-    try:
-        max_workers = max(1, min(4, len(chunk_files)))
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_map = {
-                executor.submit(
-                    process_chunk,
-                    chunk_file,
-                    extraction_model,
-                    5,
-                    3,
-                ): (idx, chunk_file)
-                for idx, chunk_file in enumerate(chunk_files)
-            }
-
-            for future in as_completed(future_map):
-                idx, chunk_file = future_map[future]
-                try:
-                    result = future.result()
-                except Exception as exc:  # pragma: no cover - defensive
-                    logger.error(f"Error processing chunk {chunk_file}: {exc}")
-                    continue
-                if result:
-                    indexed_results.append((idx, result))
-    finally:
-        # Clean up temporary files
-        for chunk_file in chunk_files:
-            try:
-                os.unlink(chunk_file)
-            except Exception as e:
-                logger.warning(f"Could not delete temporary file {chunk_file}: {e}")
-    
-    indexed_results.sort(key=lambda item: item[0])
-    return [result for _, result in indexed_results]
-
 def _merge_list_items(target_list: list, source_list: list):
-    """Mergea listas cuidando duplicados y combinando elementos dict similares."""
+    """Mergea listas cuidando duplicados y combinando elementos dict similares.
+
+    Los elementos ya presentes se indexan por huella canónica (JSON con llaves
+    ordenadas), así que cada elemento entrante se resuelve en O(1) en lugar de
+    recorrer ``target_list`` con igualdad profunda. Se conserva el orden de inserción.
+    """
+    index: Dict[str, Any] = {}
+    for existing in target_list:
+        fingerprint = canonical_fingerprint(existing)
+        if fingerprint is not None:
+            index.setdefault(fingerprint, existing)
+
     for item in source_list:
         if item in (None, [], {}, ""):
             continue
 
-        if isinstance(item, dict):
-            existing = next((t for t in target_list if isinstance(t, dict) and t == item), None)
-            if existing is not None:
+        fingerprint = canonical_fingerprint(item)
+        if fingerprint is None:
+            # Valor no serializable: comparación directa como antes
+            if item not in target_list:
+                target_list.append(item)
+            continue
+
+        if fingerprint in index:
+            existing = index[fingerprint]
+            if isinstance(existing, dict) and isinstance(item, dict):
                 _merge_chunk_data(existing, item)
-                continue
+            continue
 
-        if item not in target_list:
-            target_list.append(item)
+        target_list.append(item)
+        index[fingerprint] = item
 
 def _merge_chunk_data(target: dict, source: dict):
     """Mergea datos de un chunk con el diccionario consolidado."""
@@ -463,29 +317,15 @@ def _model_instance_to_dict(model_instance: Union[BaseModel, Dict[str, Any], Non
 
     return {"data": json.loads(str(model_instance)) if isinstance(model_instance, str) else str(model_instance)}
 
-@tool(description=EXTRACT_STRUCTURED_DATA_PROMPT_TOOL_DESC)
-def extract_annex_cc(
-    dir_document: str, 
-    document_type: Literal["change_control", "side_by_side", "reference_methods"],
-    state: Annotated[DeepAgentState, InjectedState],
-    tool_call_id: Annotated[str, InjectedToolCallId],
+def _build_annex_update(
+    chunk_responses: List[Any],
+    document_type: str,
+    tool_call_id: str,
 ) -> Command:
-    # Filename
+    """Consolida las respuestas de OCR, genera el resumen y construye el update de estado."""
     document_name = filenames[document_type]
-
-    # Extraction Model
     extraction_model = extraction_models[document_type]
-
-    # Prompt
     structured_extraction_prompt = structured_extraction_prompts[document_type]
-    
-    # Document Processing
-    try:
-        with _prepare_pdf_document(dir_document) as pdf_document_path:
-            chunk_responses = process_document(pdf_path=pdf_document_path, extraction_model=extraction_model, max_pages_per_chunk=8)
-    except Exception as exc:
-        logger.error(f"Error procesando el documento {document_name}: {exc}")
-        raise
 
     # Consolidate Chunks
     model_instance = consolidate_chunks_data(chunk_responses, document_name, extraction_model)
@@ -495,41 +335,92 @@ def extract_annex_cc(
     # 1. Llama a la nueva función que devuelve el objeto Summary
     summary_object = _get_summary_object(model_instance, structured_extraction_prompt, document_type)
 
-    # 2. Prepara el estado 'files'
-    files = state.get("files", {})
+    # 2. Prepara el delta de 'files' (solo las rutas que escribe esta herramienta)
+    files_update = {}
 
     # 3. Guarda el JSON gigante en formato estructurado y string para herramientas de lectura
     if model_instance:
         serialized_data = _model_instance_to_dict(model_instance)
-        full_json_string = json.dumps(serialized_data, indent=2, ensure_ascii=False)
-        files[document_name] = {
-            "content": full_json_string,
-            "data": serialized_data,
-            "modified_at": datetime.now(timezone.utc).isoformat(),
-        }
+        files_update[document_name] = make_file_entry(serialized_data)
     else:
-        files[document_name] = {
-            "content": "{}",
-            "data": {},
-            "modified_at": datetime.now(timezone.utc).isoformat(),
-        }  # Guarda un JSON vacío si falla
+        files_update[document_name] = make_file_entry({})  # Guarda un JSON vacío si falla
 
     # 4. Guarda un archivo separado con el resumen para consumo rápido
     summary_payload = summary_object.model_dump() if isinstance(summary_object, BaseModel) else summary_object
     summary_file_path = summary_filenames[document_type]
-    files[summary_file_path] = {
-        "content": json.dumps(summary_payload, indent=2, ensure_ascii=False),
-        "data": summary_payload,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    files_update[summary_file_path] = make_file_entry(summary_payload)
     summary_text = summary_payload.get("summary", f"Documento {document_name} procesado exitosamente.")
 
     return Command(
         update={
-            "files": files, # Esto ahora guarda AMBOS archivos en el estado
+            "files": files_update, # Esto ahora guarda AMBOS archivos en el estado
             "messages": [
                 # Devuelve solo el resumen legible por humanos al LLM
                 ToolMessage(summary_text, tool_call_id=tool_call_id)
             ],
         }
     )
+
+
+def _extract_annex_cc(
+    dir_document: str, 
+    document_type: Literal["change_control", "side_by_side", "reference_methods"],
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command:
+    # Filename
+    document_name = filenames[document_type]
+
+    # Extraction Model
+    extraction_model = extraction_models[document_type]
+
+    # Document Processing
+    try:
+        with _prepare_pdf_document(dir_document) as pdf_document_path:
+            chunk_responses = process_document(
+                pdf_path=pdf_document_path,
+                extraction_model=extraction_model,
+                max_pages_per_chunk=8,
+                chunk_overlap_pages=2,
+            )
+    except Exception as exc:
+        logger.error(f"Error procesando el documento {document_name}: {exc}")
+        raise
+
+    return _build_annex_update(chunk_responses, document_type, tool_call_id)
+
+
+async def _aextract_annex_cc(
+    dir_document: str, 
+    document_type: Literal["change_control", "side_by_side", "reference_methods"],
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+) -> Command:
+    """Versión async: OCR con el cliente async de Mistral; consolidación y resumen en un hilo."""
+    document_name = filenames[document_type]
+    extraction_model = extraction_models[document_type]
+
+    try:
+        with _prepare_pdf_document(dir_document) as pdf_document_path:
+            chunk_responses = await aprocess_document(
+                pdf_path=pdf_document_path,
+                extraction_model=extraction_model,
+                max_pages_per_chunk=8,
+                chunk_overlap_pages=2,
+            )
+    except Exception as exc:
+        logger.error(f"Error procesando el documento {document_name}: {exc}")
+        raise
+
+    return await asyncio.to_thread(
+        _build_annex_update, chunk_responses, document_type, tool_call_id
+    )
+
+
+# ``invoke`` usa la implementación sync y ``ainvoke`` la async.
+extract_annex_cc = StructuredTool.from_function(
+    func=_extract_annex_cc,
+    coroutine=_aextract_annex_cc,
+    name="extract_annex_cc",
+    description=EXTRACT_STRUCTURED_DATA_PROMPT_TOOL_DESC,
+)
@@ -8,33 +8,45 @@ warnings.filterwarnings(
     module="pydantic.*"
 )
 
-import base64
+import asyncio
 import json
 import logging
-import os
 import re
-import time
-import tempfile
 import unicodedata
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from contextlib import contextmanager
-from datetime import datetime, timezone
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Type, Union, Annotated
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union, Annotated
 
 from langchain_core.messages import ToolMessage
-from langchain_core.tools import InjectedToolCallId, tool
+from langchain_core.tools import InjectedToolCallId, StructuredTool
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
-from mistralai import Mistral
-from mistralai.extra import response_format_from_pydantic_model
 from pydantic import BaseModel
-from PyPDF2 import PdfReader, PdfWriter
-from langsmith import traceable
 
 from src.graph.state import DeepAgentState
 from src.models.analytical_method_models import MetodoAnaliticoDA, MetodoAnaliticoCompleto
-from src.prompts.tool_description_prompts import PDF_DA_METADATA_TOC_TOOL_DESC
+from src.prompts.tool_description_prompts import (
+    PDF_DA_METADATA_TOC_BATCH_TOOL_DESC,
+    PDF_DA_METADATA_TOC_TOOL_DESC,
+)
+from src.utils.canonical import canonical_fingerprint
+from src.utils.mistral_ocr import (  # noqa: F401 - re-exportadas por compatibilidad
+    OCR_MODEL,
+    aprocess_document,
+    aprocess_document_streaming,
+    aprocess_documents_streaming,
+    encode_pdf,
+    encode_pdf_bytes,
+    get_pdf_page_count,
+    process_chunk,
+    process_document,
+    process_document_streaming,
+    process_documents_streaming,
+    split_pdf_into_chunks,
+)
+from src.utils.progress import get_progress_writer
+from src.utils.blob_store import offload_text
+from src.utils.vfs import make_file_entry
 
 logger = logging.getLogger(__name__)
 
@@ -50,7 +62,7 @@ def _extract_source_file_name(pdf_path: str) -> str:
     return filename
 
 # ============================================================
-# Utilidades PDF
+# Utilidades PDF (chunking y OCR en src/utils/mistral_ocr.py)
 # ============================================================
 
 @contextmanager
@@ -73,141 +85,42 @@ def _prepare_pdf_document(document_path: str):
     )
 
 
-def get_pdf_page_count(pdf_path: str) -> int:
-    """Get the number of pages in a PDF."""
-    try:
-        with open(pdf_path, "rb") as pdf_file:
-            reader = PdfReader(pdf_file)
-            return len(reader.pages)
-    except Exception as e:
-        logger.error(f"Error counting pages in {pdf_path}: {e}")
-        return 0
-
-
-def split_pdf_into_chunks(
-    pdf_path: str, max_pages_per_chunk: int = 8, chunk_overlap_pages: int = 2
-) -> List[str]:
-    """Split PDF into chunks of pages with overlap and temporary files."""
-    chunk_files: List[str] = []
-    try:
-        reader = PdfReader(pdf_path)
-        total_pages = len(reader.pages)
-        if total_pages == 0:
-            return []
-
-        overlap = max(chunk_overlap_pages, 0)
-        chunk_size = max(max_pages_per_chunk, 1)
-        step = max(chunk_size - overlap, 1)
-
-        for start in range(0, total_pages, step):
-            end = min(start + chunk_size, total_pages)
-            chunk_writer = PdfWriter()
-            for page_idx in range(start, end):
-                chunk_writer.add_page(reader.pages[page_idx])
-
-            with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as chunk_pdf:
-                chunk_writer.write(chunk_pdf)
-                chunk_files.append(chunk_pdf.name)
-
-        return chunk_files
-    except Exception as e:  # pragma: no cover - defensive
-        logger.error(f"Error splitting PDF into chunks: {e}")
-        for chunk_file in chunk_files:
-            try:
-                os.unlink(chunk_file)
-            except OSError:
-                pass
-        return []
-
-
-def encode_pdf(pdf_path: str) -> Optional[str]:
-    """Encode the pdf to base64."""
-    try:
-        with open(pdf_path, "rb") as pdf_file:
-            return base64.b64encode(pdf_file.read()).decode("utf-8")
-    except Exception as e:
-        logger.error(f"Error encoding PDF {pdf_path}: {e}")
-        return None
-
-
-def process_chunk(
-    pdf_path: str,
-    extraction_model: Type[BaseModel],
-    chunk_retry_backoff_seconds: int = 5,
-    chunk_retry_attempts: int = 3,
-):
-    """Process a single PDF chunk with Mistral OCR + Document Annotation."""
-    base64_pdf = encode_pdf(pdf_path)
-    if not base64_pdf:
-        return None
-
-    api_key = os.getenv("MISTRAL_API_KEY")
-    if not api_key:
-        raise EnvironmentError(
-            "Defina MISTRAL_API_KEY en el entorno o en el archivo .env"
-        )
-    ocr_client = Mistral(api_key=api_key, timeout_ms=300000)
-
-    request_params: Dict[str, Any] = {
-        "model": "mistral-ocr-latest",
-        "document": {
-            "type": "document_url",
-            "document_url": f"data:application/pdf;base64,{base64_pdf}",
-        },
-        "include_image_base64": False,
-    }
-
-    if extraction_model:
-        try:
-            request_params["document_annotation_format"] = (
-                response_format_from_pydantic_model(extraction_model)
-            )
-        except Exception as exc:
-            logger.warning(
-                f"No se pudo generar schema pydantic para {pdf_path}: {exc}"
-            )
-
-    last_exception: Optional[Exception] = None
-    total_attempts = max(chunk_retry_attempts, 1)
-
-    for attempt in range(1, total_attempts + 1):
-        try:
-            return ocr_client.ocr.process(**request_params)
-        except Exception as exc:
-            last_exception = exc
-            if attempt >= total_attempts:
-                break
-            wait_seconds = chunk_retry_backoff_seconds * attempt
-            logger.warning(
-                f"Retrying chunk {pdf_path} after error: {exc}. "
-                f"Intento {attempt}/{chunk_retry_attempts} en {wait_seconds}s"
-            )
-            time.sleep(wait_seconds)
-
-    logger.error(f"Error processing chunk {pdf_path}: {last_exception}")
-    return None
-
 # ============================================================
 # Utilidades de merge / normalizaciÃ³n
 # ============================================================
 
 def _merge_list_items(target_list: list, source_list: list, *, field_name: Optional[str] = None):
-    """Mergea listas cuidando duplicados y combinando elementos dict similares."""
+    """Mergea listas cuidando duplicados y combinando elementos dict similares.
+
+    Los elementos ya presentes se indexan por huella canónica (JSON con llaves
+    ordenadas), así que cada elemento entrante se resuelve en O(1) en lugar de
+    recorrer ``target_list`` con igualdad profunda. Se conserva el orden de inserción.
+    """
+    index: Dict[str, Any] = {}
+    for existing in target_list:
+        fingerprint = canonical_fingerprint(existing)
+        if fingerprint is not None:
+            index.setdefault(fingerprint, existing)
 
     for item in source_list:
         if item in (None, [], {}, ""):
             continue
 
-        if isinstance(item, dict):
-            existing = next(
-                (t for t in target_list if isinstance(t, dict) and t == item), None
-            )
-            if existing is not None:
+        fingerprint = canonical_fingerprint(item)
+        if fingerprint is None:
+            # Valor no serializable: comparación directa como antes
+            if item not in target_list:
+                target_list.append(item)
+            continue
+
+        if fingerprint in index:
+            existing = index[fingerprint]
+            if isinstance(existing, dict) and isinstance(item, dict):
                 _merge_chunk_data(existing, item)
-                continue
+            continue
 
-        if item not in target_list:
-            target_list.append(item)
+        target_list.append(item)
+        index[fingerprint] = item
 
 
 def _merge_chunk_data(target: dict, source: dict):
@@ -373,74 +286,185 @@ def _build_annotation_summary(model_instance: Any) -> str:
 
 
 # ============================================================
-# Procesamiento de documento (chunking + OCR)
+# Consolidación de chunks
 # ============================================================
 
-@traceable
-def process_document(
-    pdf_path: str,
-    extraction_model: Type[BaseModel],
-    max_pages_per_chunk: int = 8,
-    chunk_overlap_pages: int = 0,
-) -> List[Any]:
-    """Process PDF with automatic chunking if needed."""
-    total_pages = get_pdf_page_count(pdf_path)
-    logger.info("Processing PDF %s with %s pages", pdf_path, total_pages)
-    if total_pages == 0:
-        logger.error("Skipping %s: could not read any pages", pdf_path)
-        return []
-
-    if total_pages <= max_pages_per_chunk:
-        result = process_chunk(
-            pdf_path,
-            extraction_model,
-            chunk_retry_backoff_seconds=5,
-            chunk_retry_attempts=3,
-        )
-        return [result] if result else []
+def _parse_chunk_annotation(response: Any, chunk_number: int) -> Optional[Dict[str, Any]]:
+    """Extrae el document_annotation de una respuesta de OCR como dict."""
+    annotation_data = None
+    if hasattr(response, "document_annotation"):
+        annotation_data = response.document_annotation
+    elif isinstance(response, dict) and "document_annotation" in response:
+        annotation_data = response["document_annotation"]
 
-    chunk_files = split_pdf_into_chunks(
-        pdf_path,
-        max_pages_per_chunk=max_pages_per_chunk,
-        chunk_overlap_pages=chunk_overlap_pages,
-    )
-    if not chunk_files:
-        return []
+    if not annotation_data:
+        return None
+    try:
+        if isinstance(annotation_data, str):
+            return json.loads(annotation_data)
+        if isinstance(annotation_data, dict):
+            return annotation_data
+        return json.loads(str(annotation_data))
+    except (json.JSONDecodeError, TypeError) as e:
+        logger.warning("Error parsing chunk %s annotation: %s", chunk_number, e)
+        return None
 
-    indexed_results: List[Tuple[int, Any]] = []
 
-    try:
-        max_workers = max(1, min(4, len(chunk_files)))
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_map = {
-                executor.submit(
-                    process_chunk,
-                    chunk_file,
-                    extraction_model,
-                    5,
-                    3,
-                ): (idx, chunk_file)
-                for idx, chunk_file in enumerate(chunk_files)
+def _iter_markdown_sections(payload: Any):
+    """Itera recursivamente las secciones de markdown presentes en la respuesta."""
+    if payload in (None, "", [], {}):
+        return
+
+    markdown_value = _resolve_attr(payload, "markdown")
+    if isinstance(markdown_value, str):
+        text = markdown_value.strip()
+        if text:
+            yield text
+    elif isinstance(markdown_value, (list, tuple)):
+        for nested in markdown_value:
+            yield from _iter_markdown_sections(nested)
+    elif markdown_value not in (None, "", [], {}):
+        yield from _iter_markdown_sections(markdown_value)
+
+    pages = _resolve_attr(payload, "pages")
+    if isinstance(pages, list):
+        for page in pages:
+            yield from _iter_markdown_sections(page)
+
+    output_items = _resolve_attr(payload, "output")
+    if isinstance(output_items, list):
+        for item in output_items:
+            yield from _iter_markdown_sections(item)
+
+
+class IncrementalChunkConsolidator:
+    """Consolida annotation y markdown de los chunks en orden de página a medida que llegan.
+
+    Implementa el protocolo ``ChunkSink`` de ``process_document_streaming``: un
+    chunk se mergea en cuanto él y todos los anteriores están listos, y la
+    respuesta cruda se descarta inmediatamente. Así no se retienen todas las
+    respuestas de OCR a la vez y se puede reportar progreso real.
+    """
+
+    def __init__(
+        self,
+        document_name: str,
+        extraction_model: Optional[Type[BaseModel]],
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.document_name = document_name
+        self.extraction_model = extraction_model
+        self.progress_callback = progress_callback
+        self.total_chunks = 0
+        self.total_pages = 0
+        self.chunks_done = 0
+        self.pages_done = 0
+        self._next_index = 0
+        self._last_page = -1
+        self._pending: Dict[int, List[Any]] = {}
+        self._chunk_data: Dict[str, Any] = {}
+        self._markdown_parts: List[str] = []
+
+    def start(self, total_chunks: int, total_pages: int) -> None:
+        self.total_chunks = total_chunks
+        self.total_pages = total_pages
+        self._emit()
+
+    def add(self, index: int, responses: Any) -> None:
+        """Registra las respuestas del chunk ``index`` (lista, o una sola respuesta)."""
+        if not isinstance(responses, list):
+            responses = [responses]
+        self._pending[index] = responses
+        merged_any = False
+        while self._next_index in self._pending:
+            self._consume(self._pending.pop(self._next_index))
+            self._next_index += 1
+            merged_any = True
+        if merged_any:
+            self._emit()
+
+    def _new_pages(self, response: Any) -> Optional[List[Any]]:
+        """Páginas aún no vistas (por índice absoluto); ``None`` si no hay índices."""
+        pages = _resolve_attr(response, "pages")
+        if not isinstance(pages, list):
+            return None
+        indexes = [_resolve_attr(page, "index") for page in pages]
+        if not all(isinstance(idx, int) for idx in indexes):
+            return None
+        new_pages = [page for page, idx in zip(pages, indexes) if idx > self._last_page]
+        if new_pages:
+            self._last_page = max(self._last_page, *indexes)
+        return new_pages
+
+    def _consume(self, responses: List[Any]) -> None:
+        self.chunks_done += 1
+        for response in responses:
+            if not response:
+                continue
+
+            chunk_data = _parse_chunk_annotation(response, self.chunks_done)
+            if chunk_data:
+                _merge_chunk_data(self._chunk_data, chunk_data)
+                logger.debug("Merged chunk %s data", self.chunks_done)
+
+            # Las páginas solapadas entre chunks ya se agregaron con el chunk anterior
+            new_pages = self._new_pages(response)
+            if new_pages is None:
+                markdown_source = response
+                pages = _resolve_attr(response, "pages")
+                self.pages_done += len(pages) if isinstance(pages, list) else 0
+            else:
+                markdown_source = {"pages": new_pages}
+                self.pages_done += len(new_pages)
+
+            self._markdown_parts.extend(
+                text for text in _iter_markdown_sections(markdown_source) if text
+            )
+
+        if self.total_pages:
+            self.pages_done = min(self.pages_done, self.total_pages)
+
+    def _emit(self) -> None:
+        if self.progress_callback is None:
+            return
+        self.progress_callback(
+            {
+                "event": "ocr_progress",
+                "document": self.document_name,
+                "pages_done": self.pages_done,
+                "total_pages": self.total_pages,
+                "chunks_done": self.chunks_done,
+                "total_chunks": self.total_chunks,
             }
+        )
 
-            for future in as_completed(future_map):
-                idx, chunk_file = future_map[future]
-                try:
-                    result = future.result()
-                except Exception as exc:
-                    logger.error("Error processing chunk %s: %s", chunk_file, exc)
-                    continue
-                if result:
-                    indexed_results.append((idx, result))
-    finally:
-        for chunk_file in chunk_files:
+    def full_markdown(self) -> str:
+        return "\n\n".join(self._markdown_parts).strip()
+
+    def build_model(self):
+        """Crea la instancia del modelo Pydantic con los datos mergeados (o el dict si falla)."""
+        if self._pending:
+            logger.warning(
+                "%s chunks de %s quedaron sin consolidar (faltan chunks previos)",
+                len(self._pending),
+                self.document_name,
+            )
+        if self._chunk_data and self.extraction_model:
             try:
-                os.unlink(chunk_file)
+                model_instance = self.extraction_model(**self._chunk_data)
+                logger.info(
+                    "Created %s instance for %s",
+                    self.extraction_model.__name__,
+                    self.document_name,
+                )
+                return model_instance
             except Exception as e:
-                logger.warning("Could not delete temporary file %s: %s", chunk_file, e)
+                logger.error("Error creating model instance for %s: %s", self.document_name, e)
+                return self._chunk_data
+
+        logger.warning("No valid data to create model instance for %s", self.document_name)
+        return None
 
-    indexed_results.sort(key=lambda item: item[0])
-    return [result for _, result in indexed_results]
 
 def consolidate_chunks_data(
     chunk_responses: List[Any],
@@ -453,46 +477,11 @@ def consolidate_chunks_data(
             logger.warning("No chunks to process for %s", document_name)
             return None
 
-        all_chunk_data: Dict[str, Any] = {}
-
+        consolidator = IncrementalChunkConsolidator(document_name, extraction_model)
+        consolidator.start(len(chunk_responses), 0)
         for i, response in enumerate(chunk_responses):
-            if not response:
-                continue
-
-            annotation_data = None
-            if hasattr(response, "document_annotation"):
-                annotation_data = response.document_annotation
-            elif isinstance(response, dict) and "document_annotation" in response:
-                annotation_data = response["document_annotation"]
-
-            if annotation_data:
-                try:
-                    if isinstance(annotation_data, str):
-                        chunk_data = json.loads(annotation_data)
-                    elif isinstance(annotation_data, dict):
-                        chunk_data = annotation_data
-                    else:
-                        chunk_data = json.loads(str(annotation_data))
-
-                    _merge_chunk_data(all_chunk_data, chunk_data)
-                    logger.debug("Merged chunk %s data", i + 1)
-
-                except (json.JSONDecodeError, TypeError) as e:
-                    logger.warning("Error parsing chunk %s annotation: %s", i + 1, e)
-
-        if all_chunk_data and extraction_model:
-            try:
-                model_instance = extraction_model(**all_chunk_data)
-                logger.info(
-                    "Created %s instance for %s", extraction_model.__name__, document_name
-                )
-                return model_instance
-            except Exception as e:
-                logger.error("Error creating model instance for %s: %s", document_name, e)
-                return all_chunk_data
-
-        logger.warning("No valid data to create model instance for %s", document_name)
-        return None
+            consolidator.add(i, response)
+        return consolidator.build_model()
 
     except Exception as e:
         logger.error("Error consolidating chunks for %s: %s", document_name, e)
@@ -507,32 +496,6 @@ def _collect_full_markdown_from_chunks(chunk_responses: List[Any]) -> str:
     if not chunk_responses:
         return ""
 
-    def _iter_markdown_sections(payload: Any):
-        """Itera recursivamente las secciones de markdown presentes en la respuesta."""
-        if payload in (None, "", [], {}):
-            return
-
-        markdown_value = _resolve_attr(payload, "markdown")
-        if isinstance(markdown_value, str):
-            text = markdown_value.strip()
-            if text:
-                yield text
-        elif isinstance(markdown_value, (list, tuple)):
-            for nested in markdown_value:
-                yield from _iter_markdown_sections(nested)
-        elif markdown_value not in (None, "", [], {}):
-            yield from _iter_markdown_sections(markdown_value)
-
-        pages = _resolve_attr(payload, "pages")
-        if isinstance(pages, list):
-            for page in pages:
-                yield from _iter_markdown_sections(page)
-
-        output_items = _resolve_attr(payload, "output")
-        if isinstance(output_items, list):
-            for item in output_items:
-                yield from _iter_markdown_sections(item)
-
     parts: List[str] = []
     for response in chunk_responses:
         for markdown_text in _iter_markdown_sections(response):
@@ -547,46 +510,29 @@ def _collect_full_markdown_from_chunks(chunk_responses: List[Any]) -> str:
 # Herramienta de procesamiento del documento
 # ============================================================
 
-@tool(description=PDF_DA_METADATA_TOC_TOOL_DESC)
-def pdf_da_metadata_toc(
+def _metadata_document_name(dir_method: str, base_path: str) -> str:
+    base = (base_path or DEFAULT_BASE_PATH).rstrip("/")
+    return f"{base}/method_metadata_TOC_{_extract_source_file_name(dir_method)}.json"
+
+
+def _build_metadata_toc_entry(
+    consolidator: IncrementalChunkConsolidator,
     dir_method: str,
-    state: Annotated[DeepAgentState, InjectedState],
-    tool_call_id: Annotated[str, InjectedToolCallId],
-    base_path: str = DEFAULT_BASE_PATH,
-) -> Command:
-    """
-    Procesa un PDF de método analítico y extrae metadata + TOC + markdown.
-    
-    Args:
-        dir_method: Ruta al archivo PDF
-        base_path: Ruta base (/actual_method o /proposed_method)
-    
-    El nombre del archivo de salida incluye el nombre del PDF de origen.
-    """
-    # Extraer source_file_name del nombre del PDF
+    base_path: str,
+) -> Tuple[str, Dict[str, Any], str]:
+    """Construye ``(ruta, entrada de files, resumen)`` a partir de los chunks consolidados."""
     source_file_name = _extract_source_file_name(dir_method)
-    base = (base_path or DEFAULT_BASE_PATH).rstrip("/")
-    document_name = f"{base}/method_metadata_TOC_{source_file_name}.json"
+    document_name = _metadata_document_name(dir_method, base_path)
 
-    # 1. Procesar PDF
+    # 2. Modelo pydantic / dict con las annotations mergeadas
     try:
-        with _prepare_pdf_document(dir_method) as pdf_document_path:
-            chunk_responses = process_document(
-                pdf_path=pdf_document_path,
-                extraction_model=MetodoAnaliticoDA,
-                max_pages_per_chunk=8,
-            )
-    except Exception as exc:
-        logger.error("Error procesando el documento %s: %s", document_name, exc)
-        raise
-
-    # 2. Consolidar chunks -> modelo pydantic / dict
-    model_instance = consolidate_chunks_data(
-        chunk_responses, document_name, MetodoAnaliticoDA
-    )
+        model_instance = consolidator.build_model()
+    except Exception as e:
+        logger.error("Error consolidating chunks for %s: %s", document_name, e)
+        model_instance = None
 
-    # 4. Construir markdown completo
-    full_markdown = _collect_full_markdown_from_chunks(chunk_responses)
+    # 4. Markdown completo (ya acumulado en orden de página)
+    full_markdown = consolidator.full_markdown()
 
     # 5. Construir modelo completo con markdown
     full_model_instance = _build_full_model_with_markdown(
@@ -605,8 +551,6 @@ def pdf_da_metadata_toc(
     
     summary_message = _build_annotation_summary(full_model_instance)
 
-    files = dict(state.get("files", {}))
-
     # 6. Guardar JSON estructurado del metodo completo
     if full_model_instance:
         serialized_data = _model_instance_to_dict(full_model_instance)
@@ -615,20 +559,14 @@ def pdf_da_metadata_toc(
             serialized_data.get("tabla_de_contenidos"), full_markdown
         )
         serialized_data["toc_validation_metrics"] = toc_metrics
-        full_json_string = json.dumps(
-            serialized_data, indent=2, ensure_ascii=False
-        )
-        files[document_name] = {
-            "content": full_json_string.split("\n"),
-            "data": serialized_data,
-            "modified_at": datetime.now(timezone.utc).isoformat(),
-        }
+        # El markdown OCR completo va al blob store; el estado guarda la referencia
+        if "markdown_completo" in serialized_data:
+            serialized_data["markdown_completo"] = offload_text(
+                serialized_data["markdown_completo"]
+            )
+        file_entry = make_file_entry(serialized_data)
     else:
-        files[document_name] = {
-            "content": ["{}"],
-            "data": {"source_file_name": source_file_name},
-            "modified_at": datetime.now(timezone.utc).isoformat(),
-        }
+        file_entry = make_file_entry({"source_file_name": source_file_name})
 
 
     enhanced_summary = (
@@ -636,12 +574,222 @@ def pdf_da_metadata_toc(
         f"Archivo guardado: {document_name}\n"
         f"source_file_name: '{source_file_name}' (usar este valor en las siguientes herramientas)"
     )
+    return document_name, file_entry, enhanced_summary
+
 
+def _build_metadata_toc_update(
+    consolidator: IncrementalChunkConsolidator,
+    dir_method: str,
+    base_path: str,
+    tool_call_id: str,
+) -> Command:
+    """Construye el update de estado a partir de los chunks ya consolidados."""
+    document_name, file_entry, enhanced_summary = _build_metadata_toc_entry(
+        consolidator, dir_method, base_path
+    )
     return Command(
         update={
-            "files": files,
+            "files": {document_name: file_entry},
             "messages": [
                 ToolMessage(enhanced_summary, tool_call_id=tool_call_id)
             ],
         }
     )
+
+
+def _pdf_da_metadata_toc(
+    dir_method: str,
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    base_path: str = DEFAULT_BASE_PATH,
+) -> Command:
+    """
+    Procesa un PDF de método analítico y extrae metadata + TOC + markdown.
+    
+    Args:
+        dir_method: Ruta al archivo PDF
+        base_path: Ruta base (/actual_method o /proposed_method)
+    
+    El nombre del archivo de salida incluye el nombre del PDF de origen.
+    """
+    document_name = _metadata_document_name(dir_method, base_path)
+    consolidator = IncrementalChunkConsolidator(
+        document_name, MetodoAnaliticoDA, progress_callback=get_progress_writer()
+    )
+    try:
+        with _prepare_pdf_document(dir_method) as pdf_document_path:
+            process_document_streaming(
+                pdf_path=pdf_document_path,
+                extraction_model=MetodoAnaliticoDA,
+                sink=consolidator,
+                max_pages_per_chunk=8,
+            )
+    except Exception as exc:
+        logger.error("Error procesando el documento %s: %s", document_name, exc)
+        raise
+
+    return _build_metadata_toc_update(
+        consolidator, dir_method, base_path, tool_call_id
+    )
+
+
+async def _apdf_da_metadata_toc(
+    dir_method: str,
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    base_path: str = DEFAULT_BASE_PATH,
+) -> Command:
+    """Versión async: el OCR de los chunks usa el cliente async de Mistral."""
+    document_name = _metadata_document_name(dir_method, base_path)
+    consolidator = IncrementalChunkConsolidator(
+        document_name, MetodoAnaliticoDA, progress_callback=get_progress_writer()
+    )
+    try:
+        with _prepare_pdf_document(dir_method) as pdf_document_path:
+            await aprocess_document_streaming(
+                pdf_path=pdf_document_path,
+                extraction_model=MetodoAnaliticoDA,
+                sink=consolidator,
+                max_pages_per_chunk=8,
+            )
+    except Exception as exc:
+        logger.error("Error procesando el documento %s: %s", document_name, exc)
+        raise
+
+    return await asyncio.to_thread(
+        _build_metadata_toc_update,
+        consolidator,
+        dir_method,
+        base_path,
+        tool_call_id,
+    )
+
+
+def _prepare_batch_documents(
+    dir_methods: List[str],
+    base_path: str,
+    stack: ExitStack,
+) -> Tuple[List[Tuple[str, str, IncrementalChunkConsolidator]], List[str]]:
+    """Valida cada ruta del lote; devuelve ``(dir_method, pdf_path, consolidador)`` y los errores."""
+    progress = get_progress_writer()
+    documents: List[Tuple[str, str, IncrementalChunkConsolidator]] = []
+    failures: List[str] = []
+    seen: set = set()
+    for dir_method in dir_methods:
+        if dir_method in seen:
+            continue
+        seen.add(dir_method)
+        try:
+            pdf_document_path = stack.enter_context(_prepare_pdf_document(dir_method))
+        except Exception as exc:
+            logger.error("Documento omitido del lote %s: %s", dir_method, exc)
+            failures.append(f"- {dir_method}: {exc}")
+            continue
+        consolidator = IncrementalChunkConsolidator(
+            _metadata_document_name(dir_method, base_path),
+            MetodoAnaliticoDA,
+            progress_callback=progress,
+        )
+        documents.append((dir_method, pdf_document_path, consolidator))
+    return documents, failures
+
+
+def _build_metadata_toc_batch_update(
+    documents: List[Tuple[str, str, IncrementalChunkConsolidator]],
+    failures: List[str],
+    base_path: str,
+    tool_call_id: str,
+) -> Command:
+    """Un único update de estado con todos los ``method_metadata_TOC_*.json`` del lote."""
+    files_update: Dict[str, Any] = {}
+    summaries: List[str] = []
+    for dir_method, _, consolidator in documents:
+        document_name, file_entry, enhanced_summary = _build_metadata_toc_entry(
+            consolidator, dir_method, base_path
+        )
+        files_update[document_name] = file_entry
+        summaries.append(enhanced_summary)
+
+    message_parts = [f"Lote procesado: {len(documents)} documento(s)."]
+    message_parts.extend(summaries)
+    if failures:
+        message_parts.append("Documentos no procesados:\n" + "\n".join(failures))
+
+    return Command(
+        update={
+            "files": files_update,
+            "messages": [
+                ToolMessage("\n\n".join(message_parts), tool_call_id=tool_call_id)
+            ],
+        }
+    )
+
+
+def _pdf_da_metadata_toc_batch(
+    dir_methods: List[str],
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    base_path: str = DEFAULT_BASE_PATH,
+) -> Command:
+    """
+    Procesa varios PDFs de métodos analíticos en una sola ola de OCR.
+    
+    Args:
+        dir_methods: Rutas a los archivos PDF
+        base_path: Ruta base (/actual_method o /proposed_method)
+    
+    Los chunks de todos los documentos se planifican juntos y comparten un
+    único pool de OCR; todos los archivos se escriben en un solo update.
+    """
+    with ExitStack() as stack:
+        documents, failures = _prepare_batch_documents(dir_methods, base_path, stack)
+        process_documents_streaming(
+            [(pdf_document_path, consolidator) for _, pdf_document_path, consolidator in documents],
+            extraction_model=MetodoAnaliticoDA,
+            max_pages_per_chunk=8,
+        )
+
+    return _build_metadata_toc_batch_update(
+        documents, failures, base_path, tool_call_id
+    )
+
+
+async def _apdf_da_metadata_toc_batch(
+    dir_methods: List[str],
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    base_path: str = DEFAULT_BASE_PATH,
+) -> Command:
+    """Versión async del lote: los documentos se procesan concurrentemente."""
+    with ExitStack() as stack:
+        documents, failures = _prepare_batch_documents(dir_methods, base_path, stack)
+        await aprocess_documents_streaming(
+            [(pdf_document_path, consolidator) for _, pdf_document_path, consolidator in documents],
+            extraction_model=MetodoAnaliticoDA,
+            max_pages_per_chunk=8,
+        )
+
+    return await asyncio.to_thread(
+        _build_metadata_toc_batch_update,
+        documents,
+        failures,
+        base_path,
+        tool_call_id,
+    )
+
+
+# Se expone con implementación sync y async: ``invoke`` (Streamlit) usa la
+# primera y ``ainvoke`` (servidor LangGraph) la segunda.
+pdf_da_metadata_toc = StructuredTool.from_function(
+    func=_pdf_da_metadata_toc,
+    coroutine=_apdf_da_metadata_toc,
+    name="pdf_da_metadata_toc",
+    description=PDF_DA_METADATA_TOC_TOOL_DESC,
+)
+
+pdf_da_metadata_toc_batch = StructuredTool.from_function(
+    func=_pdf_da_metadata_toc_batch,
+    coroutine=_apdf_da_metadata_toc_batch,
+    name="pdf_da_metadata_toc_batch",
+    description=PDF_DA_METADATA_TOC_BATCH_TOOL_DESC,
+)
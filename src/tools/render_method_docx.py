@@ -1,6 +1,5 @@
 ﻿from __future__ import annotations
 
-import json
 import logging
 import os
 import re
@@ -17,6 +16,7 @@ from langgraph.types import Command
 
 from src.graph.state import DeepAgentState
 from src.prompts.tool_description_prompts import RENDER_METHOD_DOCX_TOOL_DESCRIPTION
+from src.utils.vfs import make_file_entry, read_file_data
 
 try:
     from docxtpl import DocxTemplate, InlineImage
@@ -425,29 +425,8 @@ def _build_method_context(method_data: Dict[str, Any]) -> Dict[str, Any]:
 
 def _load_json_payload(files: dict[str, Any], path: str) -> Optional[dict[str, Any]]:
     """Carga un payload JSON desde el filesystem virtual."""
-    entry = files.get(path)
-    if entry is None:
-        return None
-
-    if isinstance(entry, dict):
-        if "data" in entry and isinstance(entry["data"], dict):
-            return entry["data"]
-        if isinstance(entry.get("content"), str):
-            try:
-                return json.loads(entry["content"])
-            except json.JSONDecodeError:
-                logger.warning(f"Error parseando JSON desde 'content' en {path}")
-                return None
-        return entry
-
-    if isinstance(entry, str):
-        try:
-            return json.loads(entry)
-        except json.JSONDecodeError:
-            logger.warning(f"Error parseando JSON string en {path}")
-            return None
-
-    return None
+    payload = read_file_data(files.get(path), path)
+    return payload if isinstance(payload, dict) else None
 
 
 def _validate_docx(path: Path) -> None:
@@ -510,7 +489,7 @@ def render_method_docx(
     """
     logger.info("Iniciando 'render_method_docx'")
 
-    source_files = dict(state.get("files", {}) or {})
+    source_files = state.get("files", {}) or {}
 
     # Cargar el metodo desde el filesystem virtual
     method_data = _load_json_payload(source_files, method_path)
@@ -564,12 +543,8 @@ def render_method_docx(
         "detected_language": detected_language,
     }
 
-    files_update = source_files.copy()
-    files_update["/new/rendered_docx_info.json"] = {
-        "content": json.dumps(docx_info, ensure_ascii=False, indent=2),
-        "data": docx_info,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    files_update = {}
+    files_update["/new/rendered_docx_info.json"] = make_file_entry(docx_info)
 
     # Extraer info del metodo para el mensaje
     nombre_producto = method_data.get("nombre_producto", "N/A")
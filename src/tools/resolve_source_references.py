@@ -5,10 +5,8 @@ Esta herramienta mapea los códigos de producto mencionados en el CC a los nombr
 de archivos reales en /actual_method/ y /proposed_method/.
 """
 
-import json
 import logging
 import re
-from datetime import datetime, timezone
 from typing import Annotated, Dict, List, Optional, Any, Tuple
 
 from langchain_core.messages import ToolMessage
@@ -18,11 +16,13 @@ from langgraph.types import Command
 
 from src.graph.state import DeepAgentState
 from src.prompts.tool_description_prompts import RESOLVE_SOURCE_REFERENCES_TOOL_DESC
+from src.utils.vfs import list_paths, make_file_entry, read_file_data
 
 logger = logging.getLogger(__name__)
 
 # Patrones para archivos de metadatos
 METADATA_PATTERN = "method_metadata_TOC_"
+METADATA_DIRS = ("/actual_method/", "/proposed_method/")
 CC_SUMMARY_PATH = "/new/change_control_summary.json"
 
 
@@ -73,17 +73,15 @@ def _build_source_mapping(files: Dict[str, Any]) -> Dict[str, str]:
     """
     mapping: Dict[str, str] = {}
     
-    for file_path, file_info in files.items():
-        # Solo procesar archivos de metadatos
-        if METADATA_PATTERN not in file_path:
-            continue
-        
-        # Verificar que sea de actual_method o proposed_method
-        if "/actual_method/" not in file_path and "/proposed_method/" not in file_path:
-            continue
-        
-        data = file_info.get("data", {})
-        if not data:
+    # Solo archivos de metadatos de /actual_method/ y /proposed_method/
+    metadata_paths = [
+        file_path
+        for file_path in list_paths(files, METADATA_DIRS)
+        if METADATA_PATTERN in file_path
+    ]
+    for file_path in metadata_paths:
+        data = read_file_data(files[file_path], file_path)
+        if not isinstance(data, dict) or not data:
             continue
         
         source_file_name = data.get("source_file_name")
@@ -272,43 +270,26 @@ def resolve_source_references(
             }
         )
     
-    cc_data = cc_file.get("data", {})
-    if not cc_data:
-        # Intentar parsear desde content
-        content = cc_file.get("content", [])
-        if isinstance(content, list):
-            content = "\n".join(content)
-        try:
-            cc_data = json.loads(content)
-        except (json.JSONDecodeError, TypeError):
-            message = f"No se pudo parsear {CC_SUMMARY_PATH}."
-            logger.error(message)
-            return Command(
-                update={
-                    "messages": [ToolMessage(message, tool_call_id=tool_call_id)],
-                }
-            )
+    cc_data = read_file_data(cc_file, CC_SUMMARY_PATH)
+    if not isinstance(cc_data, dict):
+        message = f"No se pudo parsear {CC_SUMMARY_PATH}."
+        logger.error(message)
+        return Command(
+            update={
+                "messages": [ToolMessage(message, tool_call_id=tool_call_id)],
+            }
+        )
     
     # 3. Actualizar CC summary con referencias resueltas
     updated_cc, report = _update_cc_summary(cc_data, mapping)
     
     # 4. Guardar CC actualizado
-    updated_files = dict(files)
-    content_str = json.dumps(updated_cc, indent=2, ensure_ascii=False)
-    updated_files[CC_SUMMARY_PATH] = {
-        "content": content_str.split("\n"),
-        "data": updated_cc,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    updated_files = {}
+    updated_files[CC_SUMMARY_PATH] = make_file_entry(updated_cc)
     
     # 5. Guardar reporte de resolución
     report_path = "/new/source_reference_mapping.json"
-    report_str = json.dumps(report, indent=2, ensure_ascii=False)
-    updated_files[report_path] = {
-        "content": report_str.split("\n"),
-        "data": report,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    updated_files[report_path] = make_file_entry(report)
     
     # 6. Construir mensaje de resumen
     resolved_count = len(report["resolved"])
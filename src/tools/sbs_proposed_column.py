@@ -8,15 +8,14 @@ warnings.filterwarnings(
     module="pydantic.*"
 )
 
-import base64
-import json
+import hashlib
 import logging
 import os
-import tempfile
-import time
-from datetime import datetime, timezone
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Annotated, Any, List, Optional, Tuple
+from typing import Annotated, Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import cv2
 import fitz  # PyMuPDF
@@ -25,9 +24,11 @@ from langchain_core.messages import ToolMessage
 from langchain_core.tools import InjectedToolCallId, tool
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
-from mistralai import Mistral
 
 from src.graph.state import DeepAgentState
+from src.utils.mistral_ocr import process_documents_streaming
+from src.utils.blob_store import offload_text
+from src.utils.vfs import make_file_entry
 
 logger = logging.getLogger(__name__)
 
@@ -36,6 +37,21 @@ DEFAULT_HEADER_PERCENT = 0.12
 DEFAULT_MARGIN_PX = 5
 DEFAULT_MIN_CONFIDENCE = 0.3
 DEFAULT_BASE_PATH = "/proposed_method"
+# Ancho (px) de la imagen reducida sobre la que se calcula el perfil de proyección
+DIVIDER_ANALYSIS_WIDTH = 600
+# Intensidad por debajo de la cual un pixel se considera tinta
+DIVIDER_INK_THRESHOLD = 160
+# Fracción del alto que debe cubrir la línea divisoria para confianza 1.0
+DIVIDER_FULL_CONFIDENCE_COVERAGE = 0.6
+DIVIDER_MAX_WORKERS = min(os.cpu_count() or 1, 8)
+# Tope por parte enviada a OCR; tras base64 (+33%) queda bajo el límite de payload de la API.
+DEFAULT_OCR_PART_MAX_MB = 30
+# Páginas por llamada de OCR: un fallo transitorio solo repite ese rango.
+OCR_PAGES_PER_CHUNK = 8
+# Miniatura (ancho, alto) del encabezado usada como huella de la plantilla
+LAYOUT_FINGERPRINT_SIZE = (32, 4)
+# Fracción de la confianza original que debe conservar un divisor cacheado al verificarlo
+LAYOUT_VERIFY_RATIO = 0.8
 
 
 def _extract_source_file_name(pdf_path: str) -> str:
@@ -46,25 +62,108 @@ def _extract_source_file_name(pdf_path: str) -> str:
     return Path(pdf_path).stem
 
 
-def _pdf_to_images(pdf_path: str, dpi: int = DEFAULT_DPI) -> List[np.ndarray]:
-    """Convert PDF pages to images."""
-    images: List[np.ndarray] = []
+def _pixmap_to_ndarray(pix: "fitz.Pixmap") -> np.ndarray:
+    """Vista ``(alto, ancho, canales)`` RGB sobre las muestras del pixmap, sin PNG intermedio.
+
+    ``pix.samples`` es una única copia plana del buffer; ``np.frombuffer`` no
+    copia de nuevo y el array mantiene vivo ese buffer (a diferencia de
+    ``samples_mv``, que deja de ser válido al liberarse el pixmap).
+    """
+    buffer = np.frombuffer(pix.samples, dtype=np.uint8)
+    rows = buffer.reshape(pix.height, pix.stride)[:, : pix.width * pix.n]
+    img = rows.reshape(pix.height, pix.width, pix.n)
+    if pix.n == 4:
+        img = img[:, :, :3]
+    return img
+
+
+def _iter_page_images(pdf_path: str, dpi: int = DEFAULT_DPI) -> Iterator[np.ndarray]:
+    """Renderiza las páginas una a una como arrays RGB (generador).
+
+    Solo la página en curso vive en memoria; el consumidor decide qué conservar.
+    """
+    mat = fitz.Matrix(dpi / 72, dpi / 72)
     doc = fitz.open(pdf_path)
-    for page in doc:
-        mat = fitz.Matrix(dpi / 72, dpi / 72)
-        pix = page.get_pixmap(matrix=mat)
-        img_data = pix.tobytes("png")
-        nparr = np.frombuffer(img_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        if img is not None:
-            images.append(img)
-    doc.close()
-    return images
+    try:
+        for page in doc:
+            pix = page.get_pixmap(matrix=mat, alpha=False)
+            yield _pixmap_to_ndarray(pix)
+    finally:
+        doc.close()
+
+
+def _to_gray(img: np.ndarray) -> np.ndarray:
+    """Las páginas se renderizan en RGB (orden de canales de PyMuPDF)."""
+    if img.ndim == 2:
+        return img
+    return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+
+
+def _projection_divider(content: np.ndarray) -> Tuple[int, float]:
+    """Divisor por perfil de proyección vertical sobre una versión reducida de la página.
+
+    La columna más oscura (mínimo de la intensidad media) dentro de la franja
+    central es la línea divisoria. La confianza es la fracción de filas en las
+    que esa columna es tinta; una línea que cubre al menos
+    ``DIVIDER_FULL_CONFIDENCE_COVERAGE`` del alto da confianza 1.0.
+    """
+    height, width = content.shape
+    scale = min(1.0, DIVIDER_ANALYSIS_WIDTH / float(width))
+    if scale < 1.0:
+        small = cv2.resize(
+            content,
+            (max(int(width * scale), 1), max(int(height * scale), 1)),
+            interpolation=cv2.INTER_AREA,
+        )
+    else:
+        small = content
+    small_width = small.shape[1]
+
+    band_start = int(small_width * 0.35)
+    band_end = max(int(small_width * 0.65), band_start + 1)
+    profile = cv2.reduce(small[:, band_start:band_end], 0, cv2.REDUCE_AVG, dtype=cv2.CV_32F)[0]
+    coarse_x = (band_start + int(np.argmin(profile)) + 0.5) / scale
+
+    # Refinar a resolución completa en una ventana de pocas columnas
+    radius = int(np.ceil(1.0 / scale)) + 1
+    lo = max(int(coarse_x) - radius, int(width * 0.35))
+    hi = min(int(coarse_x) + radius + 1, int(width * 0.65) + 1)
+    if hi <= lo:
+        return int(coarse_x), 0.0
+    strip = content[:, lo:hi]
+    column_means = cv2.reduce(strip, 0, cv2.REDUCE_AVG, dtype=cv2.CV_32F)[0]
+    offset = int(np.argmin(column_means))
+    divider_x = lo + offset
+
+    coverage = float(np.count_nonzero(strip[:, offset] < DIVIDER_INK_THRESHOLD)) / float(height)
+    confidence = min(coverage / DIVIDER_FULL_CONFIDENCE_COVERAGE, 1.0)
+    return divider_x, confidence
 
 
 def _detect_vertical_divider(img: np.ndarray, y_start: int = 0) -> Tuple[int, float]:
-    """Detect an approximate vertical divider between the two columns."""
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    """Detect an approximate vertical divider between the two columns.
+
+    Usa primero el perfil de proyección (reducido y vectorizado); Canny + Hough
+    a resolución completa solo se ejecuta si la confianza es baja.
+    """
+    gray = _to_gray(img)
+    height, width = gray.shape
+    content = gray[y_start:, :]
+    if content.shape[0] < 100:
+        return width // 2, 0.1
+
+    divider_x, confidence = _projection_divider(content)
+    if confidence >= DEFAULT_MIN_CONFIDENCE:
+        return divider_x, confidence
+
+    hough_x, hough_confidence = _detect_vertical_divider_hough(gray, y_start)
+    if hough_confidence > confidence:
+        return hough_x, hough_confidence
+    return divider_x, confidence
+
+
+def _detect_vertical_divider_hough(gray: np.ndarray, y_start: int = 0) -> Tuple[int, float]:
+    """Detector original (Canny + HoughLinesP a resolución completa), usado como respaldo."""
     height, width = gray.shape
     content = gray[y_start:, :]
     content_height = content.shape[0]
@@ -81,17 +180,19 @@ def _detect_vertical_divider(img: np.ndarray, y_start: int = 0) -> Tuple[int, fl
         maxLineGap=20,
     )
 
-    vertical_lines: List[int] = []
     if lines is not None:
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-            if abs(x2 - x1) < 10 and abs(y2 - y1) > content_height * 0.3:
-                avg_x = (x1 + x2) // 2
-                if width * 0.35 < avg_x < width * 0.65:
-                    vertical_lines.append(avg_x)
-
-    if vertical_lines:
-        return int(np.median(vertical_lines)), min(len(vertical_lines) / 5.0, 1.0)
+        segments = lines.reshape(-1, 4)
+        x1, y1, x2, y2 = segments[:, 0], segments[:, 1], segments[:, 2], segments[:, 3]
+        avg_x = (x1 + x2) // 2
+        is_vertical = (
+            (np.abs(x2 - x1) < 10)
+            & (np.abs(y2 - y1) > content_height * 0.3)
+            & (avg_x > width * 0.35)
+            & (avg_x < width * 0.65)
+        )
+        vertical_lines = avg_x[is_vertical]
+        if vertical_lines.size:
+            return int(np.median(vertical_lines)), min(vertical_lines.size / 5.0, 1.0)
 
     binary = cv2.threshold(content, 200, 255, cv2.THRESH_BINARY)[1]
     projection = np.sum(binary, axis=0)
@@ -103,161 +204,253 @@ def _detect_vertical_divider(img: np.ndarray, y_start: int = 0) -> Tuple[int, fl
     return width // 2, 0.3
 
 
+def _header_fingerprint(gray: np.ndarray, header_end: int) -> str:
+    """Huella gruesa del encabezado: miniatura de la franja superior cuantizada a 4 niveles.
+
+    Tolera cambios pequeños (número de página, fecha) pero distingue plantillas.
+    """
+    header = gray[: max(header_end, 1), :]
+    thumb = cv2.resize(header, LAYOUT_FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA)
+    return hashlib.blake2b((thumb >> 6).tobytes(), digest_size=8).hexdigest()
+
+
+def _verify_divider(content: np.ndarray, divider_x: int) -> float:
+    """Confianza de un divisor conocido: cobertura de tinta en una ventana de ±1 columna."""
+    height, width = content.shape
+    if height < 100 or not 0 <= divider_x < width:
+        return 0.0
+    strip = content[:, max(divider_x - 1, 0) : min(divider_x + 2, width)]
+    coverage = float(np.max(np.count_nonzero(strip < DIVIDER_INK_THRESHOLD, axis=0))) / float(height)
+    return min(coverage / DIVIDER_FULL_CONFIDENCE_COVERAGE, 1.0)
+
+
+class _DividerLayoutCache:
+    """Geometría del divisor por plantilla (tamaño de página + huella del encabezado).
+
+    Los anexos Side-by-Side de un mismo sitio repiten la plantilla: tras la
+    primera página detectada con confianza, las demás solo verifican el
+    divisor guardado. Es compartida por los hilos de ``_iter_split_pages`` y
+    entre documentos del mismo proceso.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, int, str], Tuple[int, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[int, int, str]) -> Optional[Tuple[int, int, float]]:
+        """``(divider_x, header_end, confianza)`` guardados para la plantilla, si existen."""
+        with self._lock:
+            layout = self._entries.get(key)
+            if layout is not None:
+                self._entries.move_to_end(key)
+            return layout
+
+    def set(
+        self, key: Tuple[int, int, str], divider_x: int, header_end: int, confidence: float
+    ) -> None:
+        with self._lock:
+            self._entries[key] = (divider_x, header_end, confidence)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"layouts": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_layout_cache = _DividerLayoutCache()
+
+
 def _split_page_columns(
     img: np.ndarray, header_percent: float = DEFAULT_HEADER_PERCENT, margin: int = DEFAULT_MARGIN_PX
 ) -> Tuple[np.ndarray, np.ndarray, dict]:
     height, width = img.shape[:2]
+    gray = _to_gray(img)
     header_end = int(height * header_percent)
-    divider_x, confidence = _detect_vertical_divider(img, header_end)
+    layout_key = (height, width, _header_fingerprint(gray, header_end))
+
+    layout_hit = False
+    layout = _layout_cache.get(layout_key)
+    if layout is not None:
+        cached_x, cached_header_end, cached_confidence = layout
+        confidence = _verify_divider(gray[cached_header_end:, :], cached_x)
+        if confidence >= max(DEFAULT_MIN_CONFIDENCE, cached_confidence * LAYOUT_VERIFY_RATIO):
+            divider_x, header_end, layout_hit = cached_x, cached_header_end, True
+    if not layout_hit:
+        # Plantilla nueva o verificación fallida: detección completa
+        divider_x, confidence = _detect_vertical_divider(gray, header_end)
+        if confidence >= DEFAULT_MIN_CONFIDENCE:
+            _layout_cache.set(layout_key, divider_x, header_end, confidence)
+    _layout_cache.record(layout_hit)
+
     left = img[header_end:, : max(divider_x - margin, 0)]
     right = img[header_end:, min(divider_x + margin, width) :]
     metadata = {
         "divider_x": divider_x,
         "confidence": confidence,
         "header_end": header_end,
+        "layout_cache_hit": layout_hit,
         "left_shape": left.shape[:2],
         "right_shape": right.shape[:2],
     }
     return left, right, metadata
 
 
-def _split_all_pages(
-    images: List[np.ndarray],
+def _iter_split_pages(
+    images: Iterable[np.ndarray],
     header_percent: float = DEFAULT_HEADER_PERCENT,
     margin: int = DEFAULT_MARGIN_PX,
-) -> Tuple[List[np.ndarray], List[np.ndarray], List[dict]]:
-    left_columns: List[np.ndarray] = []
-    right_columns: List[np.ndarray] = []
-    metadatas: List[dict] = []
-
-    for img in images:
-        left, right, meta = _split_page_columns(img, header_percent=header_percent, margin=margin)
-        left_columns.append(left)
-        right_columns.append(right)
-        metadatas.append(meta)
-    return left_columns, right_columns, metadatas
-
+) -> Iterator[Tuple[np.ndarray, np.ndarray, dict]]:
+    """Separa las columnas de cada página y las entrega en orden.
 
-def _columns_to_pdf(images: List[np.ndarray], jpeg_quality: int = 85) -> Optional[str]:
-    """Save a list of images as a temporary PDF and return its path.
-    
-    Uses JPEG compression to reduce file size for API limits.
+    ``images`` puede ser un generador (``_iter_page_images``): se mantienen como
+    máximo ``2 * DIVIDER_MAX_WORKERS`` páginas completas en vuelo, de modo que el
+    consumidor puede codificar cada columna y liberar la página antes de que se
+    renderice el resto del documento.
     """
-    if not images:
-        return None
-
-    doc = fitz.open()
-    try:
+    # OpenCV libera el GIL, así que las páginas se procesan en paralelo con hilos
+    max_in_flight = DIVIDER_MAX_WORKERS * 2
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=DIVIDER_MAX_WORKERS) as executor:
         for img in images:
-            height, width = img.shape[:2]
-            page = doc.new_page(width=width, height=height)
-            encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
-            success, buffer = cv2.imencode(".jpg", img, encode_params)
-            if not success:
-                continue
-            rect = fitz.Rect(0, 0, width, height)
-            page.insert_image(rect, stream=buffer.tobytes())
-
-        pdf_bytes = doc.tobytes(deflate=True)
-    finally:
-        doc.close()
-
-    fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
-    try:
-        os.write(fd, pdf_bytes)
-    finally:
-        os.close(fd)
-    
-    file_size_mb = os.path.getsize(tmp_path) / (1024 * 1024)
-    logger.info("PDF temporal creado: %.2f MB (%d páginas)", file_size_mb, len(images))
-    
-    return tmp_path
-
-
-def _encode_pdf(pdf_path: str) -> Optional[str]:
-    try:
-        with open(pdf_path, "rb") as pdf_file:
-            return base64.b64encode(pdf_file.read()).decode("utf-8")
-    except Exception as exc:
-        logger.error("Error encoding PDF %s: %s", pdf_path, exc)
+            pending.append(
+                executor.submit(_split_page_columns, img, header_percent, margin)
+            )
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _encode_column_jpeg(img: np.ndarray, jpeg_quality: int = 85) -> Optional[bytes]:
+    encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+    # cv2.imencode espera BGR; las columnas vienen en RGB desde PyMuPDF
+    bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR) if img.ndim == 3 else img
+    success, buffer = cv2.imencode(".jpg", bgr, encode_params)
+    if not success:
         return None
+    return buffer.tobytes()
 
 
-def _collect_markdown_from_pages(ocr_response: Any) -> str:
-    pages = None
-    if hasattr(ocr_response, "pages"):
-        pages = getattr(ocr_response, "pages", None)
-    if pages is None and isinstance(ocr_response, dict):
-        pages = ocr_response.get("pages")
-
-    if not pages:
-        return ""
-
-    parts: List[str] = []
-    for page in pages:
-        markdown = None
-        if hasattr(page, "markdown"):
-            markdown = getattr(page, "markdown", None)
-        elif isinstance(page, dict):
-            markdown = page.get("markdown")
-
-        if markdown:
-            text = markdown.strip()
-            if text:
-                parts.append(text)
-
-    return "\n\n".join(parts).strip()
-
+def _get_ocr_part_max_bytes() -> int:
+    """Tamaño máximo de cada PDF parcial enviado a OCR (``AURA_SBS_OCR_PART_MAX_MB``)."""
+    try:
+        max_mb = float(os.getenv("AURA_SBS_OCR_PART_MAX_MB", DEFAULT_OCR_PART_MAX_MB))
+    except ValueError:
+        max_mb = DEFAULT_OCR_PART_MAX_MB
+    return int(max(max_mb, 1.0) * 1024 * 1024)
 
-def _extract_markdown_with_ocr(pdf_path: str, max_retries: int = 3) -> str:
-    base64_pdf = _encode_pdf(pdf_path)
-    if not base64_pdf:
-        return ""
 
-    pdf_size_mb = len(base64_pdf) * 3 / 4 / (1024 * 1024)
-    logger.info("PDF temporal para OCR: %.2f MB (base64: %.2f MB)", pdf_size_mb, len(base64_pdf) / (1024 * 1024))
+class _ColumnPdfBuilder:
+    """Construye los PDF de columnas página a página, en partes de tamaño acotado.
 
-    api_key = os.getenv("MISTRAL_API_KEY")
-    if not api_key:
-        raise EnvironmentError("Defina MISTRAL_API_KEY en el entorno o en el archivo .env")
+    Cada columna se codifica a JPEG y se anexa al PDF en curso en cuanto llega;
+    cuando la siguiente imagen haría superar ``max_part_bytes`` se cierra la
+    parte actual y se empieza otra. Ninguna parte pasa por disco.
+    """
 
-    client = Mistral(api_key=api_key, timeout_ms=900000)
-    
-    last_error = None
-    for attempt in range(max_retries):
+    def __init__(self, max_part_bytes: int, jpeg_quality: int = 85):
+        self.max_part_bytes = max_part_bytes
+        self.jpeg_quality = jpeg_quality
+        self._parts: List[bytes] = []
+        self._doc: Optional["fitz.Document"] = None
+        self._doc_bytes = 0
+        self._doc_pages = 0
+
+    def add(self, img: np.ndarray) -> None:
+        jpeg = _encode_column_jpeg(img, self.jpeg_quality)
+        if jpeg is None:
+            return
+        if self._doc is not None and self._doc_bytes + len(jpeg) > self.max_part_bytes:
+            self._close_part()
+        if self._doc is None:
+            self._doc = fitz.open()
+        height, width = img.shape[:2]
+        page = self._doc.new_page(width=width, height=height)
+        page.insert_image(fitz.Rect(0, 0, width, height), stream=jpeg)
+        self._doc_bytes += len(jpeg)
+        self._doc_pages += 1
+
+    def _close_part(self) -> None:
+        if self._doc is None:
+            return
         try:
-            logger.info("Intento OCR %d/%d...", attempt + 1, max_retries)
-            response = client.ocr.process(
-                model="mistral-ocr-latest",
-                document={
-                    "type": "document_url",
-                    "document_url": f"data:application/pdf;base64,{base64_pdf}",
-                },
-                include_image_base64=False,
-            )
-            return _collect_markdown_from_pages(response)
-        except Exception as e:
-            last_error = e
-            error_msg = str(e).lower()
-            if "disconnect" in error_msg or "timeout" in error_msg or "connection" in error_msg or "response" in error_msg:
-                wait_time = (2 ** attempt) * 10
-                logger.warning(
-                    "Intento %d/%d fallido (OCR): %s. Reintentando en %ds...",
-                    attempt + 1, max_retries, e, wait_time
-                )
-                time.sleep(wait_time)
-            else:
-                raise
-    
-    raise last_error or Exception("OCR falló después de todos los reintentos")
+            pdf_bytes = self._doc.tobytes(deflate=True)
+        finally:
+            self._doc.close()
+        logger.info(
+            "Parte %d del PDF de columnas: %.2f MB (%d páginas)",
+            len(self._parts) + 1,
+            len(pdf_bytes) / (1024 * 1024),
+            self._doc_pages,
+        )
+        self._parts.append(pdf_bytes)
+        self._doc = None
+        self._doc_bytes = 0
+        self._doc_pages = 0
+
+    def finish(self) -> List[bytes]:
+        """Cierra la parte en curso y devuelve los PDF en orden de página."""
+        self._close_part()
+        return self._parts
+
+
+class _PageMarkdownSink:
+    """Sink de ``process_documents_streaming`` que guarda el markdown por página."""
+
+    def __init__(self):
+        self.total_pages = 0
+        self.pages: Dict[int, str] = {}
+
+    def start(self, total_chunks: int, total_pages: int) -> None:
+        self.total_pages = total_pages
+
+    def add(self, index: int, responses: List[Dict[str, Any]]) -> None:
+        for response in responses:
+            for page in response.get("pages") or []:
+                self.pages[page["index"]] = (page.get("markdown") or "").strip()
+
+
+def _extract_markdown_from_parts(parts: List[bytes]) -> Tuple[str, List[int]]:
+    """Ejecuta OCR por rangos de páginas sobre todas las partes y une el markdown en orden.
+
+    Todas las partes comparten el pool y el scheduler de ``mistral_ocr``; un
+    rango que falla se reintenta (y bisecta) sin repetir el resto del documento,
+    y las páginas ya vistas se sirven desde el cache de páginas. Devuelve el
+    markdown y las páginas (1-based) que quedaron sin OCR.
+    """
+    sinks = [_PageMarkdownSink() for _ in parts]
+    process_documents_streaming(
+        list(zip(parts, sinks)), None, max_pages_per_chunk=OCR_PAGES_PER_CHUNK
+    )
 
+    texts: List[str] = []
+    missing_pages: List[int] = []
+    offset = 0
+    for sink in sinks:
+        for idx in range(sink.total_pages):
+            if idx not in sink.pages:
+                missing_pages.append(offset + idx + 1)
+            elif sink.pages[idx]:
+                texts.append(sink.pages[idx])
+        offset += sink.total_pages
 
-def _safe_json_dumps(payload: dict) -> str:
-    try:
-        return json.dumps(payload, indent=2, ensure_ascii=False)
-    except Exception:
-        logger.exception("No se pudo serializar el payload a JSON.")
-        return "{}"
+    if missing_pages and not texts:
+        raise RuntimeError(f"OCR falló en todas las páginas ({len(missing_pages)})")
+    if missing_pages:
+        logger.warning("OCR sin resultado en páginas %s de la columna propuesta", missing_pages)
+    return "\n\n".join(texts).strip(), missing_pages
 
 
 @tool(
@@ -281,56 +474,56 @@ def sbs_proposed_column_to_pdf_md(
         message = f"El documento {dir_document} no existe o no es un PDF."
         return Command(update={"messages": [ToolMessage(message, tool_call_id=tool_call_id)]})
 
-    images = _pdf_to_images(str(resolved_path), dpi=DEFAULT_DPI)
-    if not images:
+    # Render -> split -> JPEG -> PDF, página a página y con memoria acotada
+    builder = _ColumnPdfBuilder(_get_ocr_part_max_bytes())
+    split_meta: List[dict] = []
+    for _, right, meta in _iter_split_pages(
+        _iter_page_images(str(resolved_path), dpi=DEFAULT_DPI),
+        header_percent=DEFAULT_HEADER_PERCENT,
+        margin=DEFAULT_MARGIN_PX,
+    ):
+        builder.add(right)
+        split_meta.append(meta)
+    if not split_meta:
         message = "No se pudieron generar imagenes a partir del PDF proporcionado."
         return Command(update={"messages": [ToolMessage(message, tool_call_id=tool_call_id)]})
+    logger.info("Cache de layout SBS: %s", _layout_cache.stats())
 
-    _, right_columns, split_meta = _split_all_pages(
-        images, header_percent=DEFAULT_HEADER_PERCENT, margin=DEFAULT_MARGIN_PX
-    )
     low_confidence = [
         idx + 1
         for idx, meta in enumerate(split_meta)
         if meta.get("confidence", 1.0) < DEFAULT_MIN_CONFIDENCE
     ]
 
-    temp_pdf_path = _columns_to_pdf(right_columns)
-    if not temp_pdf_path:
+    pdf_parts = builder.finish()
+    if not pdf_parts:
         message = "No se pudo construir el PDF temporal de la columna propuesta."
         return Command(update={"messages": [ToolMessage(message, tool_call_id=tool_call_id)]})
 
     try:
-        markdown = _extract_markdown_with_ocr(temp_pdf_path)
+        markdown, missing_pages = _extract_markdown_from_parts(pdf_parts)
     except Exception as exc:
         logger.error("Error ejecutando OCR para %s: %s", dir_document, exc)
         message = f"No se pudo extraer markdown con OCR: {exc}"
         return Command(update={"messages": [ToolMessage(message, tool_call_id=tool_call_id)]})
-    finally:
-        try:
-            os.unlink(temp_pdf_path)
-        except OSError:
-            pass
 
     # Extraer source_file_name del nombre del PDF
     source_file_name = _extract_source_file_name(str(resolved_path))
     document_name = f"{DEFAULT_BASE_PATH}/method_metadata_TOC_{source_file_name}.json"
     
     stored_data = {
-        "markdown_completo": markdown,
+        "markdown_completo": offload_text(markdown),
         "source_file_name": source_file_name,
     } if markdown else {"source_file_name": source_file_name}
     
-    files = dict(state.get("files", {}))
-    files[document_name] = {
-        "content": _safe_json_dumps(stored_data),
-        "data": stored_data,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    files_update = {}
+    files_update[document_name] = make_file_entry(stored_data)
 
     warning_note = ""
     if low_confidence:
         warning_note = f" Separacion con baja confianza en paginas: {low_confidence}."
+    if missing_pages:
+        warning_note += f" OCR sin resultado en paginas: {missing_pages}."
 
     final_message = (
         f"Markdown del metodo propuesto guardado en {document_name}.{warning_note}\n"
@@ -343,7 +536,7 @@ def sbs_proposed_column_to_pdf_md(
 
     return Command(
         update={
-            "files": files,
+            "files": files_update,
             "messages": [ToolMessage(final_message, tool_call_id=tool_call_id)],
         }
     )
@@ -9,30 +9,33 @@ warnings.filterwarnings(
 )
 
 import asyncio
-import json
 import logging
 import re
-from datetime import datetime, timezone
-from typing import Annotated, Dict, List, Optional
+from typing import Annotated, Dict, List, Optional, Tuple
 
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
-from langchain_core.tools import InjectedToolCallId, tool
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.tools import InjectedToolCallId, StructuredTool
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
 from langsmith import traceable
 from pydantic import BaseModel, Field
 
 from src.graph.state import DeepAgentState
+from src.utils.async_runner import run_sync
+from src.utils.header_index import HeaderIndex
+from src.utils.llm_cache import build_llm_cache_key, get_llm_cache
+from src.utils.llm_dispatcher import get_llm_dispatcher
+from src.utils.markdown_splitter import TokenMarkdownSplitter, get_markdown_splitter
 from src.prompts.tool_description_prompts import TEST_SOLUTION_CLEAN_MARKDOWN_SBS_TOOL_DESC
+from src.utils.blob_store import missing_blob_message, offload_text, resolve_text
+from src.utils.vfs import make_file_entry, read_file_data
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_BASE_PATH = "/proposed_method"
 
 CHUNK_SIZE_TOKENS = 3000
-CHUNK_OVERLAP_TOKENS = 0
 CHUNK_SEPARATORS = [
     "\n\n",
     "\n",
@@ -222,7 +225,8 @@ CHUNK_HUMAN_PROMPT_TEMPLATE = """
     </DOCUMENT_CHUNK>
 """
 
-llm_model = init_chat_model(model="openai:gpt-5-mini", temperature=0)
+LLM_MODEL_NAME = "openai:gpt-5-mini"
+llm_model = init_chat_model(model=LLM_MODEL_NAME, temperature=0)
 
 
 class TestMethodFromChunk(BaseModel):
@@ -251,14 +255,9 @@ class TestMethodsFromChunk(BaseModel):
     )
 
 
-def _create_text_splitter() -> RecursiveCharacterTextSplitter:
-    """Crea el splitter con configuración de tokens para chunking semántico."""
-    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        model_name="gpt-5-mini",
-        chunk_size=CHUNK_SIZE_TOKENS,
-        chunk_overlap=CHUNK_OVERLAP_TOKENS,
-        separators=CHUNK_SEPARATORS,
-    )
+def _create_text_splitter() -> TokenMarkdownSplitter:
+    """Splitter por tokens para chunking semántico (compartido; se construye en el primer uso)."""
+    return get_markdown_splitter("gpt-5-mini", CHUNK_SIZE_TOKENS, tuple(CHUNK_SEPARATORS))
 
 
 def _split_markdown_into_chunks(full_markdown: str) -> List[str]:
@@ -273,8 +272,14 @@ async def _extract_headers_from_chunk(
     chunk_text: str,
     chunk_index: int,
     total_chunks: int,
-) -> TestMethodsFromChunk:
-    """Extrae encabezados de un chunk individual usando el LLM."""
+) -> Optional[TestMethodsFromChunk]:
+    """Extrae encabezados de un chunk individual usando el LLM.
+
+    Los resultados se guardan en el cache de LLM (modelo + prompts + schema), de
+    modo que una re-ejecución sobre el mismo markdown no vuelve a llamar al
+    modelo. Devuelve ``None`` si el chunk falla después de los reintentos del
+    despachador.
+    """
     structured_llm = llm_model.with_structured_output(TestMethodsFromChunk)
 
     system_message = SystemMessage(content=CHUNK_SYSTEM_PROMPT)
@@ -284,8 +289,26 @@ async def _extract_headers_from_chunk(
         )
     )
 
+    llm_cache = get_llm_cache()
+    cache_key = build_llm_cache_key(
+        LLM_MODEL_NAME,
+        [system_message, human_message],
+        TestMethodsFromChunk.model_json_schema(),
+    )
+    cached_result = await asyncio.to_thread(llm_cache.get, cache_key)
+    if cached_result is not None:
+        logger.debug("Chunk %d/%d servido desde cache", chunk_index, total_chunks)
+        return TestMethodsFromChunk.model_validate(cached_result)
+
     try:
-        result = await structured_llm.ainvoke([system_message, human_message])
+        result = await get_llm_dispatcher().ainvoke(
+            structured_llm,
+            [system_message, human_message],
+            model=LLM_MODEL_NAME,
+            label=f"chunk {chunk_index}/{total_chunks}",
+        )
+        result = TestMethodsFromChunk.model_validate(result)
+        await asyncio.to_thread(llm_cache.set, cache_key, result.model_dump(mode="json"))
         return result
     except Exception as e:
         logger.warning(
@@ -294,16 +317,20 @@ async def _extract_headers_from_chunk(
             total_chunks,
             str(e),
         )
-        return TestMethodsFromChunk(test_methods=[])
+        return None
 
 
 @traceable(name="extract_headers_parallel")
 async def _extract_headers_from_all_chunks(
     chunks: List[str],
-) -> List[TestMethodsFromChunk]:
-    """Extrae encabezados de todos los chunks en paralelo."""
+) -> Tuple[List[TestMethodsFromChunk], List[int]]:
+    """Extrae encabezados de todos los chunks en paralelo (acotado por el despachador de LLM).
+
+    Devuelve los resultados en orden y los números (1-based) de los chunks que
+    quedaron vacíos por error.
+    """
     if not chunks:
-        return []
+        return [], []
 
     total_chunks = len(chunks)
     logger.info("Procesando %d chunks en paralelo para extracción de encabezados...", total_chunks)
@@ -313,17 +340,27 @@ async def _extract_headers_from_all_chunks(
         for idx, chunk in enumerate(chunks)
     ]
 
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    results = await asyncio.gather(*tasks)
 
     valid_results: List[TestMethodsFromChunk] = []
+    degraded_chunks: List[int] = []
     for idx, result in enumerate(results):
-        if isinstance(result, Exception):
-            logger.warning("Chunk %d falló con excepción: %s", idx + 1, str(result))
+        if result is None:
+            degraded_chunks.append(idx + 1)
             valid_results.append(TestMethodsFromChunk(test_methods=[]))
         else:
             valid_results.append(result)
 
-    return valid_results
+    if degraded_chunks:
+        logger.warning(
+            "%d/%d chunks sin encabezados por error del LLM: %s",
+            len(degraded_chunks),
+            total_chunks,
+            degraded_chunks,
+        )
+    logger.info("Despachador LLM: %s", get_llm_dispatcher().stats())
+    logger.info("Cache LLM: %s", get_llm_cache().stats())
+    return valid_results, degraded_chunks
 
 
 def _clean_header_text(value: Optional[str]) -> str:
@@ -389,40 +426,6 @@ def _filter_primary_test_methods(
     return filtered
 
 
-def _find_header_positions(full_markdown: str, raw_header: str) -> List[int]:
-    """Encuentra las posiciones de un encabezado en el markdown."""
-    if not raw_header or not full_markdown:
-        return []
-
-    header = raw_header.strip()
-    if not header:
-        return []
-
-    patterns: List[str] = [header]
-    header_wo_number = re.sub(r"^\s*\d+(\.\d+)*\s+", "", header)
-    if header_wo_number and header_wo_number != header:
-        patterns.append(header_wo_number)
-
-    header_wo_digits = re.sub(r"\d+", "", header).strip()
-    if header_wo_digits and header_wo_digits not in patterns:
-        patterns.append(header_wo_digits)
-
-    for pattern in patterns:
-        if not pattern:
-            continue
-        try:
-            regex = re.compile(re.escape(pattern), flags=re.IGNORECASE)
-        except re.error:
-            logger.warning("Regex inválido para encabezado '%s'", raw_header)
-            continue
-
-        matches = list(regex.finditer(full_markdown))
-        if matches:
-            return [match.start() for match in matches]
-
-    return []
-
-
 def _find_historico_marker(full_markdown: str) -> Optional[int]:
     """Encuentra la posición del marcador 'Histórico de cambios'."""
     if not full_markdown:
@@ -441,6 +444,8 @@ def _build_markdown_segments(
     if not test_methods:
         return []
 
+    # El markdown se normaliza una sola vez para todos los encabezados
+    header_index = HeaderIndex(full_markdown)
     markers: List[Dict[str, int]] = []
     for idx, test in enumerate(test_methods):
         raw_header = (test.get("raw") or test.get("title") or "").strip()
@@ -448,7 +453,7 @@ def _build_markdown_segments(
             logger.warning("No se encontró encabezado legible para la prueba %s", test)
             continue
 
-        positions = _find_header_positions(full_markdown, raw_header)
+        positions = header_index.find(raw_header)
         if not positions:
             logger.warning(
                 "No se encontró el encabezado '%s' en el markdown consolidado",
@@ -519,7 +524,7 @@ def _markdown_doc_path(base_path: str, source_file_name: str) -> str:
 
 
 @traceable(name="test_solution_clean_markdown_sbs")
-def _run_extraction_pipeline(full_markdown: str) -> List[Dict[str, Optional[str]]]:
+async def _arun_extraction_pipeline(full_markdown: str) -> Tuple[List[Dict[str, Optional[str]]], List[int]]:
     """
     Pipeline principal de extracción:
     1. Divide el markdown en chunks
@@ -527,14 +532,16 @@ def _run_extraction_pipeline(full_markdown: str) -> List[Dict[str, Optional[str]
     3. Deduplica y fusiona resultados
     4. Filtra solo pruebas principales
     5. Construye segmentos de markdown (sin pre-procesamiento adicional; la columna ya viene filtrada)
+
+    Devuelve también los chunks (1-based) que quedaron sin encabezados por error del LLM.
     """
-    chunks = _split_markdown_into_chunks(full_markdown)
+    chunks = await asyncio.to_thread(_split_markdown_into_chunks, full_markdown)
     logger.info("Markdown dividido en %d chunks", len(chunks))
 
     if not chunks:
-        return []
+        return [], []
 
-    chunk_results = asyncio.run(_extract_headers_from_all_chunks(chunks))
+    chunk_results, degraded_chunks = await _extract_headers_from_all_chunks(chunks)
 
     merged_headers = _merge_headers_from_chunks(chunk_results)
     logger.info("Se identificaron %d encabezados de pruebas/soluciones", len(merged_headers))
@@ -544,11 +551,10 @@ def _run_extraction_pipeline(full_markdown: str) -> List[Dict[str, Optional[str]
 
     tests_with_markdown = _build_markdown_segments(filtered_headers, full_markdown)
 
-    return tests_with_markdown
+    return tests_with_markdown, degraded_chunks
 
 
-@tool(description=TEST_SOLUTION_CLEAN_MARKDOWN_SBS_TOOL_DESC)
-def test_solution_clean_markdown_sbs(
+async def _atest_solution_clean_markdown_sbs(
     source_file_name: str,
     state: Annotated[DeepAgentState, InjectedState],
     tool_call_id: Annotated[str, InjectedToolCallId],
@@ -562,12 +568,12 @@ def test_solution_clean_markdown_sbs(
         base_path: Ruta base (/proposed_method por defecto)
     
     Nuevo enfoque:
-    1. Divide el markdown en chunks usando RecursiveCharacterTextSplitter
+    1. Divide el markdown en chunks por tokens (TokenMarkdownSplitter)
     2. Extrae encabezados de cada chunk en paralelo con GPT-4.1-mini
     3. Deduplica y fusiona los resultados
     4. Construye los segmentos de markdown para cada prueba
     """
-    files = dict(state.get("files", {}))
+    files = state.get("files", {})
     metadata_doc_name = _metadata_toc_path(base_path, source_file_name)
     markdown_doc_name = _markdown_doc_path(base_path, source_file_name)
 
@@ -585,8 +591,19 @@ def test_solution_clean_markdown_sbs(
             }
         )
 
-    metadata_toc_data = method_metadata_TOC.get("data", {})
-    full_markdown = metadata_toc_data.get("markdown_completo")
+    metadata_toc_data = read_file_data(method_metadata_TOC, metadata_doc_name) or {}
+    try:
+        full_markdown = await asyncio.to_thread(
+            resolve_text, metadata_toc_data.get("markdown_completo")
+        )
+    except FileNotFoundError as exc:
+        message = missing_blob_message(metadata_doc_name, exc, "sbs_proposed_column_to_pdf_md")
+        logger.error(message)
+        return Command(
+            update={
+                "messages": [ToolMessage(message, tool_call_id=tool_call_id)],
+            }
+        )
 
     if not full_markdown:
         return Command(
@@ -600,7 +617,7 @@ def test_solution_clean_markdown_sbs(
             }
         )
 
-    tests_with_markdown = _run_extraction_pipeline(full_markdown)
+    tests_with_markdown, degraded_chunks = await _arun_extraction_pipeline(full_markdown)
 
     toc_entries = [
         test.get("raw") or test.get("title")
@@ -608,17 +625,18 @@ def test_solution_clean_markdown_sbs(
         if test.get("raw") or test.get("title")
     ]
 
+    # Los textos grandes van al blob store; el estado solo guarda la referencia
     payload = {
-        "full_markdown": full_markdown,
+        "full_markdown": offload_text(full_markdown),
         "toc_entries": toc_entries,
-        "items": tests_with_markdown,
+        "items": [
+            {**item, "markdown": offload_text(item.get("markdown"))}
+            for item in tests_with_markdown
+        ],
     }
 
-    files[markdown_doc_name] = {
-        "content": json.dumps(payload, indent=2, ensure_ascii=False),
-        "data": payload,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    files_update = {}
+    files_update[markdown_doc_name] = make_file_entry(payload)
 
     total_items = len(tests_with_markdown)
     populated_items = sum(1 for item in tests_with_markdown if item.get("markdown"))
@@ -626,10 +644,42 @@ def test_solution_clean_markdown_sbs(
         f"Extracción completada para '{source_file_name}': {total_items} pruebas/soluciones identificadas; "
         f"{populated_items} incluyen markdown extraído. Archivo: {markdown_doc_name}"
     )
+    if degraded_chunks:
+        summary_message += (
+            f"\nAdvertencia: {len(degraded_chunks)} chunk(s) sin respuesta del LLM tras reintentos "
+            f"(chunks {degraded_chunks}); pueden faltar encabezados."
+        )
 
     return Command(
         update={
-            "files": files,
+            "files": files_update,
             "messages": [ToolMessage(summary_message, tool_call_id=tool_call_id)],
         }
     )
+
+
+def _test_solution_clean_markdown_sbs(
+    source_file_name: str,
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId],
+    base_path: str = DEFAULT_BASE_PATH,
+) -> Command:
+    """Versión sync (Streamlit/CLI): ejecuta la implementación async en el loop de fondo."""
+    return run_sync(
+        _atest_solution_clean_markdown_sbs(
+            source_file_name,
+            state,
+            tool_call_id,
+            base_path,
+        )
+    )
+
+
+# Implementación async-native: ``ainvoke`` (servidor LangGraph) reutiliza el loop
+# en curso y el cliente HTTP async del modelo; ``invoke`` usa el wrapper sync.
+test_solution_clean_markdown_sbs = StructuredTool.from_function(
+    func=_test_solution_clean_markdown_sbs,
+    coroutine=_atest_solution_clean_markdown_sbs,
+    name="test_solution_clean_markdown_sbs",
+    description=TEST_SOLUTION_CLEAN_MARKDOWN_SBS_TOOL_DESC,
+)
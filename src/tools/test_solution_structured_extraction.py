@@ -8,23 +8,29 @@ warnings.filterwarnings(
     module="pydantic.*"
 )
 
+import asyncio
 import json
 import logging
-from datetime import datetime, timezone
-from typing import Annotated, Dict, Optional, Any
+from typing import Annotated, Any, Dict, List, Optional, Tuple, Union
 
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, ToolMessage, SystemMessage
-from langchain_core.tools import InjectedToolCallId, tool
+from langchain_core.tools import InjectedToolCallId, StructuredTool
 from langgraph.prebuilt import InjectedState
 from langgraph.types import Command
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-import httpx
 
 from src.graph.state import DeepAgentState
-from src.prompts.tool_description_prompts import TEST_SOLUTION_STRUCTURED_EXTRACTION_TOOL_DESC
+from src.prompts.tool_description_prompts import (
+    TEST_SOLUTION_STRUCTURED_EXTRACTION_BATCH_TOOL_DESC,
+    TEST_SOLUTION_STRUCTURED_EXTRACTION_TOOL_DESC,
+)
 from src.prompts.tool_llm_calls_prompts import TEST_SOLUTION_STRUCTURED_EXTRACTION_PROMPT, TEST_SOLUTION_STRUCTURED_EXTRACTION_HUMAN_PROMPT
 from src.models.structured_test_model import TestSolutions
+from src.utils.async_runner import run_sync
+from src.utils.llm_cache import build_llm_cache_key, get_llm_cache
+from src.utils.llm_dispatcher import get_llm_dispatcher
+from src.utils.blob_store import is_blob_ref, missing_blob_message, resolve_text
+from src.utils.vfs import make_file_entry, read_file_data
 
 logger = logging.getLogger(__name__)
 
@@ -40,19 +46,9 @@ TEMP_DIR_MAPPING = {
 
 
 # LLM para Herramientas
-llm_model = init_chat_model(model="openai:gpt-5-mini")
-
+LLM_MODEL_NAME = "openai:gpt-5-mini"
+llm_model = init_chat_model(model=LLM_MODEL_NAME)
 
-@retry(
-    stop=stop_after_attempt(MAX_LLM_RETRIES),
-    wait=wait_exponential(multiplier=1, min=2, max=30),
-    retry=retry_if_exception_type((httpx.RemoteProtocolError, httpx.ReadTimeout, ConnectionError)),
-    reraise=True,
-)
-def _invoke_structured_llm(structured_model, messages):
-    """Invoca el LLM con retry automático para errores de conexión."""
-    logger.debug("Invocando LLM para extracción estructurada...")
-    return structured_model.invoke(messages)
 
 def _get_temp_dir(base_path: str) -> str:
     """Obtiene la carpeta temporal correspondiente al base_path."""
@@ -75,48 +71,25 @@ def _extract_source_file_name(path: str) -> str:
     return filename.rsplit('.', 1)[0]
 
 
-@tool(description=TEST_SOLUTION_STRUCTURED_EXTRACTION_TOOL_DESC)
-def test_solution_structured_extraction(
-    id: int,
-    source_file_name: str,
-    state: Annotated[DeepAgentState, InjectedState],
-    tool_call_id: Annotated[str, InjectedToolCallId] = "",
-    base_path: str = DEFAULT_BASE_PATH,
-) -> Command:
-    """
-    Extrae y estructura una prueba/solución individual del markdown.
-    
-    Args:
-        id: Índice de la prueba en el archivo markdown
-        source_file_name: Nombre del archivo de origen (sin extensión)
-        base_path: Ruta base (/actual_method o /proposed_method)
-    """
+def _markdown_doc_path(base_path: str, source_file_name: str) -> str:
     base = (base_path or DEFAULT_BASE_PATH).rstrip("/")
-    temp_dir = _get_temp_dir(base_path)
-    markdown_doc = f"{base}/test_solution_markdown_{source_file_name}.json"
+    return f"{base}/test_solution_markdown_{source_file_name}.json"
+
 
-    files = dict(state.get("files", {}))
+def _load_markdown_items(files: Dict[str, Any], markdown_doc: str) -> Tuple[Any, Optional[str]]:
+    """Devuelve los ``items`` del archivo de markdown o un mensaje de error."""
     test_solution_markdown = files.get(markdown_doc)
     if not test_solution_markdown:
-        message = f"No se encontró el archivo de markdown: {markdown_doc}"
-        logger.warning(message)
-        return Command(
-            update={
-                "messages": [ToolMessage(message, tool_call_id=tool_call_id)],
-            }
-        )
-    
-    test_solution_markdown_data = test_solution_markdown.get("data") or {}
+        return None, f"No se encontró el archivo de markdown: {markdown_doc}"
+
+    test_solution_markdown_data = read_file_data(test_solution_markdown, markdown_doc) or {}
     if not test_solution_markdown_data:
-        message = f"El archivo {markdown_doc} no contiene datos válidos."
-        logger.warning(message)
-        return Command(
-            update={
-                "messages": [ToolMessage(message, tool_call_id=tool_call_id)],
-            }
-        )
+        return None, f"El archivo {markdown_doc} no contiene datos válidos."
+    return test_solution_markdown_data.get("items") or [], None
 
-    items = test_solution_markdown_data.get("items") or []
+
+def _find_target_item(items: Any, id: int) -> Optional[Dict[str, Any]]:
+    """Busca el ítem por su campo ``id`` (o, en su defecto, por posición)."""
     target_item: Optional[Dict[str, Any]] = None
 
     if isinstance(items, list):
@@ -135,22 +108,41 @@ def test_solution_structured_extraction(
     elif isinstance(items, dict):
         target_item = items.get(id) or items.get(str(id))
 
-    if not target_item:
-        message = (
-            "No se encontró el markdown asociado a la prueba/solución con id "
-            f"{id}."
-        )
-        logger.warning(message)
-        return Command(
-            update={
-                "messages": [ToolMessage(message, tool_call_id=tool_call_id)],
-            }
-        )
+    return target_item or None
+
+
+def _all_item_ids(items: Any) -> List[int]:
+    """IDs de todos los ítems del archivo de markdown, en orden."""
+    if isinstance(items, list):
+        ids = [
+            item["id"]
+            for item in items
+            if isinstance(item, dict) and isinstance(item.get("id"), int)
+        ]
+        # Sin campo ``id`` se usa la posición, igual que ``_find_target_item``
+        return ids or [index for index, item in enumerate(items) if isinstance(item, dict)]
+    if isinstance(items, dict):
+        ids: List[int] = []
+        for key in items:
+            try:
+                ids.append(int(key))
+            except (TypeError, ValueError):
+                continue
+        return ids
+    return []
+
 
+async def _aresolve_item_markdown(target_item: Dict[str, Any]) -> Dict[str, Any]:
+    """Ítem con su ``markdown`` leído del blob store; ``FileNotFoundError`` si el blob no existe."""
+    if not is_blob_ref(target_item.get("markdown")):
+        return target_item
+    markdown = await asyncio.to_thread(resolve_text, target_item["markdown"])
+    return {**target_item, "markdown": markdown}
+
+
+def _build_extraction_messages(target_item: Dict[str, Any]) -> List[Any]:
     test_solution_string = json.dumps(target_item, indent=2, ensure_ascii=False)
-    
-    structured_model = llm_model.with_structured_output(TestSolutions)
-    messages = [
+    return [
         SystemMessage(
             content=TEST_SOLUTION_STRUCTURED_EXTRACTION_PROMPT
         ),
@@ -160,10 +152,11 @@ def test_solution_structured_extraction(
             )
         )
     ]
-    
-    # Usar función con retry para manejar errores de conexión
-    test_solution_input = _invoke_structured_llm(structured_model, messages)
-    test_solution_input = test_solution_input.model_dump()
+
+
+def _finalize_test_solution(result: Any, id: int, source_file_name: str) -> Dict[str, Any]:
+    """Normaliza la salida del LLM y agrega los campos de trazabilidad."""
+    test_solution_input = result.model_dump()
 
     # Validación: asegurar que solo haya un test (el LLM a veces duplica)
     if "tests" in test_solution_input and isinstance(test_solution_input["tests"], list):
@@ -175,16 +168,103 @@ def test_solution_structured_extraction(
 
     test_solution_input["source_id"] = id
     test_solution_input["source_file_name"] = source_file_name
+    return test_solution_input
+
+
+async def _aextract_test_solution(
+    target_item: Dict[str, Any],
+    id: int,
+    source_file_name: str,
+) -> Dict[str, Any]:
+    """Estructura un ítem con el LLM, reutilizando el resultado cacheado si existe.
+
+    La llave del cache combina el modelo, el contenido de los mensajes (prompt
+    de sistema vigente + JSON del ítem con su markdown) y el schema de
+    ``TestSolutions``: editar el markdown de una prueba, el prompt o el modelo
+    invalida solo las entradas afectadas. Los errores (tras los reintentos del
+    despachador, o ``FileNotFoundError`` si el blob del markdown ya no existe)
+    se propagan al llamador.
+    """
+    messages = _build_extraction_messages(await _aresolve_item_markdown(target_item))
+    llm_cache = get_llm_cache()
+    cache_key = build_llm_cache_key(
+        LLM_MODEL_NAME,
+        messages,
+        TestSolutions.model_json_schema(),
+    )
+    cached_result = await asyncio.to_thread(llm_cache.get, cache_key)
+    if cached_result is not None:
+        logger.debug("'%s' id=%s servido desde cache", source_file_name, id)
+        result = TestSolutions.model_validate(cached_result)
+    else:
+        structured_model = llm_model.with_structured_output(TestSolutions)
+        result = await get_llm_dispatcher().ainvoke(
+            structured_model,
+            messages,
+            model=LLM_MODEL_NAME,
+            label=f"{source_file_name} id={id}",
+            max_attempts=MAX_LLM_RETRIES,
+        )
+        result = TestSolutions.model_validate(result)
+        await asyncio.to_thread(llm_cache.set, cache_key, result.model_dump(mode="json"))
+    return _finalize_test_solution(result, id, source_file_name)
+
+
+async def _atest_solution_structured_extraction(
+    id: int,
+    source_file_name: str,
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId] = "",
+    base_path: str = DEFAULT_BASE_PATH,
+) -> Command:
+    """
+    Extrae y estructura una prueba/solución individual del markdown.
     
+    Args:
+        id: Índice de la prueba en el archivo markdown
+        source_file_name: Nombre del archivo de origen (sin extensión)
+        base_path: Ruta base (/actual_method o /proposed_method)
+    """
+    temp_dir = _get_temp_dir(base_path)
+    markdown_doc = _markdown_doc_path(base_path, source_file_name)
+
+    files = state.get("files", {})
+    items, error_message = _load_markdown_items(files, markdown_doc)
+    if error_message:
+        logger.warning(error_message)
+        return Command(
+            update={
+                "messages": [ToolMessage(error_message, tool_call_id=tool_call_id)],
+            }
+        )
+
+    target_item = _find_target_item(items, id)
+    if not target_item:
+        message = (
+            "No se encontró el markdown asociado a la prueba/solución con id "
+            f"{id}."
+        )
+        logger.warning(message)
+        return Command(
+            update={
+                "messages": [ToolMessage(message, tool_call_id=tool_call_id)],
+            }
+        )
+
+    try:
+        test_solution_input = await _aextract_test_solution(target_item, id, source_file_name)
+    except FileNotFoundError as exc:
+        message = missing_blob_message(markdown_doc, exc, "test_solution_clean_markdown")
+        logger.error(message)
+        return Command(
+            update={
+                "messages": [ToolMessage(message, tool_call_id=tool_call_id)],
+            }
+        )
+
     # Guardar en carpeta temporal: /temp_{base_path}/{source_file_name}/{id}.json
     structured_file_path = f"{temp_dir}/{source_file_name}/{id}.json"
-
-    content_str = json.dumps(test_solution_input, indent=2, ensure_ascii=False)
-    files[structured_file_path] = {
-        "content": content_str.split("\n"),
-        "data": test_solution_input,
-        "modified_at": datetime.now(timezone.utc).isoformat(),
-    }
+    files_update = {structured_file_path: make_file_entry(test_solution_input)}
 
     summary_message = (
         f"Generé la solución de prueba estructurada para '{source_file_name}' id={id}. "
@@ -194,9 +274,175 @@ def test_solution_structured_extraction(
 
     return Command(
         update={
-            "files": files,
+            "files": files_update,
+            "messages": [
+                ToolMessage(summary_message, tool_call_id=tool_call_id)
+            ],
+        }
+    )
+
+
+def _test_solution_structured_extraction(
+    id: int,
+    source_file_name: str,
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId] = "",
+    base_path: str = DEFAULT_BASE_PATH,
+) -> Command:
+    """Versión sync (Streamlit/CLI): ejecuta la implementación async en el loop de fondo."""
+    return run_sync(
+        _atest_solution_structured_extraction(
+            id,
+            source_file_name,
+            state,
+            tool_call_id,
+            base_path,
+        )
+    )
+
+
+test_solution_structured_extraction = StructuredTool.from_function(
+    func=_test_solution_structured_extraction,
+    coroutine=_atest_solution_structured_extraction,
+    name="test_solution_structured_extraction",
+    description=TEST_SOLUTION_STRUCTURED_EXTRACTION_TOOL_DESC,
+)
+
+
+def _resolve_batch_ids(ids: Union[List[int], str, None], items: Any) -> List[int]:
+    """``"all"`` (o vacío) -> todos los ids del markdown; lista -> ids únicos en orden."""
+    if ids is None or (isinstance(ids, str) and ids.strip().lower() in {"", "all", "todos"}):
+        return _all_item_ids(items)
+    if isinstance(ids, str):
+        raise ValueError(f"ids debe ser una lista de enteros o 'all' (recibido: {ids!r})")
+    return list(dict.fromkeys(int(value) for value in ids))
+
+
+async def _atest_solution_structured_extraction_batch(
+    source_file_name: str,
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId] = "",
+    ids: Union[List[int], str] = "all",
+    base_path: str = DEFAULT_BASE_PATH,
+) -> Command:
+    """
+    Estructura varias pruebas/soluciones del markdown en una sola llamada.
+
+    Args:
+        source_file_name: Nombre del archivo de origen (sin extensión)
+        ids: Lista de ids a procesar o "all" para todos los ítems del markdown
+        base_path: Ruta base (/actual_method o /proposed_method)
+
+    Las llamadas al LLM corren en paralelo bajo el despachador compartido
+    (concurrencia y presupuesto RPM/TPM acotados) y todos los archivos
+    temporales se escriben en un solo update de estado.
+    """
+    temp_dir = _get_temp_dir(base_path)
+    markdown_doc = _markdown_doc_path(base_path, source_file_name)
+
+    files = state.get("files", {})
+    items, error_message = _load_markdown_items(files, markdown_doc)
+    if error_message is None:
+        try:
+            requested_ids = _resolve_batch_ids(ids, items)
+        except (TypeError, ValueError) as exc:
+            error_message = f"Parámetro ids inválido: {exc}"
+    if error_message:
+        logger.warning(error_message)
+        return Command(
+            update={
+                "messages": [ToolMessage(error_message, tool_call_id=tool_call_id)],
+            }
+        )
+
+    targets: List[Tuple[int, Dict[str, Any]]] = []
+    missing_ids: List[int] = []
+    for id in requested_ids:
+        target_item = _find_target_item(items, id)
+        if target_item:
+            targets.append((id, target_item))
+        else:
+            missing_ids.append(id)
+
+    results = await asyncio.gather(
+        *(
+            _aextract_test_solution(target_item, id, source_file_name)
+            for id, target_item in targets
+        ),
+        return_exceptions=True,
+    )
+
+    files_update: Dict[str, Any] = {}
+    written_paths: List[str] = []
+    failed: List[str] = []
+    missing_blobs: List[int] = []
+    blob_error: Optional[FileNotFoundError] = None
+    for (id, _), result in zip(targets, results):
+        if isinstance(result, FileNotFoundError):
+            logger.error("Blob del markdown de '%s' id=%s no disponible: %s", source_file_name, id, result)
+            missing_blobs.append(id)
+            blob_error = result
+            continue
+        if isinstance(result, Exception):
+            logger.error("Error estructurando '%s' id=%s: %s", source_file_name, id, result)
+            failed.append(f"id={id}: {result}")
+            continue
+        structured_file_path = f"{temp_dir}/{source_file_name}/{id}.json"
+        files_update[structured_file_path] = make_file_entry(result)
+        written_paths.append(structured_file_path)
+
+    message_parts = [
+        f"Lote estructurado para '{source_file_name}': {len(written_paths)}/{len(requested_ids)} "
+        f"pruebas/soluciones generadas en {temp_dir}/{source_file_name}/."
+    ]
+    if missing_ids:
+        message_parts.append(f"IDs sin markdown asociado: {missing_ids}.")
+    if failed:
+        message_parts.append(
+            "IDs con error (reintentar con test_solution_structured_extraction):\n"
+            + "\n".join(failed)
+        )
+    if blob_error is not None:
+        message_parts.append(
+            f"IDs {missing_blobs}: "
+            + missing_blob_message(markdown_doc, blob_error, "test_solution_clean_markdown")
+        )
+    summary_message = "\n".join(message_parts)
+    logger.info(summary_message)
+    logger.info("Cache LLM: %s", get_llm_cache().stats())
+
+    return Command(
+        update={
+            "files": files_update,
             "messages": [
                 ToolMessage(summary_message, tool_call_id=tool_call_id)
             ],
         }
     )
+
+
+def _test_solution_structured_extraction_batch(
+    source_file_name: str,
+    state: Annotated[DeepAgentState, InjectedState],
+    tool_call_id: Annotated[str, InjectedToolCallId] = "",
+    ids: Union[List[int], str] = "all",
+    base_path: str = DEFAULT_BASE_PATH,
+) -> Command:
+    """Versión sync (Streamlit/CLI): ejecuta la implementación async en el loop de fondo."""
+    return run_sync(
+        _atest_solution_structured_extraction_batch(
+            source_file_name,
+            state,
+            tool_call_id,
+            ids,
+            base_path,
+        )
+    )
+
+
+test_solution_structured_extraction_batch = StructuredTool.from_function(
+    func=_test_solution_structured_extraction_batch,
+    coroutine=_atest_solution_structured_extraction_batch,
+    name="test_solution_structured_extraction_batch",
+    description=TEST_SOLUTION_STRUCTURED_EXTRACTION_BATCH_TOOL_DESC,
+)
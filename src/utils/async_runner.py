@@ -0,0 +1,85 @@
+"""Ejecución de corrutinas desde código sync sobre un event loop de fondo compartido.
+
+Las herramientas que llaman al LLM en abanico son async-native (``ainvoke``
+en el servidor LangGraph reutiliza el loop en curso). Para ``invoke``
+(Streamlit, CLI) no se crea un loop nuevo por llamada con ``asyncio.run``:
+todas las corrutinas se envían a un único loop que vive en un hilo daemon.
+Así los clientes HTTP async que cachean los SDKs (ligados al loop donde se
+crearon) se reutilizan entre llamadas en lugar de reconstruirse o quedar
+atados a un loop ya cerrado.
+
+La corrutina corre dentro de una copia del contexto del hilo que llama
+(``contextvars``): los callbacks de LangChain/LangSmith, el run tree y el
+stream writer de LangGraph (``get_stream_writer``) siguen disponibles.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop) -> None:
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Loop de fondo del proceso, creado (y arrancado) en el primer uso."""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_run_loop, args=(_loop,), name="aura-async-runner", daemon=True
+            )
+            thread.start()
+            logger.debug("Loop async de fondo iniciado")
+        return _loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """Ejecuta ``coro`` en el loop de fondo y bloquea el hilo actual hasta su resultado.
+
+    Solo para puntos de entrada sync; el código async debe hacer ``await``
+    directamente. Llamarla desde el propio loop de fondo sería un deadlock.
+    """
+    loop = get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_sync no puede llamarse desde el loop de fondo; use await")
+    context = contextvars.copy_context()
+    future: "concurrent.futures.Future[T]" = concurrent.futures.Future()
+
+    def _copy_result(task: "asyncio.Task[T]") -> None:
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def _start() -> None:
+        if not future.set_running_or_notify_cancel():
+            coro.close()
+            return
+        task = loop.create_task(coro, context=context)
+        task.add_done_callback(_copy_result)
+
+    loop.call_soon_threadsafe(_start)
+    return future.result(timeout)
@@ -0,0 +1,186 @@
+"""Blob store en disco, direccionado por contenido, para textos grandes del VFS.
+
+El markdown OCR completo (``markdown_completo``) viajaba dentro del estado de
+LangGraph y se volvía a copiar como ``full_markdown`` en
+``test_solution_markdown_*.json``: cada checkpoint serializaba varios MB.
+Ahora los strings grandes se guardan una sola vez en disco, con el SHA-256 del
+texto como nombre, y el estado solo conserva una referencia pequeña::
+
+    {"$blob": "sha256:<hex>", "bytes": 183421}
+
+El mismo texto produce la misma referencia, así que ``markdown_completo`` y
+``full_markdown`` comparten el blob. Las herramientas resuelven las
+referencias con ``resolve_text`` solo cuando necesitan el contenido.
+
+A diferencia del cache de ``disk_cache`` no hay expulsión ni interruptor de
+desactivación: un blob referenciado desde un checkpoint debe seguir
+existiendo. En despliegues con varios hosts el directorio debe ser
+compartido.
+
+Variables de entorno:
+    AURA_BLOB_DIR: directorio del blob store (default ``~/.local/share/aura/blobs``).
+    AURA_BLOB_MIN_BYTES: tamaño mínimo (UTF-8) para sacar un texto del estado
+        (default 16384; ``0`` guarda siempre en el estado).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOB_ROOT = Path.home() / ".local" / "share" / "aura" / "blobs"
+DEFAULT_BLOB_MIN_BYTES = 16384
+BLOB_REF_KEY = "$blob"
+BLOB_HASH_PREFIX = "sha256:"
+# Blobs resueltos que se mantienen en memoria (un documento se lee varias veces por corrida)
+MEMORY_CACHE_ENTRIES = 32
+
+
+def _resolve_blob_root() -> Path:
+    configured = os.getenv("AURA_BLOB_DIR")
+    return Path(configured) if configured else DEFAULT_BLOB_ROOT
+
+
+def _blob_min_bytes() -> int:
+    try:
+        return max(int(os.getenv("AURA_BLOB_MIN_BYTES", DEFAULT_BLOB_MIN_BYTES)), 0)
+    except ValueError:
+        return DEFAULT_BLOB_MIN_BYTES
+
+
+def is_blob_ref(value: Any) -> bool:
+    """``True`` si ``value`` es una referencia a un blob."""
+    return (
+        isinstance(value, dict)
+        and isinstance(value.get(BLOB_REF_KEY), str)
+        and value[BLOB_REF_KEY].startswith(BLOB_HASH_PREFIX)
+    )
+
+
+class BlobStore:
+    """Textos UTF-8 guardados una vez por SHA-256, con memo LRU en memoria."""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.directory = Path(root or _resolve_blob_root())
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self.writes = 0
+        self.reads = 0
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.txt"
+
+    def _remember(self, digest: str, text: str) -> None:
+        with self._lock:
+            self._memory[digest] = text
+            self._memory.move_to_end(digest)
+            while len(self._memory) > MEMORY_CACHE_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def put(self, text: str) -> Dict[str, Any]:
+        """Guarda ``text`` (si no existía) y devuelve su referencia."""
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(data)
+                os.replace(tmp_name, path)
+            except Exception:
+                if os.path.exists(tmp_name):
+                    os.unlink(tmp_name)
+                raise
+            with self._lock:
+                self.writes += 1
+        self._remember(digest, text)
+        return {BLOB_REF_KEY: f"{BLOB_HASH_PREFIX}{digest}", "bytes": len(data)}
+
+    def get(self, ref: Dict[str, Any]) -> str:
+        """Texto de una referencia; ``FileNotFoundError`` si el blob no existe."""
+        digest = ref[BLOB_REF_KEY][len(BLOB_HASH_PREFIX):]
+        with self._lock:
+            text = self._memory.get(digest)
+            if text is not None:
+                self._memory.move_to_end(digest)
+                return text
+        path = self._blob_path(digest)
+        try:
+            text = path.read_bytes().decode("utf-8")
+        except FileNotFoundError as exc:
+            raise FileNotFoundError(
+                f"El blob {ref[BLOB_REF_KEY]} no existe en {self.directory}"
+            ) from exc
+        with self._lock:
+            self.reads += 1
+        self._remember(digest, text)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "directory": str(self.directory),
+                "writes": self.writes,
+                "reads": self.reads,
+                "memory_entries": len(self._memory),
+            }
+
+
+_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Blob store compartido por el proceso."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+        return _store
+
+
+def offload_text(text: Any, min_bytes: Optional[int] = None) -> Any:
+    """Referencia al blob si ``text`` es un string grande; si no, el valor tal cual.
+
+    Si el disco falla, el texto se conserva en el estado (más grande, pero correcto).
+    """
+    if not isinstance(text, str):
+        return text
+    threshold = _blob_min_bytes() if min_bytes is None else min_bytes
+    # len(text) <= bytes UTF-8: descarta los textos pequeños sin codificarlos
+    if not threshold or len(text) * 4 < threshold:
+        return text
+    if len(text.encode("utf-8")) < threshold:
+        return text
+    try:
+        return get_blob_store().put(text)
+    except OSError as exc:
+        logger.warning("No se pudo guardar el blob (%s); se conserva en el estado", exc)
+        return text
+
+
+def resolve_text(value: Any) -> Any:
+    """Texto de una referencia a blob; cualquier otro valor se devuelve tal cual."""
+    if is_blob_ref(value):
+        return get_blob_store().get(value)
+    return value
+
+
+def missing_blob_message(file_path: str, exc: FileNotFoundError, regenerate_with: str) -> str:
+    """Mensaje para el agente cuando ``file_path`` referencia un blob que ya no está en disco."""
+    return (
+        f"No se pudo leer el markdown de {file_path}: {exc}. "
+        "Ocurre al retomar un checkpoint en otro host/contenedor o si se borró el "
+        "directorio de blobs. Configura AURA_BLOB_DIR con el directorio compartido "
+        f"o vuelve a ejecutar {regenerate_with} para regenerarlo."
+    )
@@ -0,0 +1,20 @@
+"""Huellas canónicas para deduplicar estructuras JSON en tiempo lineal."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Optional
+
+
+def canonical_fingerprint(value: Any) -> Optional[str]:
+    """Huella estable de un valor JSON (dict/list/escalares), independiente del orden de llaves.
+
+    Dos valores con la misma huella son iguales como JSON. Devuelve ``None`` si
+    el valor no es serializable; el llamador debe recurrir a comparación por ``==``.
+    """
+    try:
+        payload = json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
@@ -0,0 +1,237 @@
+"""Cache persistente en disco, direccionado por contenido y acotado por tamaño.
+
+Cada entrada es un archivo JSON cuyo nombre es un hash SHA-256 de las partes
+que definen el resultado (bytes del documento, modelo, schema, prompt...).
+La política de expulsión es LRU aproximada usando el ``mtime`` de cada archivo:
+en cada acierto se actualiza el ``mtime`` y, cuando el tamaño total supera el
+límite configurado, se eliminan primero las entradas menos usadas.
+
+Variables de entorno:
+    AURA_CACHE_DIR: directorio raíz del cache (default ``~/.cache/aura``).
+    AURA_CACHE_DISABLED: si vale ``1``/``true``/``yes`` desactiva lecturas y escrituras.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_ROOT = Path.home() / ".cache" / "aura"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Al expulsar se baja hasta este porcentaje del límite para no expulsar en cada escritura.
+EVICTION_LOW_WATERMARK = 0.9
+
+
+def _cache_disabled() -> bool:
+    return os.getenv("AURA_CACHE_DISABLED", "").strip().lower() in {"1", "true", "yes"}
+
+
+def _resolve_cache_root() -> Path:
+    configured = os.getenv("AURA_CACHE_DIR")
+    return Path(configured) if configured else DEFAULT_CACHE_ROOT
+
+
+def _canonical_part(part: Any) -> bytes:
+    """Serializa una parte de la llave de forma estable."""
+    if part is None:
+        return b"null"
+    if isinstance(part, bytes):
+        return part
+    if isinstance(part, str):
+        return part.encode("utf-8")
+    if hasattr(part, "model_dump"):
+        part = part.model_dump(mode="json")
+    return json.dumps(part, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def build_cache_key(*parts: Any) -> str:
+    """Construye una llave SHA-256 a partir de las partes que definen el resultado."""
+    digest = hashlib.sha256()
+    for part in parts:
+        chunk = _canonical_part(part)
+        # Prefijo de longitud para que ("ab", "c") y ("a", "bc") no colisionen
+        digest.update(len(chunk).to_bytes(8, "big"))
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """Cache JSON en disco con expulsión LRU por tamaño y contadores de aciertos."""
+
+    def __init__(
+        self,
+        namespace: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        root: Optional[Path] = None,
+    ):
+        self.namespace = namespace
+        self.max_bytes = max(int(max_bytes), 0)
+        self.directory = Path(root or _resolve_cache_root()) / namespace
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and not _cache_disabled()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _iter_entries(self):
+        if not self.directory.exists():
+            return
+        yield from self.directory.glob("*/*.json")
+
+    def _ensure_total_bytes(self) -> int:
+        if self._total_bytes is None:
+            total = 0
+            for entry in self._iter_entries():
+                try:
+                    total += entry.stat().st_size
+                except OSError:
+                    continue
+            self._total_bytes = total
+        return self._total_bytes
+
+    def get(self, key: str) -> Optional[Any]:
+        """Devuelve el valor almacenado o ``None`` si no existe."""
+        if not self.enabled:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as handle:
+                value = json.load(handle)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        except (OSError, json.JSONDecodeError) as exc:
+            logger.warning("Entrada de cache corrupta %s: %s", path, exc)
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Guarda ``value`` (serializable a JSON) bajo ``key``."""
+        if not self.enabled:
+            return
+
+        try:
+            payload = json.dumps(value, ensure_ascii=False, default=str).encode("utf-8")
+        except (TypeError, ValueError) as exc:
+            logger.warning("No se pudo serializar la entrada de cache %s: %s", key, exc)
+            return
+
+        if len(payload) > self.max_bytes:
+            logger.debug("Entrada %s excede el tamaño máximo del cache, se omite", key)
+            return
+
+        path = self._entry_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            previous_size = path.stat().st_size if path.exists() else 0
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as handle:
+                    handle.write(payload)
+                os.replace(tmp_path, path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as exc:
+            logger.warning("No se pudo escribir la entrada de cache %s: %s", path, exc)
+            return
+
+        with self._lock:
+            self.writes += 1
+            self._total_bytes = self._ensure_total_bytes() + len(payload) - previous_size
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+
+    def _remove(self, path: Path) -> int:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            return size
+        except OSError:
+            return 0
+
+    def _evict_locked(self) -> None:
+        target = int(self.max_bytes * EVICTION_LOW_WATERMARK)
+        entries = []
+        for entry in self._iter_entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort(key=lambda item: item[0])
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= target:
+                break
+            removed = self._remove(entry)
+            if removed:
+                total -= removed
+                self.evictions += 1
+        self._total_bytes = total
+        logger.info(
+            "Cache '%s': expulsión LRU completada, %.1f MB en disco",
+            self.namespace,
+            total / (1024 * 1024),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de aciertos/fallos y ocupación en disco."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "writes": self.writes,
+                "evictions": self.evictions,
+                "bytes": self._ensure_total_bytes(),
+                "max_bytes": self.max_bytes,
+            }
+
+
+_registry: Dict[str, DiskCache] = {}
+_registry_lock = threading.Lock()
+
+
+def get_disk_cache(namespace: str, max_bytes: int = DEFAULT_MAX_BYTES) -> DiskCache:
+    """Devuelve la instancia de cache (única por proceso) para ``namespace``."""
+    with _registry_lock:
+        cache = _registry.get(namespace)
+        if cache is None:
+            cache = DiskCache(namespace, max_bytes=max_bytes)
+            _registry[namespace] = cache
+        return cache
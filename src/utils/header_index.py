@@ -0,0 +1,80 @@
+"""Índice de posiciones de encabezados de pruebas sobre el markdown normalizado.
+
+``_build_markdown_segments`` buscaba cada encabezado compilando hasta tres
+regex con ``re.IGNORECASE`` (exacto, sin numeración, sin dígitos) y
+recorriendo todo el markdown con ``finditer`` por variante. ``HeaderIndex``
+normaliza el markdown una sola vez (minúsculas, misma longitud que el
+original, de modo que los offsets siguen siendo válidos) y resuelve cada
+variante con búsqueda de subcadena exacta, memoizada: una variante
+compartida por varios encabezados se busca una vez, y las variantes de
+respaldo solo se buscan si la anterior no aparece.
+
+La semántica es la de la búsqueda original: coincidencia literal sin
+distinguir mayúsculas, ocurrencias no solapadas de izquierda a derecha, y por
+encabezado se usa la primera variante con coincidencias en el orden exacto ->
+sin numeración -> sin dígitos.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List
+
+_LEADING_NUMBER_RE = re.compile(r"^\s*\d+(\.\d+)*\s+")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def header_variants(raw_header: str) -> List[str]:
+    """Variantes de búsqueda de un encabezado, en orden de preferencia."""
+    header = (raw_header or "").strip()
+    if not header:
+        return []
+
+    variants: List[str] = [header]
+    header_wo_number = _LEADING_NUMBER_RE.sub("", header)
+    if header_wo_number and header_wo_number != header:
+        variants.append(header_wo_number)
+
+    header_wo_digits = _DIGITS_RE.sub("", header).strip()
+    if header_wo_digits and header_wo_digits not in variants:
+        variants.append(header_wo_digits)
+    return variants
+
+
+def _fold(text: str) -> str:
+    """Minúsculas conservando la longitud (los offsets siguen siendo válidos en el original)."""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    # Algunos caracteres cambian de longitud al pasar a minúsculas (p. ej. 'İ')
+    return "".join(char if len(char.lower()) != 1 else char.lower() for char in text)
+
+
+class HeaderIndex:
+    """Localiza encabezados en un markdown normalizado una sola vez."""
+
+    def __init__(self, full_markdown: str):
+        self._text = _fold(full_markdown or "")
+        self._positions: Dict[str, List[int]] = {}
+
+    def _occurrences(self, variant: str) -> List[int]:
+        pattern = _fold(variant)
+        positions = self._positions.get(pattern)
+        if positions is None:
+            positions = []
+            start = self._text.find(pattern)
+            while start != -1:
+                positions.append(start)
+                start = self._text.find(pattern, start + len(pattern))
+            self._positions[pattern] = positions
+        return positions
+
+    def find(self, raw_header: str) -> List[int]:
+        """Posiciones del encabezado usando la primera variante que aparece en el markdown."""
+        if not self._text:
+            return []
+        for variant in header_variants(raw_header):
+            positions = self._occurrences(variant)
+            if positions:
+                return list(positions)
+        return []
@@ -0,0 +1,42 @@
+"""Cache de resultados estructurados del LLM indexado por el contenido del prompt.
+
+La llave combina el modelo, el contenido de cada mensaje (system + human, que
+incluye el texto del chunk) y el JSON schema de la salida estructurada. Si
+cambia el prompt de sistema (p. ej. LATAM vs HRM), el texto del chunk, el
+modelo o el schema, la entrada deja de ser válida de forma natural.
+
+Variables de entorno:
+    AURA_LLM_CACHE_MAX_MB: tamaño máximo del cache de LLM en MB (default 256).
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Sequence
+
+from src.utils.disk_cache import DiskCache, build_cache_key, get_disk_cache
+
+LLM_CACHE_NAMESPACE = "llm_structured"
+DEFAULT_LLM_CACHE_MAX_MB = 256
+
+
+def _max_cache_bytes() -> int:
+    try:
+        max_mb = float(os.getenv("AURA_LLM_CACHE_MAX_MB", DEFAULT_LLM_CACHE_MAX_MB))
+    except ValueError:
+        max_mb = DEFAULT_LLM_CACHE_MAX_MB
+    return int(max_mb * 1024 * 1024)
+
+
+def get_llm_cache() -> DiskCache:
+    """Cache de salidas estructuradas del LLM compartido por todo el proceso."""
+    return get_disk_cache(LLM_CACHE_NAMESPACE, max_bytes=_max_cache_bytes())
+
+
+def build_llm_cache_key(model: str, messages: Sequence[Any], output_schema: Any = None) -> str:
+    """Llave del cache: modelo + (tipo, contenido) de cada mensaje + schema de salida."""
+    serialized_messages = [
+        [getattr(message, "type", None), getattr(message, "content", message)]
+        for message in messages
+    ]
+    return build_cache_key("llm", model, serialized_messages, output_schema)
@@ -0,0 +1,231 @@
+"""Despachador async compartido para llamadas a LLM en abanico (un ``ainvoke`` por chunk).
+
+Reemplaza al ``asyncio.gather`` sin límites: todas las llamadas del proceso
+pasan por un único ``LlmDispatcher`` que aplica
+
+- un tope de llamadas en vuelo (global, válido entre event loops distintos:
+  las herramientas sync envían sus corrutinas al loop de fondo de
+  ``src.utils.async_runner.run_sync``, y Streamlit o ``ainvoke`` usan el suyo);
+- presupuestos por modelo de solicitudes (RPM) y tokens (TPM) por minuto;
+- reintentos con backoff exponencial y jitter completo ante errores
+  transitorios (429, 5xx, timeouts, errores de conexión).
+
+Variables de entorno:
+    AURA_LLM_MAX_CONCURRENCY: llamadas simultáneas en todo el proceso (default 8).
+    AURA_LLM_RPM: solicitudes por minuto y modelo (default 500; ``0`` desactiva).
+    AURA_LLM_TPM: tokens por minuto y modelo (default 200000; ``0`` desactiva).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence
+
+from src.utils.ocr_scheduler import is_throttle_error
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LLM_MAX_CONCURRENCY = 8
+DEFAULT_LLM_RPM = 500
+DEFAULT_LLM_TPM = 200000
+DEFAULT_LLM_MAX_ATTEMPTS = 4
+# Tokens de salida que se reservan por llamada además del prompt estimado.
+DEFAULT_COMPLETION_TOKENS = 1000
+MAX_BACKOFF_SECONDS = 60.0
+# Intervalo de sondeo mientras se espera cupo (el cupo es compartido entre hilos).
+POLL_SECONDS = 0.1
+
+_TRANSIENT_MARKERS = ("connection", "disconnect", "overloaded", "temporarily")
+
+
+def _read_env_number(name: str, default: float) -> float:
+    try:
+        return max(float(os.getenv(name, default)), 0.0)
+    except ValueError:
+        return float(default)
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """Errores que vale la pena reintentar: saturación, 5xx, timeouts y fallos de conexión."""
+    if is_throttle_error(exc):
+        return True
+    status_code = getattr(exc, "status_code", None)
+    if isinstance(status_code, int) and status_code >= 500:
+        return True
+    text = f"{type(exc).__name__} {exc}".lower()
+    return any(marker in text for marker in _TRANSIENT_MARKERS)
+
+
+def estimate_tokens(messages: Sequence[Any], completion_tokens: int = DEFAULT_COMPLETION_TOKENS) -> int:
+    """Estimación barata (~4 caracteres por token) del consumo de una llamada."""
+    characters = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        characters += len(content) if isinstance(content, str) else len(str(content))
+    return characters // 4 + completion_tokens
+
+
+class _MinuteBudget:
+    """Token bucket por minuto; ``capacity == 0`` desactiva el presupuesto."""
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self._available = capacity
+        self._last_refill = time.monotonic()
+
+    def wait_time(self, amount: float, now: float) -> float:
+        if not self.capacity:
+            return 0.0
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._available = min(self.capacity, self._available + elapsed * self.capacity / 60.0)
+        # Una llamada más grande que el presupuesto completo se deja pasar con el bucket lleno
+        needed = min(amount, self.capacity)
+        if self._available >= needed:
+            return 0.0
+        return (needed - self._available) * 60.0 / self.capacity
+
+    def take(self, amount: float) -> None:
+        if self.capacity:
+            self._available -= amount
+
+
+class LlmDispatcher:
+    """Tope de concurrencia + presupuestos RPM/TPM por modelo + reintentos con jitter."""
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_LLM_MAX_CONCURRENCY,
+        requests_per_minute: float = DEFAULT_LLM_RPM,
+        tokens_per_minute: float = DEFAULT_LLM_TPM,
+    ):
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._in_flight = 0
+        self._budgets: Dict[str, Dict[str, _MinuteBudget]] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+
+    def _budget_locked(self, model: str) -> Dict[str, _MinuteBudget]:
+        budget = self._budgets.get(model)
+        if budget is None:
+            budget = {
+                "requests": _MinuteBudget(self.requests_per_minute),
+                "tokens": _MinuteBudget(self.tokens_per_minute),
+            }
+            self._budgets[model] = budget
+        return budget
+
+    def _try_acquire(self, model: str, tokens: int) -> Optional[float]:
+        """``None`` si se tomó el cupo; si no, segundos sugeridos de espera."""
+        with self._lock:
+            if self._in_flight >= self.max_concurrency:
+                return POLL_SECONDS
+            budget = self._budget_locked(model)
+            now = time.monotonic()
+            wait_seconds = max(
+                budget["requests"].wait_time(1, now),
+                budget["tokens"].wait_time(tokens, now),
+            )
+            if wait_seconds > 0:
+                return wait_seconds
+            self._in_flight += 1
+            budget["requests"].take(1)
+            budget["tokens"].take(tokens)
+            return None
+
+    async def _acquire(self, model: str, tokens: int) -> None:
+        while True:
+            wait_seconds = self._try_acquire(model, tokens)
+            if wait_seconds is None:
+                return
+            await asyncio.sleep(min(wait_seconds, 1.0))
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight = max(self._in_flight - 1, 0)
+
+    @staticmethod
+    def backoff_delay(attempt: int, base_seconds: float = 2.0) -> float:
+        """Backoff exponencial con jitter completo para el intento ``attempt`` (1..n)."""
+        ceiling = min(MAX_BACKOFF_SECONDS, base_seconds * (2 ** max(attempt - 1, 0)))
+        return random.uniform(0, ceiling)
+
+    async def ainvoke(
+        self,
+        runnable: Any,
+        messages: Sequence[Any],
+        model: str,
+        label: str = "llm",
+        max_attempts: int = DEFAULT_LLM_MAX_ATTEMPTS,
+        estimated_tokens: Optional[int] = None,
+    ) -> Any:
+        """``runnable.ainvoke(messages)`` bajo los límites del proceso.
+
+        Reintenta los errores transitorios; los demás (y el último intento
+        fallido) se propagan al llamador.
+        """
+        tokens = estimated_tokens if estimated_tokens is not None else estimate_tokens(messages)
+        total_attempts = max(max_attempts, 1)
+        for attempt in range(1, total_attempts + 1):
+            await self._acquire(model, tokens)
+            try:
+                with self._lock:
+                    self.calls += 1
+                return await runnable.ainvoke(list(messages))
+            except Exception as exc:
+                if attempt >= total_attempts or not is_transient_error(exc):
+                    with self._lock:
+                        self.failures += 1
+                    raise
+                wait_seconds = self.backoff_delay(attempt)
+                with self._lock:
+                    self.retries += 1
+                logger.warning(
+                    "Reintentando %s tras error transitorio: %s. Intento %s/%s en %.1fs",
+                    label,
+                    exc,
+                    attempt,
+                    total_attempts,
+                    wait_seconds,
+                )
+            finally:
+                self._release()
+            await asyncio.sleep(wait_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "calls": self.calls,
+                "retries": self.retries,
+                "failures": self.failures,
+            }
+
+
+_dispatcher: Optional[LlmDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_llm_dispatcher() -> LlmDispatcher:
+    """Despachador de LLM compartido por el proceso."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = LlmDispatcher(
+                max_concurrency=int(
+                    _read_env_number("AURA_LLM_MAX_CONCURRENCY", DEFAULT_LLM_MAX_CONCURRENCY)
+                ),
+                requests_per_minute=_read_env_number("AURA_LLM_RPM", DEFAULT_LLM_RPM),
+                tokens_per_minute=_read_env_number("AURA_LLM_TPM", DEFAULT_LLM_TPM),
+            )
+        return _dispatcher
@@ -0,0 +1,137 @@
+"""Splitter de markdown por tokens que tokeniza el documento una sola vez.
+
+``RecursiveCharacterTextSplitter.from_tiktoken_encoder`` vuelve a tokenizar
+cada pieza candidata en cada nivel de recursión y, además, las herramientas
+lo construían en cada llamada (resolviendo de nuevo el encoding de tiktoken).
+Aquí:
+
+- el encoding y el splitter se construyen una vez por proceso (``lru_cache``);
+- el markdown se tokeniza una sola vez y se guarda el offset de carácter en el
+  que empieza cada token; el número de tokens de cualquier rango ``[a, b)`` se
+  obtiene con dos búsquedas binarias sobre esos offsets;
+- los offsets de cada separador se calculan una vez sobre el texto completo y
+  los cortes se eligen con ``bisect`` dentro del rango en curso.
+
+La semántica es la del splitter recursivo de LangChain (sin solape): se corta
+por el primer separador presente en el rango, las piezas se agrupan mientras
+quepan en ``chunk_size`` tokens y las piezas demasiado grandes se vuelven a
+cortar con el siguiente separador. El separador queda al inicio de la pieza
+siguiente y cada chunk se devuelve sin espacios en los extremos.
+
+El conteo por rango es el de la tokenización del documento completo; en los
+bordes de un chunk puede diferir en un token del de tokenizar el chunk aislado.
+"""
+
+from __future__ import annotations
+
+import logging
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def get_token_encoding(model_name: str) -> "tiktoken.Encoding":
+    """Encoding de tiktoken del modelo (o ``o200k_base`` si tiktoken no lo conoce)."""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        logger.debug("tiktoken no conoce %s; usando %s", model_name, DEFAULT_ENCODING)
+        return tiktoken.get_encoding(DEFAULT_ENCODING)
+
+
+class _TokenizedText:
+    """Texto tokenizado una vez, con offsets de separadores calculados bajo demanda."""
+
+    def __init__(self, text: str, encoding: "tiktoken.Encoding"):
+        self.text = text
+        tokens = encoding.encode(text, disallowed_special=())
+        _, self.token_starts = encoding.decode_with_offsets(tokens)
+        self._separator_offsets: Dict[str, List[int]] = {}
+
+    def count(self, start: int, end: int) -> int:
+        return bisect_left(self.token_starts, end) - bisect_left(self.token_starts, start)
+
+    def separator_offsets(self, separator: str) -> List[int]:
+        offsets = self._separator_offsets.get(separator)
+        if offsets is None:
+            offsets = []
+            position = self.text.find(separator)
+            while position != -1:
+                offsets.append(position)
+                position = self.text.find(separator, position + len(separator))
+            self._separator_offsets[separator] = offsets
+        return offsets
+
+    def cuts(self, separator: str, start: int, end: int) -> List[int]:
+        """Posiciones de corte estrictamente dentro de ``(start, end)`` para el separador."""
+        offsets = self.token_starts if separator == "" else self.separator_offsets(separator)
+        lo = bisect_left(offsets, start + 1)
+        hi = bisect_left(offsets, end)
+        return offsets[lo:hi]
+
+
+class TokenMarkdownSplitter:
+    """Divide texto en chunks de como máximo ``chunk_size`` tokens (interfaz ``split_text``)."""
+
+    def __init__(self, model_name: str, chunk_size: int, separators: Sequence[str]):
+        self.encoding = get_token_encoding(model_name)
+        self.chunk_size = max(chunk_size, 1)
+        self.separators = list(separators) or [""]
+
+    def split_text(self, text: str) -> List[str]:
+        if not text:
+            return []
+        tokenized = _TokenizedText(text, self.encoding)
+        spans = self._split_range(tokenized, 0, len(text), 0)
+        chunks = [text[start:end].strip() for start, end in spans]
+        return [chunk for chunk in chunks if chunk]
+
+    def _split_range(
+        self, tokenized: _TokenizedText, start: int, end: int, level: int
+    ) -> List[Tuple[int, int]]:
+        if tokenized.count(start, end) <= self.chunk_size:
+            return [(start, end)]
+
+        # Primer separador (desde ``level``) que corta el rango; "" corta por token
+        for next_level in range(level, len(self.separators)):
+            cuts = tokenized.cuts(self.separators[next_level], start, end)
+            if cuts or self.separators[next_level] == "":
+                break
+        else:
+            return [(start, end)]
+        if not cuts:
+            return [(start, end)]
+
+        bounds = [start, *cuts, end]
+        spans: List[Tuple[int, int]] = []
+        current_start = start
+        current_tokens = 0
+        for piece_start, piece_end in zip(bounds, bounds[1:]):
+            piece_tokens = tokenized.count(piece_start, piece_end)
+            if current_tokens and current_tokens + piece_tokens > self.chunk_size:
+                spans.append((current_start, piece_start))
+                current_start, current_tokens = piece_start, 0
+            if piece_tokens > self.chunk_size:
+                # Pieza sola demasiado grande: se corta con los separadores siguientes
+                spans.extend(self._split_range(tokenized, piece_start, piece_end, next_level + 1))
+                current_start, current_tokens = piece_end, 0
+                continue
+            current_tokens += piece_tokens
+        if current_start < end:
+            spans.append((current_start, end))
+        return spans
+
+
+@lru_cache(maxsize=None)
+def get_markdown_splitter(
+    model_name: str, chunk_size: int, separators: Tuple[str, ...]
+) -> TokenMarkdownSplitter:
+    """Splitter compartido por proceso para la combinación modelo/tamaño/separadores."""
+    return TokenMarkdownSplitter(model_name, chunk_size, separators)
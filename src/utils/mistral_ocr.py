@@ -0,0 +1,746 @@
+"""Pipeline compartido de chunking + Mistral OCR para documentos PDF.
+
+Lo usan ``pdf_da_metadata_toc``, ``extract_annex_cc`` y
+``sbs_proposed_column``. Los chunks se construyen con ``PdfWriter`` en
+buffers en memoria y se codifican a base64 directamente desde esos bytes:
+no se escriben archivos temporales.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import io
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Protocol, Tuple, Type, Union
+
+from langsmith import traceable
+from mistralai.extra import response_format_from_pydantic_model
+from pydantic import BaseModel
+from PyPDF2 import PdfReader, PdfWriter
+
+from src.utils.llm_dispatcher import is_transient_error
+from src.utils.ocr_client import get_async_ocr_client, get_ocr_client
+from src.utils.ocr_scheduler import get_ocr_scheduler, is_throttle_error
+from src.utils.ocr_cache import (
+    build_ocr_cache_key,
+    build_ocr_page_cache_key,
+    get_ocr_cache,
+    get_ocr_page_cache,
+    serialize_ocr_response,
+)
+
+logger = logging.getLogger(__name__)
+
+OCR_MODEL = "mistral-ocr-latest"
+
+
+def _open_reader(pdf_source: Union[str, PdfReader]) -> PdfReader:
+    if isinstance(pdf_source, PdfReader):
+        return pdf_source
+    return PdfReader(pdf_source)
+
+
+def get_pdf_page_count(pdf_path: str) -> int:
+    """Get the number of pages in a PDF."""
+    try:
+        with open(pdf_path, "rb") as pdf_file:
+            reader = PdfReader(pdf_file)
+            return len(reader.pages)
+    except Exception as e:
+        logger.error("Error counting pages in %s: %s", pdf_path, e)
+        return 0
+
+
+def _page_ranges(
+    total_pages: int,
+    max_pages_per_chunk: int,
+    chunk_overlap_pages: int,
+) -> List[Tuple[int, int]]:
+    """Rangos ``[start, end)`` de páginas por chunk; no emite chunks redundantes al final."""
+    overlap = max(chunk_overlap_pages, 0)
+    chunk_size = max(max_pages_per_chunk, 1)
+    step = max(chunk_size - overlap, 1)
+
+    ranges: List[Tuple[int, int]] = []
+    for start in range(0, total_pages, step):
+        end = min(start + chunk_size, total_pages)
+        ranges.append((start, end))
+        if end >= total_pages:
+            break
+    return ranges
+
+
+def _range_pdf_bytes(reader: PdfReader, start: int, end: int) -> bytes:
+    """Escribe las páginas ``[start, end)`` en un PDF en memoria."""
+    chunk_writer = PdfWriter()
+    for page_idx in range(start, end):
+        chunk_writer.add_page(reader.pages[page_idx])
+    buffer = io.BytesIO()
+    chunk_writer.write(buffer)
+    return buffer.getvalue()
+
+
+def split_pdf_into_chunks(
+    pdf_source: Union[str, PdfReader],
+    max_pages_per_chunk: int = 8,
+    chunk_overlap_pages: int = 2,
+) -> List[bytes]:
+    """Split PDF into in-memory chunks of pages with overlap."""
+    try:
+        reader = _open_reader(pdf_source)
+        return [
+            _range_pdf_bytes(reader, start, end)
+            for start, end in _page_ranges(
+                len(reader.pages), max_pages_per_chunk, chunk_overlap_pages
+            )
+        ]
+    except Exception as e:  # pragma: no cover - defensive
+        logger.error("Error splitting PDF into chunks: %s", e)
+        return []
+
+
+def encode_pdf_bytes(pdf_bytes: bytes) -> str:
+    """Encode pdf bytes to base64."""
+    return base64.b64encode(pdf_bytes).decode("utf-8")
+
+
+def read_pdf_bytes(pdf_path: str) -> Optional[bytes]:
+    """Read the raw bytes of a pdf."""
+    try:
+        with open(pdf_path, "rb") as pdf_file:
+            return pdf_file.read()
+    except Exception as e:
+        logger.error("Error reading PDF %s: %s", pdf_path, e)
+        return None
+
+
+def encode_pdf(pdf_path: str) -> Optional[str]:
+    """Encode the pdf to base64."""
+    pdf_bytes = read_pdf_bytes(pdf_path)
+    if not pdf_bytes:
+        return None
+    return encode_pdf_bytes(pdf_bytes)
+
+
+def _resolve_chunk(
+    chunk: Union[bytes, str], chunk_label: Optional[str]
+) -> Tuple[Optional[bytes], str]:
+    if isinstance(chunk, str):
+        return read_pdf_bytes(chunk), chunk_label or chunk
+    return chunk, chunk_label or "chunk"
+
+
+def _build_chunk_request(
+    pdf_bytes: bytes,
+    extraction_model: Optional[Type[BaseModel]],
+    chunk_label: str,
+) -> Tuple[str, Dict[str, Any]]:
+    """Devuelve la llave de cache y los parámetros de ``ocr.process`` del chunk."""
+    annotation_format = None
+    if extraction_model:
+        try:
+            annotation_format = response_format_from_pydantic_model(extraction_model)
+        except Exception as exc:
+            logger.warning(
+                "No se pudo generar schema pydantic para %s: %s", chunk_label, exc
+            )
+
+    cache_key = build_ocr_cache_key(pdf_bytes, OCR_MODEL, annotation_format)
+    request_params: Dict[str, Any] = {
+        "model": OCR_MODEL,
+        "document": {
+            "type": "document_url",
+            "document_url": f"data:application/pdf;base64,{encode_pdf_bytes(pdf_bytes)}",
+        },
+        "include_image_base64": False,
+    }
+    if annotation_format is not None:
+        request_params["document_annotation_format"] = annotation_format
+    return cache_key, request_params
+
+
+_PAYLOAD_TOO_LARGE_MARKERS = ("too large", "too many pages")
+
+
+def is_payload_too_large_error(exc: BaseException) -> bool:
+    """Indica si la API rechazó el chunk por tamaño (413 o mensaje equivalente)."""
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(exc, "response", None), "status_code", None)
+    if status_code == 413:
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in _PAYLOAD_TOO_LARGE_MARKERS)
+
+
+def _should_bisect(exc: BaseException) -> bool:
+    """Solo vale la pena partir un rango si el error depende de la carga o del tamaño."""
+    return is_transient_error(exc) or is_payload_too_large_error(exc)
+
+
+def _handle_chunk_error(
+    exc: Exception,
+    attempt: int,
+    total_attempts: int,
+    chunk_label: str,
+    backoff_seconds: float,
+) -> Optional[float]:
+    """Registra el fallo en el scheduler; devuelve la espera antes de reintentar.
+
+    Devuelve ``None`` (sin reintento) en el último intento y ante errores que
+    no son transitorios (400, 401, documento inválido, ...).
+    """
+    scheduler = get_ocr_scheduler()
+    if is_throttle_error(exc):
+        scheduler.record_throttle()
+    if attempt >= total_attempts or not is_transient_error(exc):
+        return None
+    wait_seconds = scheduler.backoff_delay(attempt, backoff_seconds)
+    logger.warning(
+        "Retrying %s after error: %s. Intento %s/%s en %.1fs",
+        chunk_label,
+        exc,
+        attempt,
+        total_attempts,
+        wait_seconds,
+    )
+    return wait_seconds
+
+
+def process_chunk(
+    chunk: Union[bytes, str],
+    extraction_model: Optional[Type[BaseModel]],
+    chunk_retry_backoff_seconds: int = 5,
+    chunk_retry_attempts: int = 3,
+    chunk_label: Optional[str] = None,
+    chunk_pages: int = 1,
+    raise_on_error: bool = False,
+):
+    """Process a single PDF chunk with Mistral OCR + Document Annotation.
+
+    ``chunk`` son los bytes del PDF (o una ruta, por compatibilidad). Los
+    resultados se guardan en el cache de OCR (hash del chunk + modelo +
+    schema); una re-ejecución sobre el mismo documento no vuelve a llamar a la API.
+    ``chunk_pages`` es lo que la llamada descuenta del presupuesto de páginas
+    del scheduler. Solo se reintentan errores transitorios; con
+    ``raise_on_error`` se relanza el último error en lugar de devolver ``None``.
+    """
+    pdf_bytes, chunk_label = _resolve_chunk(chunk, chunk_label)
+    if not pdf_bytes:
+        return None
+
+    cache_key, request_params = _build_chunk_request(pdf_bytes, extraction_model, chunk_label)
+    ocr_cache = get_ocr_cache()
+    cached_response = ocr_cache.get(cache_key)
+    if cached_response is not None:
+        logger.info("OCR de %s servido desde cache (%s)", chunk_label, cache_key[:12])
+        return cached_response
+
+    ocr_client = get_ocr_client()
+    scheduler = get_ocr_scheduler()
+    last_exception: Optional[Exception] = None
+    total_attempts = max(chunk_retry_attempts, 1)
+
+    for attempt in range(1, total_attempts + 1):
+        try:
+            with scheduler.slot(chunk_pages):
+                response = ocr_client.ocr.process(**request_params)
+            scheduler.record_success()
+            ocr_cache.set(cache_key, serialize_ocr_response(response))
+            return response
+        except Exception as exc:
+            last_exception = exc
+            wait_seconds = _handle_chunk_error(
+                exc, attempt, total_attempts, chunk_label, chunk_retry_backoff_seconds
+            )
+            if wait_seconds is None:
+                break
+            time.sleep(wait_seconds)
+
+    if raise_on_error and last_exception is not None:
+        raise last_exception
+    logger.error("Error processing %s: %s", chunk_label, last_exception)
+    return None
+
+
+async def aprocess_chunk(
+    chunk: Union[bytes, str],
+    extraction_model: Optional[Type[BaseModel]],
+    chunk_retry_backoff_seconds: int = 5,
+    chunk_retry_attempts: int = 3,
+    chunk_label: Optional[str] = None,
+    chunk_pages: int = 1,
+    raise_on_error: bool = False,
+):
+    """Versión async de ``process_chunk`` sobre el cliente async de Mistral.
+
+    Comparte cache y scheduler con la versión sync; el I/O de disco del cache
+    se ejecuta en un hilo para no bloquear el event loop.
+    """
+    if isinstance(chunk, str):
+        pdf_bytes, chunk_label = await asyncio.to_thread(_resolve_chunk, chunk, chunk_label)
+    else:
+        pdf_bytes, chunk_label = _resolve_chunk(chunk, chunk_label)
+    if not pdf_bytes:
+        return None
+
+    cache_key, request_params = _build_chunk_request(pdf_bytes, extraction_model, chunk_label)
+    ocr_cache = get_ocr_cache()
+    cached_response = await asyncio.to_thread(ocr_cache.get, cache_key)
+    if cached_response is not None:
+        logger.info("OCR de %s servido desde cache (%s)", chunk_label, cache_key[:12])
+        return cached_response
+
+    ocr_client = get_async_ocr_client()
+    scheduler = get_ocr_scheduler()
+    last_exception: Optional[Exception] = None
+    total_attempts = max(chunk_retry_attempts, 1)
+
+    for attempt in range(1, total_attempts + 1):
+        try:
+            async with scheduler.aslot(chunk_pages):
+                response = await ocr_client.ocr.process_async(**request_params)
+            scheduler.record_success()
+            await asyncio.to_thread(ocr_cache.set, cache_key, serialize_ocr_response(response))
+            return response
+        except Exception as exc:
+            last_exception = exc
+            wait_seconds = _handle_chunk_error(
+                exc, attempt, total_attempts, chunk_label, chunk_retry_backoff_seconds
+            )
+            if wait_seconds is None:
+                break
+            await asyncio.sleep(wait_seconds)
+
+    if raise_on_error and last_exception is not None:
+        raise last_exception
+    logger.error("Error processing %s: %s", chunk_label, last_exception)
+    return None
+
+
+class ChunkSink(Protocol):
+    """Consumidor de resultados de OCR por chunk (ver ``process_document_streaming``).
+
+    ``add`` recibe la lista de respuestas del chunk en orden de página: más de
+    una si el chunk se bisectó tras fallar, vacía si no se pudo recuperar.
+    """
+
+    def start(self, total_chunks: int, total_pages: int) -> None: ...
+
+    def add(self, index: int, responses: List[Dict[str, Any]]) -> None: ...
+
+
+class _DocumentJob:
+    """Estado compartido del OCR de un documento: lector PDF, plan y llaves por página.
+
+    El plan trabaja a nivel de página:
+
+    - Con ``extraction_model`` (document annotation) se usan chunks fijos con
+      solape, porque la anotación depende del contexto del chunk; se reutiliza
+      el cache por chunk de ``process_chunk``.
+    - Sin ``extraction_model`` (solo markdown) cada página tiene su llave en el
+      cache de páginas; solo se envían a OCR las páginas no cacheadas, agrupadas
+      en rangos contiguos, y el solape no aplica.
+
+    En ambos casos las páginas de las respuestas llevan ``index`` absoluto
+    (0-based en el documento) y un chunk que falla se reintenta bisectándolo.
+
+    ``pdf_source`` es una ruta o los bytes de un PDF ya construido en memoria
+    (p. ej. la columna propuesta de un Side-by-Side).
+    """
+
+    def __init__(
+        self,
+        pdf_source: Union[str, bytes],
+        extraction_model: Optional[Type[BaseModel]],
+        max_pages_per_chunk: int,
+        chunk_overlap_pages: int,
+    ):
+        self.pdf_source = pdf_source
+        # Etiqueta para logs; los PDFs en memoria no tienen ruta.
+        self.pdf_path = (
+            pdf_source
+            if isinstance(pdf_source, str)
+            else f"<PDF en memoria, {len(pdf_source)} bytes>"
+        )
+        self.extraction_model = extraction_model
+        self.max_pages_per_chunk = max(max_pages_per_chunk, 1)
+        self.chunk_overlap_pages = chunk_overlap_pages
+        self.reader: Optional[PdfReader] = None
+        self.total_pages = 0
+        self.page_keys: Optional[List[str]] = None
+        # PdfReader no es seguro entre hilos; la bisección construye PDFs desde los workers.
+        self._reader_lock = threading.Lock()
+
+    def plan(self) -> List[Dict[str, Any]]:
+        """Abre el PDF una sola vez y devuelve los chunks a procesar en orden de página."""
+        try:
+            source = self.pdf_source
+            self.reader = PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+            self.total_pages = len(self.reader.pages)
+        except Exception as e:
+            logger.error("Error counting pages in %s: %s", self.pdf_path, e)
+            self.total_pages = 0
+        logger.info("Processing PDF %s with %s pages", self.pdf_path, self.total_pages)
+        if self.total_pages == 0:
+            logger.error("Skipping %s: could not read any pages", self.pdf_path)
+            return []
+
+        if self.extraction_model is not None:
+            return [
+                {"start": start, "end": end}
+                for start, end in _page_ranges(
+                    self.total_pages, self.max_pages_per_chunk, self.chunk_overlap_pages
+                )
+            ]
+        return self._plan_uncached_pages()
+
+    def _plan_uncached_pages(self) -> List[Dict[str, Any]]:
+        page_cache = get_ocr_page_cache()
+        self.page_keys = [
+            build_ocr_page_cache_key(_range_pdf_bytes(self.reader, idx, idx + 1), OCR_MODEL)
+            for idx in range(self.total_pages)
+        ]
+
+        plan: List[Dict[str, Any]] = []
+        pending_start: Optional[int] = None
+
+        def _flush_pending(stop: int) -> None:
+            if pending_start is None:
+                return
+            for start in range(pending_start, stop, self.max_pages_per_chunk):
+                plan.append({"start": start, "end": min(start + self.max_pages_per_chunk, stop)})
+
+        for idx, key in enumerate(self.page_keys):
+            cached = page_cache.get(key)
+            if cached is None:
+                if pending_start is None:
+                    pending_start = idx
+                continue
+
+            _flush_pending(idx)
+            pending_start = None
+            page = {"index": idx, "markdown": cached.get("markdown", "")}
+            previous = plan[-1] if plan else None
+            if previous and "cached_pages" in previous and previous["end"] == idx:
+                previous["cached_pages"].append(page)
+                previous["end"] = idx + 1
+            else:
+                plan.append({"start": idx, "end": idx + 1, "cached_pages": [page]})
+        _flush_pending(self.total_pages)
+
+        cached_pages = sum(len(item.get("cached_pages", [])) for item in plan)
+        if cached_pages:
+            logger.info(
+                "%s: %s/%s páginas servidas desde el cache de páginas",
+                self.pdf_path,
+                cached_pages,
+                self.total_pages,
+            )
+        return plan
+
+    def chunk_source(self, start: int, end: int) -> Union[bytes, str]:
+        """PDF a enviar para ``[start, end)``; el documento completo se envía tal cual."""
+        if start == 0 and end == self.total_pages:
+            return self.pdf_source
+        with self._reader_lock:
+            return _range_pdf_bytes(self.reader, start, end)
+
+    def finish(self, response: Any, start: int) -> Dict[str, Any]:
+        """Normaliza la respuesta (índices de página absolutos) y alimenta el cache de páginas."""
+        payload = serialize_ocr_response(response)
+        for position, page in enumerate(payload["pages"]):
+            relative = page.get("index")
+            page["index"] = start + (relative if isinstance(relative, int) else position)
+
+        if self.page_keys is not None:
+            page_cache = get_ocr_page_cache()
+            for page in payload["pages"]:
+                if 0 <= page["index"] < len(self.page_keys):
+                    page_cache.set(self.page_keys[page["index"]], {"markdown": page["markdown"]})
+        return payload
+
+    def label(self, start: int, end: int) -> str:
+        return f"{self.pdf_path} [páginas {start + 1}-{end}/{self.total_pages}]"
+
+
+def _split_range(start: int, end: int) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    middle = (start + end) // 2
+    return (start, middle), (middle, end)
+
+
+def _run_planned_chunk(job: _DocumentJob, start: int, end: int) -> List[Dict[str, Any]]:
+    """OCR de ``[start, end)``; si falla por carga o tamaño tras los reintentos, bisecta el rango.
+
+    Cualquier otro error (400, 401, documento inválido, ...) descarta el rango sin bisectar.
+    """
+    try:
+        response = process_chunk(
+            job.chunk_source(start, end),
+            job.extraction_model,
+            chunk_retry_backoff_seconds=5,
+            chunk_retry_attempts=3,
+            chunk_label=job.label(start, end),
+            chunk_pages=end - start,
+            raise_on_error=True,
+        )
+    except Exception as exc:
+        if end - start <= 1 or not _should_bisect(exc):
+            logger.error("Error processing %s: %s", job.label(start, end), exc)
+            return []
+    else:
+        return [job.finish(response, start)] if response is not None else []
+
+    left, right = _split_range(start, end)
+    logger.warning("Bisecting failed chunk %s into %s and %s", job.label(start, end), left, right)
+    return _run_planned_chunk(job, *left) + _run_planned_chunk(job, *right)
+
+
+async def _arun_planned_chunk(job: _DocumentJob, start: int, end: int) -> List[Dict[str, Any]]:
+    """Versión async de ``_run_planned_chunk``."""
+    source = await asyncio.to_thread(job.chunk_source, start, end)
+    try:
+        response = await aprocess_chunk(
+            source,
+            job.extraction_model,
+            chunk_retry_backoff_seconds=5,
+            chunk_retry_attempts=3,
+            chunk_label=job.label(start, end),
+            chunk_pages=end - start,
+            raise_on_error=True,
+        )
+    except Exception as exc:
+        if end - start <= 1 or not _should_bisect(exc):
+            logger.error("Error processing %s: %s", job.label(start, end), exc)
+            return []
+    else:
+        if response is None:
+            return []
+        return [await asyncio.to_thread(job.finish, response, start)]
+
+    left, right = _split_range(start, end)
+    logger.warning("Bisecting failed chunk %s into %s and %s", job.label(start, end), left, right)
+    left_results, right_results = await asyncio.gather(
+        _arun_planned_chunk(job, *left), _arun_planned_chunk(job, *right)
+    )
+    return left_results + right_results
+
+
+class _CollectingSink:
+    """Sink que conserva las respuestas para ``process_document``."""
+
+    def __init__(self):
+        self.results: List[Tuple[int, List[Dict[str, Any]]]] = []
+
+    def start(self, total_chunks: int, total_pages: int) -> None:
+        return None
+
+    def add(self, index: int, responses: List[Dict[str, Any]]) -> None:
+        if responses:
+            self.results.append((index, responses))
+
+    def ordered(self) -> List[Dict[str, Any]]:
+        ordered: List[Dict[str, Any]] = []
+        for _, responses in sorted(self.results, key=lambda item: item[0]):
+            ordered.extend(responses)
+        return ordered
+
+
+def _log_pipeline_stats() -> None:
+    logger.info("Cache OCR: %s", get_ocr_cache().stats())
+    logger.info("Scheduler OCR: %s", get_ocr_scheduler().stats())
+
+
+def _dispatch_cached_items(
+    job: _DocumentJob, plan: List[Dict[str, Any]], sink: ChunkSink
+) -> Dict[int, Dict[str, Any]]:
+    """Entrega al sink los chunks servidos desde el cache de páginas; devuelve los pendientes."""
+    pending: Dict[int, Dict[str, Any]] = {}
+    for idx, item in enumerate(plan):
+        if "cached_pages" in item:
+            sink.add(idx, [{"document_annotation": None, "pages": item["cached_pages"]}])
+        else:
+            pending[idx] = item
+    return pending
+
+
+@traceable
+def process_documents_streaming(
+    documents: List[Tuple[Union[str, bytes], ChunkSink]],
+    extraction_model: Optional[Type[BaseModel]],
+    max_pages_per_chunk: int = 8,
+    chunk_overlap_pages: int = 0,
+) -> int:
+    """Procesa varios PDFs con un único pool de OCR compartido.
+
+    Cada documento es una ruta o los bytes de un PDF en memoria. Se
+    planifican los chunks de todos los documentos antes de enviar nada y se
+    despachan en una sola ola; cada resultado se entrega al sink de su
+    documento en cuanto termina. Las llamadas a los sinks ocurren siempre en
+    el hilo que invoca esta función (nunca en los workers), por lo que no
+    necesitan sincronización. Devuelve el número total de chunks planificados.
+    """
+    work: List[Tuple[_DocumentJob, ChunkSink, int, Dict[str, Any]]] = []
+    total_chunks = 0
+    for pdf_source, sink in documents:
+        job = _DocumentJob(pdf_source, extraction_model, max_pages_per_chunk, chunk_overlap_pages)
+        plan = job.plan()
+        sink.start(len(plan), job.total_pages)
+        total_chunks += len(plan)
+        for idx, item in _dispatch_cached_items(job, plan, sink).items():
+            work.append((job, sink, idx, item))
+
+    if len(work) == 1:
+        job, sink, idx, item = work[0]
+        sink.add(idx, _run_planned_chunk(job, item["start"], item["end"]))
+    elif work:
+        # La concurrencia efectiva la limita el scheduler global (compartido entre
+        # documentos); el pool solo necesita hilos suficientes para su techo.
+        max_workers = max(1, min(int(get_ocr_scheduler().max_concurrency), len(work)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            future_map = {
+                executor.submit(_run_planned_chunk, job, item["start"], item["end"]): (job, sink, idx)
+                for job, sink, idx, item in work
+            }
+            for future in as_completed(future_map):
+                job, sink, idx = future_map[future]
+                try:
+                    responses = future.result()
+                except Exception as exc:
+                    logger.error("Error processing chunk %s of %s: %s", idx + 1, job.pdf_path, exc)
+                    responses = []
+                sink.add(idx, responses)
+
+    if total_chunks:
+        _log_pipeline_stats()
+    return total_chunks
+
+
+def process_document_streaming(
+    pdf_path: Union[str, bytes],
+    extraction_model: Optional[Type[BaseModel]],
+    sink: ChunkSink,
+    max_pages_per_chunk: int = 8,
+    chunk_overlap_pages: int = 0,
+) -> int:
+    """Procesa un PDF y entrega cada chunk planificado a ``sink.add`` en cuanto termina."""
+    return process_documents_streaming(
+        [(pdf_path, sink)],
+        extraction_model,
+        max_pages_per_chunk=max_pages_per_chunk,
+        chunk_overlap_pages=chunk_overlap_pages,
+    )
+
+
+@traceable
+def process_document(
+    pdf_path: str,
+    extraction_model: Optional[Type[BaseModel]],
+    max_pages_per_chunk: int = 8,
+    chunk_overlap_pages: int = 0,
+) -> List[Any]:
+    """Process PDF with automatic chunking if needed. Uses parallel chunk annotation for long docs."""
+    sink = _CollectingSink()
+    process_document_streaming(
+        pdf_path,
+        extraction_model,
+        sink,
+        max_pages_per_chunk=max_pages_per_chunk,
+        chunk_overlap_pages=chunk_overlap_pages,
+    )
+    return sink.ordered()
+
+
+@traceable
+async def aprocess_document_streaming(
+    pdf_path: Union[str, bytes],
+    extraction_model: Optional[Type[BaseModel]],
+    sink: ChunkSink,
+    max_pages_per_chunk: int = 8,
+    chunk_overlap_pages: int = 0,
+) -> int:
+    """Versión async de ``process_document_streaming``.
+
+    La planificación (lectura del PDF, hashes de página) corre en un hilo; los
+    chunks se envían con el cliente async bajo un ``asyncio.Semaphore`` por
+    documento, además del límite global del scheduler, de modo que un solo
+    worker puede solapar OCR de varios documentos.
+    """
+    job = _DocumentJob(pdf_path, extraction_model, max_pages_per_chunk, chunk_overlap_pages)
+    plan = await asyncio.to_thread(job.plan)
+    sink.start(len(plan), job.total_pages)
+    if not plan:
+        return 0
+
+    pending = _dispatch_cached_items(job, plan, sink)
+    if pending:
+        semaphore = asyncio.Semaphore(
+            max(1, min(int(get_ocr_scheduler().max_concurrency), len(pending)))
+        )
+
+        async def _run(idx: int, item: Dict[str, Any]) -> Tuple[int, List[Dict[str, Any]]]:
+            try:
+                async with semaphore:
+                    responses = await _arun_planned_chunk(job, item["start"], item["end"])
+            except Exception as exc:
+                logger.error("Error processing chunk %s of %s: %s", idx + 1, job.pdf_path, exc)
+                responses = []
+            return idx, responses
+
+        tasks = [asyncio.ensure_future(_run(idx, item)) for idx, item in pending.items()]
+        for next_done in asyncio.as_completed(tasks):
+            idx, responses = await next_done
+            sink.add(idx, responses)
+
+    _log_pipeline_stats()
+    return len(plan)
+
+
+@traceable
+async def aprocess_documents_streaming(
+    documents: List[Tuple[Union[str, bytes], ChunkSink]],
+    extraction_model: Optional[Type[BaseModel]],
+    max_pages_per_chunk: int = 8,
+    chunk_overlap_pages: int = 0,
+) -> int:
+    """Versión async de ``process_documents_streaming``.
+
+    Los documentos se procesan concurrentemente; el scheduler global acota el
+    total de llamadas de OCR en vuelo entre todos ellos.
+    """
+    totals = await asyncio.gather(
+        *(
+            aprocess_document_streaming(
+                pdf_path,
+                extraction_model,
+                sink,
+                max_pages_per_chunk=max_pages_per_chunk,
+                chunk_overlap_pages=chunk_overlap_pages,
+            )
+            for pdf_path, sink in documents
+        )
+    )
+    return sum(totals)
+
+
+@traceable
+async def aprocess_document(
+    pdf_path: str,
+    extraction_model: Optional[Type[BaseModel]],
+    max_pages_per_chunk: int = 8,
+    chunk_overlap_pages: int = 0,
+) -> List[Any]:
+    """Versión async de ``process_document``."""
+    sink = _CollectingSink()
+    await aprocess_document_streaming(
+        pdf_path,
+        extraction_model,
+        sink,
+        max_pages_per_chunk=max_pages_per_chunk,
+        chunk_overlap_pages=chunk_overlap_pages,
+    )
+    return sink.ordered()
@@ -0,0 +1,87 @@
+"""Cache de resultados de Mistral OCR indexado por el contenido del chunk.
+
+La llave combina el hash de los bytes del PDF enviado, el modelo de OCR y el
+schema de ``document_annotation_format`` generado con
+``response_format_from_pydantic_model``. Si cambia cualquiera de los tres, la
+entrada deja de ser válida de forma natural (no hay invalidación manual).
+
+El markdown de cada página se guarda además en un cache por página
+(``mistral_ocr_pages``), usado por el planificador de ``mistral_ocr`` para no
+volver a enviar páginas ya procesadas cuando no se pide anotación.
+
+Variables de entorno:
+    AURA_OCR_CACHE_MAX_MB: tamaño máximo de cada cache de OCR en MB (default 1024).
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional
+
+from src.utils.disk_cache import DiskCache, build_cache_key, get_disk_cache
+
+OCR_CACHE_NAMESPACE = "mistral_ocr"
+OCR_PAGE_CACHE_NAMESPACE = "mistral_ocr_pages"
+DEFAULT_OCR_CACHE_MAX_MB = 1024
+
+
+def _max_cache_bytes() -> int:
+    try:
+        max_mb = float(os.getenv("AURA_OCR_CACHE_MAX_MB", DEFAULT_OCR_CACHE_MAX_MB))
+    except ValueError:
+        max_mb = DEFAULT_OCR_CACHE_MAX_MB
+    return int(max_mb * 1024 * 1024)
+
+
+def get_ocr_cache() -> DiskCache:
+    """Cache de OCR compartido por todo el proceso."""
+    return get_disk_cache(OCR_CACHE_NAMESPACE, max_bytes=_max_cache_bytes())
+
+
+def get_ocr_page_cache() -> DiskCache:
+    """Cache del markdown de OCR por página (PDF de una sola página)."""
+    return get_disk_cache(OCR_PAGE_CACHE_NAMESPACE, max_bytes=_max_cache_bytes())
+
+
+def build_ocr_cache_key(
+    pdf_bytes: bytes,
+    model: str,
+    annotation_format: Any = None,
+) -> str:
+    """Llave del cache: hash(bytes del chunk) + modelo + schema de anotación."""
+    return build_cache_key("ocr", pdf_bytes, model, annotation_format)
+
+
+def build_ocr_page_cache_key(page_pdf_bytes: bytes, model: str) -> str:
+    """Llave del cache de páginas: hash del PDF de una página + modelo."""
+    return build_cache_key("ocr-page", page_pdf_bytes, model)
+
+
+def _read_field(source: Any, name: str) -> Any:
+    if isinstance(source, dict):
+        return source.get(name)
+    return getattr(source, name, None)
+
+
+def serialize_ocr_response(response: Any) -> Dict[str, Any]:
+    """Reduce la respuesta de OCR a lo que consumen las herramientas.
+
+    Solo se conservan ``document_annotation`` y el markdown de cada página; el
+    dict resultante es compatible con ``consolidate_chunks_data`` y con
+    ``_collect_full_markdown_from_chunks``.
+    """
+    pages: List[Dict[str, Any]] = []
+    for position, page in enumerate(_read_field(response, "pages") or []):
+        index = _read_field(page, "index")
+        pages.append(
+            {
+                "index": index if index is not None else position,
+                "markdown": _read_field(page, "markdown") or "",
+            }
+        )
+
+    annotation: Optional[Any] = _read_field(response, "document_annotation")
+    return {
+        "document_annotation": annotation,
+        "pages": pages,
+    }
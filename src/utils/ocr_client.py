@@ -0,0 +1,182 @@
+"""Cliente Mistral compartido por todos los workers de OCR.
+
+Antes cada chunk creaba su propio ``Mistral(...)`` y con él un pool HTTP nuevo
+(y un handshake TLS nuevo). Aquí se mantiene un único cliente por proceso,
+respaldado por un ``httpx.Client`` con keep-alive y un pool dimensionado al
+número de workers del ``ThreadPoolExecutor`` de OCR.
+
+El camino async usa ``get_async_ocr_client``: un ``httpx.AsyncClient`` por
+event loop (el loop de fondo de ``run_sync`` y cada ``asyncio.run`` de
+Streamlit), porque sus conexiones quedan ligadas al loop donde se abrieron.
+
+Variables de entorno:
+    MISTRAL_API_KEY: llave de la API (requerida).
+    MISTRAL_SERVER_URL: URL alternativa del servidor (p. ej. un stub local para pruebas).
+    AURA_OCR_MAX_WORKERS: workers concurrentes de OCR y tamaño del pool HTTP (default 4).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import Optional
+
+import httpx
+from mistralai import Mistral
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OCR_MAX_WORKERS = 4
+DEFAULT_OCR_TIMEOUT_MS = 300000
+# Segundos que una conexión ociosa permanece abierta en el pool.
+KEEPALIVE_EXPIRY_SECONDS = 120.0
+
+_client: Optional[Mistral] = None
+# ``True`` si el cliente vino de ``set_ocr_client``: se usa tal cual también en async.
+_client_injected = False
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Mistral]" = (
+    weakref.WeakKeyDictionary()
+)
+_client_lock = threading.Lock()
+
+
+def get_ocr_max_workers() -> int:
+    """Número de workers de OCR (y de conexiones del pool HTTP)."""
+    try:
+        workers = int(os.getenv("AURA_OCR_MAX_WORKERS", DEFAULT_OCR_MAX_WORKERS))
+    except ValueError:
+        workers = DEFAULT_OCR_MAX_WORKERS
+    return max(workers, 1)
+
+
+def _build_limits(pool_size: int) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=pool_size,
+        max_keepalive_connections=pool_size,
+        keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def build_ocr_client(
+    api_key: Optional[str] = None,
+    server_url: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    timeout_ms: int = DEFAULT_OCR_TIMEOUT_MS,
+    http_client: Optional[httpx.Client] = None,
+    async_http_client: Optional[httpx.AsyncClient] = None,
+) -> Mistral:
+    """Crea un cliente Mistral con un pool HTTP sync reutilizable.
+
+    ``http_client`` permite compartir un pool sync ya abierto; el pool async
+    solo se configura si se pasa ``async_http_client`` (ver ``get_async_ocr_client``).
+    """
+    api_key = api_key or os.getenv("MISTRAL_API_KEY")
+    if not api_key:
+        raise EnvironmentError("Defina MISTRAL_API_KEY en el entorno o en el archivo .env")
+
+    server_url = server_url or os.getenv("MISTRAL_SERVER_URL") or None
+    if http_client is None:
+        limits = _build_limits(pool_size or get_ocr_max_workers())
+        logger.info(
+            "Inicializando cliente OCR compartido (pool=%s, server=%s)",
+            limits.max_connections,
+            server_url or "default",
+        )
+        http_client = httpx.Client(
+            limits=limits, timeout=httpx.Timeout(timeout_ms / 1000), follow_redirects=True
+        )
+    return Mistral(
+        api_key=api_key,
+        server_url=server_url,
+        client=http_client,
+        async_client=async_http_client,
+        timeout_ms=timeout_ms,
+    )
+
+
+def get_ocr_client() -> Mistral:
+    """Devuelve el cliente OCR del proceso, creándolo en el primer uso."""
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            _client = build_ocr_client()
+        return _client
+
+
+def get_async_ocr_client() -> Mistral:
+    """Cliente OCR para el event loop en curso, con su propio ``httpx.AsyncClient``.
+
+    Comparte el pool sync del cliente del proceso. Debe llamarse desde una corrutina.
+    """
+    loop = asyncio.get_running_loop()
+    shared = get_ocr_client()
+    with _client_lock:
+        if _client_injected:
+            return shared
+        client = _async_clients.get(loop)
+        if client is None:
+            client = build_ocr_client(
+                http_client=shared.sdk_configuration.client,
+                async_http_client=httpx.AsyncClient(
+                    limits=_build_limits(get_ocr_max_workers()),
+                    timeout=httpx.Timeout(DEFAULT_OCR_TIMEOUT_MS / 1000),
+                    follow_redirects=True,
+                ),
+            )
+            _async_clients[loop] = client
+        return client
+
+
+def set_ocr_client(client: Optional[Mistral]) -> None:
+    """Reemplaza el cliente compartido (p. ej. por uno apuntando a un stub).
+
+    El cliente inyectado se usa tal cual en los caminos sync y async. Con
+    ``None`` se cierran el cliente actual y los clientes async por loop, y el
+    siguiente ``get_ocr_client`` vuelve a construirlo desde las variables de entorno.
+    """
+    global _client, _client_injected
+    with _client_lock:
+        previous, _client = _client, client
+        _client_injected = client is not None
+        loop_clients = list(_async_clients.items())
+        _async_clients.clear()
+    for loop, loop_client in loop_clients:
+        _close_async_pool(loop_client, loop)
+    if previous is not None and previous is not client:
+        _close_client(previous)
+
+
+def _close_async_pool(client: Mistral, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+    """Cierra el ``httpx.AsyncClient`` de ``client`` en su loop (o en uno temporal)."""
+    async_client = getattr(getattr(client, "sdk_configuration", None), "async_client", None)
+    if async_client is None:
+        return
+    try:
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(async_client.aclose(), loop)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(async_client.aclose())
+        else:
+            running.create_task(async_client.aclose())
+    except Exception as exc:  # pragma: no cover - defensive
+        logger.debug("No se pudo cerrar el pool HTTP async de OCR: %s", exc)
+
+
+def _close_client(client: Mistral) -> None:
+    """Cierra los pools HTTP sync y async de ``client``."""
+    sdk_config = getattr(client, "sdk_configuration", None)
+    http_client = getattr(sdk_config, "client", None)
+    if http_client is not None:
+        try:
+            http_client.close()
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.debug("No se pudo cerrar el pool HTTP de OCR: %s", exc)
+    _close_async_pool(client)
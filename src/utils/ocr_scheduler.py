@@ -0,0 +1,231 @@
+"""Planificador global de llamadas a Mistral OCR.
+
+Todas las llamadas de OCR del proceso (varios documentos y varias migraciones
+en paralelo) pasan por un único ``OcrScheduler`` que aplica:
+
+- un límite de concurrencia adaptativo tipo AIMD: sube de forma aditiva con
+  cada respuesta exitosa y se reduce a la mitad ante un 429 o un timeout;
+- presupuestos por minuto de solicitudes y de páginas (token buckets; Mistral
+  OCR factura y limita por página, así que un chunk de 8 páginas consume 8);
+- backoff exponencial con jitter completo entre reintentos.
+
+Ambos presupuestos vienen desactivados: una corrida de un solo usuario no se
+frena; en despliegues compartidos se fijan según la cuota de la cuenta.
+
+Variables de entorno:
+    AURA_OCR_MAX_WORKERS: techo de concurrencia (el mismo valor dimensiona el pool HTTP).
+    AURA_OCR_RPM: solicitudes de OCR por minuto (default 0 = sin límite).
+    AURA_OCR_PPM: páginas de OCR por minuto (default 0 = sin límite).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+from src.utils.ocr_client import get_ocr_max_workers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OCR_RPM = 0
+DEFAULT_OCR_PPM = 0
+MIN_CONCURRENCY = 1.0
+# Factor multiplicativo aplicado al límite ante un 429/timeout.
+DECREASE_FACTOR = 0.5
+# Ventana en la que varios 429 simultáneos cuentan como una sola señal.
+DECREASE_COOLDOWN_SECONDS = 2.0
+MAX_BACKOFF_SECONDS = 60.0
+# Intervalo de sondeo de ``aacquire`` (no se puede esperar un Condition desde asyncio).
+ASYNC_POLL_SECONDS = 0.1
+
+_THROTTLE_STATUS_CODES = {429, 502, 503, 504}
+_THROTTLE_MARKERS = ("429", "rate limit", "too many requests", "timeout", "timed out")
+
+
+def is_throttle_error(exc: BaseException) -> bool:
+    """Indica si el error es una señal de saturación (429, 5xx de capacidad o timeout)."""
+    status_code = getattr(exc, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(exc, "response", None), "status_code", None)
+    if status_code in _THROTTLE_STATUS_CODES:
+        return True
+    if isinstance(exc, TimeoutError) or "timeout" in type(exc).__name__.lower():
+        return True
+    message = str(exc).lower()
+    return any(marker in message for marker in _THROTTLE_MARKERS)
+
+
+def _read_env_number(name: str, default: float) -> float:
+    try:
+        return max(float(os.getenv(name, default)), 0.0)
+    except ValueError:
+        return float(default)
+
+
+class OcrScheduler:
+    """Límite de concurrencia AIMD + presupuestos RPM/páginas compartidos por todo el proceso."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_minute: float = DEFAULT_OCR_RPM,
+        pages_per_minute: float = DEFAULT_OCR_PPM,
+    ):
+        self.max_concurrency = float(max(max_concurrency, 1))
+        self.requests_per_minute = max(float(requests_per_minute), 0.0)
+        self.pages_per_minute = max(float(pages_per_minute), 0.0)
+        self._limit = self.max_concurrency
+        self._in_flight = 0
+        self._tokens = self.requests_per_minute
+        self._page_tokens = self.pages_per_minute
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self.successes = 0
+        self.throttles = 0
+
+    @property
+    def limit(self) -> int:
+        return max(int(self._limit), 1)
+
+    def _refill_locked(self, now: float) -> None:
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._tokens = min(
+            self.requests_per_minute,
+            self._tokens + elapsed * self.requests_per_minute / 60.0,
+        )
+        self._page_tokens = min(
+            self.pages_per_minute,
+            self._page_tokens + elapsed * self.pages_per_minute / 60.0,
+        )
+
+    def _wait_time_locked(self, pages: int) -> Optional[float]:
+        """``None`` si se puede despachar ya; si no, segundos sugeridos de espera."""
+        if self._in_flight >= self.limit:
+            return 1.0
+        self._refill_locked(time.monotonic())
+        wait_seconds = 0.0
+        if self.requests_per_minute and self._tokens < 1.0:
+            wait_seconds = (1.0 - self._tokens) * 60.0 / self.requests_per_minute
+        if self.pages_per_minute:
+            # Un chunk con más páginas que el presupuesto completo pasa con el bucket lleno
+            needed = min(float(pages), self.pages_per_minute)
+            if self._page_tokens < needed:
+                wait_seconds = max(
+                    wait_seconds,
+                    (needed - self._page_tokens) * 60.0 / self.pages_per_minute,
+                )
+        return wait_seconds or None
+
+    def _take_slot_locked(self, pages: int) -> None:
+        self._in_flight += 1
+        if self.requests_per_minute:
+            self._tokens -= 1.0
+        if self.pages_per_minute:
+            self._page_tokens -= pages
+
+    def acquire(self, pages: int = 1) -> None:
+        """Bloquea hasta que haya un slot de concurrencia y presupuesto para ``pages`` páginas."""
+        with self._condition:
+            while True:
+                wait_seconds = self._wait_time_locked(pages)
+                if wait_seconds is None:
+                    break
+                self._condition.wait(timeout=wait_seconds)
+            self._take_slot_locked(pages)
+
+    async def aacquire(self, pages: int = 1) -> None:
+        """Versión async de ``acquire``: cede el event loop mientras espera."""
+        while True:
+            with self._condition:
+                wait_seconds = self._wait_time_locked(pages)
+                if wait_seconds is None:
+                    self._take_slot_locked(pages)
+                    return
+            await asyncio.sleep(min(wait_seconds, ASYNC_POLL_SECONDS))
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight = max(self._in_flight - 1, 0)
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self, pages: int = 1) -> Iterator[None]:
+        """Context manager que reserva un slot durante una llamada de OCR de ``pages`` páginas."""
+        self.acquire(pages)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def aslot(self, pages: int = 1) -> AsyncIterator[None]:
+        """Equivalente async de ``slot``."""
+        await self.aacquire(pages)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def record_success(self) -> None:
+        """Incremento aditivo: ~+1 slot por cada ventana completa de éxitos."""
+        with self._condition:
+            self.successes += 1
+            self._limit = min(self.max_concurrency, self._limit + 1.0 / max(self._limit, 1.0))
+            self._condition.notify_all()
+
+    def record_throttle(self) -> None:
+        """Decremento multiplicativo ante 429/timeout (una vez por ventana)."""
+        with self._condition:
+            self.throttles += 1
+            now = time.monotonic()
+            if now - self._last_decrease < DECREASE_COOLDOWN_SECONDS:
+                return
+            self._last_decrease = now
+            previous = self._limit
+            self._limit = max(MIN_CONCURRENCY, self._limit * DECREASE_FACTOR)
+        logger.warning(
+            "OCR saturado: límite de concurrencia %.1f -> %.1f", previous, self._limit
+        )
+
+    @staticmethod
+    def backoff_delay(attempt: int, base_seconds: float = 2.0) -> float:
+        """Backoff exponencial con jitter completo para el intento ``attempt`` (1..n)."""
+        ceiling = min(MAX_BACKOFF_SECONDS, base_seconds * (2 ** max(attempt - 1, 0)))
+        return random.uniform(0, ceiling)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "limit": round(self._limit, 2),
+                "max_concurrency": int(self.max_concurrency),
+                "in_flight": self._in_flight,
+                "requests_per_minute": self.requests_per_minute,
+                "pages_per_minute": self.pages_per_minute,
+                "successes": self.successes,
+                "throttles": self.throttles,
+            }
+
+
+_scheduler: Optional[OcrScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_ocr_scheduler() -> OcrScheduler:
+    """Scheduler de OCR compartido por el proceso."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = OcrScheduler(
+                max_concurrency=get_ocr_max_workers(),
+                requests_per_minute=_read_env_number("AURA_OCR_RPM", DEFAULT_OCR_RPM),
+                pages_per_minute=_read_env_number("AURA_OCR_PPM", DEFAULT_OCR_PPM),
+            )
+        return _scheduler
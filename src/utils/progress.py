@@ -0,0 +1,41 @@
+"""Eventos de progreso emitidos por las herramientas largas (OCR, extracción).
+
+Los eventos se envían por el stream ``custom`` de LangGraph
+(``graph.stream(..., stream_mode="custom")``) y además se registran en el log.
+Fuera de una ejecución de LangGraph el writer es un no-op.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+ProgressWriter = Callable[[Dict[str, Any]], None]
+
+
+def _noop_writer(_: Dict[str, Any]) -> None:
+    return None
+
+
+def get_progress_writer() -> ProgressWriter:
+    """Devuelve el writer del stream ``custom`` de la ejecución actual (o un no-op).
+
+    Debe llamarse en el hilo/contexto de la herramienta, no dentro de workers.
+    """
+    try:
+        from langgraph.config import get_stream_writer
+
+        writer = get_stream_writer()
+    except Exception:
+        writer = _noop_writer
+
+    def _emit(event: Dict[str, Any]) -> None:
+        logger.debug("Progreso: %s", event)
+        try:
+            writer(event)
+        except Exception as exc:  # pragma: no cover - el progreso nunca debe romper la herramienta
+            logger.debug("No se pudo emitir el evento de progreso: %s", exc)
+
+    return _emit
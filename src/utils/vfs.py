@@ -0,0 +1,107 @@
+"""Representación canónica de las entradas del filesystem virtual (``state['files']``).
+
+Antes cada herramienta armaba sus entradas a mano: ``content`` a veces era un
+string y a veces una lista de líneas, ``data`` aparecía solo en algunas y
+cada herramienta volvía a parsear el JSON con su propia variante de fallback.
+
+``make_file_entry`` es el único constructor y guarda una sola forma: la
+``FileData`` de deepagents (``content`` como lista de líneas más
+``created_at``/``modified_at``), que es la que fusiona el reducer de
+``create_deep_agent`` y la que leen ``read_file``/``grep``/``edit_file``. El
+objeto no se guarda aparte: ``read_file_data`` lo deriva de ``content`` al
+leer. Los textos grandes van al blob store (``src/utils/blob_store.py``).
+
+``read_file_data`` también entiende las formas heredadas de checkpoints
+anteriores (``data``, ``content`` string, JSON crudo).
+
+Los recorridos por directorio de las herramientas usan ``list_paths``: un
+escaneo lineal de las rutas (no hay índice), que acepta varios prefijos a la vez.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+def _render_lines(data: Any) -> List[str]:
+    if isinstance(data, str):
+        return data.split("\n")
+    return json.dumps(data, indent=2, ensure_ascii=False, default=str).split("\n")
+
+
+def make_file_entry(data: Any, modified_at: Optional[str] = None) -> Dict[str, Any]:
+    """Entrada ``FileData`` para ``data`` (objeto JSON o texto)."""
+    timestamp = modified_at or datetime.now(timezone.utc).isoformat()
+    return {
+        "content": _render_lines(data),
+        "created_at": timestamp,
+        "modified_at": timestamp,
+    }
+
+
+def read_file_text(entry: Any) -> str:
+    """Texto completo de una entrada del VFS (``""`` si no existe)."""
+    if isinstance(entry, str):
+        return entry
+    if not isinstance(entry, dict):
+        return ""
+    data = entry.get("data")
+    if isinstance(data, str):
+        return data
+    content = entry.get("content")
+    if isinstance(content, list):
+        return "\n".join(content)
+    return content if isinstance(content, str) else ""
+
+
+def read_file_data(entry: Any, path: str = "") -> Optional[Any]:
+    """Objeto parseado de una entrada del VFS, sin importar la forma en que se guardó.
+
+    Lo derivado de ``content`` se parsea en cada llamada, así que las
+    herramientas pueden modificar el objeto sin afectar el estado.
+    """
+    if entry is None:
+        return None
+
+    if isinstance(entry, dict):
+        data = entry.get("data")
+        if data is not None:
+            return data
+        content = entry.get("content")
+        if content is None:
+            # Sin 'data' ni 'content': se asume que es el payload directo
+            return entry if "data" not in entry else None
+        text = "\n".join(content) if isinstance(content, list) else content
+    elif isinstance(entry, str):
+        text = entry
+    elif isinstance(entry, list):
+        return entry
+    else:
+        return None
+
+    if not isinstance(text, str) or not text.strip():
+        return None
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        logger.warning("Error parseando JSON desde 'content' en %s", path or "<sin ruta>")
+        return None
+
+
+def list_paths(
+    files: Optional[Mapping[str, Any]], prefix: Union[str, Tuple[str, ...]]
+) -> List[str]:
+    """Rutas de ``files`` que empiezan con ``prefix``, ordenadas.
+
+    ``prefix`` puede ser una tupla: varios directorios se recorren en una sola pasada.
+    """
+    if not files:
+        return []
+    return sorted(
+        path for path in files.keys() if isinstance(path, str) and path.startswith(prefix)
+    )
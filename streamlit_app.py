@@ -285,6 +285,28 @@ def _persist_uploads(files, tmp_dir: Path) -> list[Path]:
     return [_persist_upload(f, tmp_dir) for f in files]
 
 
+def _run_agent_with_progress(message: dict):
+    """Ejecuta el agente en modo stream y muestra el progreso de OCR por documento."""
+    progress_bars: dict[str, object] = {}
+    result = None
+    for namespace, mode, payload in am_change_control_agent.stream(
+        message, stream_mode=["custom", "values"], subgraphs=True
+    ):
+        if mode == "values" and not namespace:
+            result = payload
+        elif mode == "custom" and isinstance(payload, dict) and payload.get("event") == "ocr_progress":
+            document = Path(str(payload.get("document", ""))).name
+            total_pages = payload.get("total_pages") or 0
+            pages_done = payload.get("pages_done") or 0
+            fraction = min(pages_done / total_pages, 1.0) if total_pages else 0.0
+            label = f"OCR {document}: {pages_done}/{total_pages} paginas"
+            if document not in progress_bars:
+                progress_bars[document] = st.progress(fraction, text=label)
+            else:
+                progress_bars[document].progress(fraction, text=label)
+    return result
+
+
 def render_table_section() -> None:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown('<div class="section-title">Metodos analiticos</div>', unsafe_allow_html=True)
@@ -402,7 +424,7 @@ def render_cta() -> None:
 
             with st.spinner("Ejecutando Aura (DeepAgents)..."):
                 try:
-                    result = am_change_control_agent.invoke(message)
+                    result = _run_agent_with_progress(message)
                     st.success("Ejecucion completada. Buscando DOCX final en output/ ...")
 
                     docx_path = None
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Los módulos de herramientas crean sus clientes LLM al importarse.
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("MISTRAL_API_KEY", "test-key")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
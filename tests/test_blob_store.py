@@ -0,0 +1,98 @@
+"""Blob store: ida y vuelta, y referencias cuyo blob ya no existe (checkpoint de otro host)."""
+
+import asyncio
+import importlib
+
+import pytest
+from langgraph.types import Command
+
+from src.utils import blob_store
+from src.utils.vfs import make_file_entry
+
+clean_markdown = importlib.import_module("src.tools.test_solution_clean_markdown")
+structured_extraction = importlib.import_module("src.tools.test_solution_structured_extraction")
+
+LARGE_MARKDOWN = "# 1. VALORACIÓN\n" + "texto del procedimiento\n" * 1000
+
+
+@pytest.fixture
+def blob_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("AURA_BLOB_DIR", str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store, "_store", None)
+    return tmp_path / "blobs"
+
+
+def _on_another_host(monkeypatch, tmp_path):
+    """El checkpoint se retoma donde el directorio de blobs está vacío."""
+    monkeypatch.setenv("AURA_BLOB_DIR", str(tmp_path / "otro_host"))
+    monkeypatch.setattr(blob_store, "_store", None)
+
+
+def _tool_call(name, args, files):
+    return {
+        "type": "tool_call",
+        "id": "call-1",
+        "name": name,
+        "args": {**args, "state": {"messages": [], "files": files}},
+    }
+
+
+def test_offload_and_resolve_round_trip(blob_dir):
+    ref = blob_store.offload_text(LARGE_MARKDOWN)
+
+    assert blob_store.is_blob_ref(ref)
+    assert blob_store.offload_text(LARGE_MARKDOWN) == ref
+    assert blob_store.offload_text("corto") == "corto"
+    assert blob_store.BlobStore(blob_dir).get(ref) == LARGE_MARKDOWN
+
+
+def test_missing_blob_raises_clear_error(blob_dir, tmp_path):
+    ref = blob_store.offload_text(LARGE_MARKDOWN)
+
+    with pytest.raises(FileNotFoundError, match=ref["$blob"]):
+        blob_store.BlobStore(tmp_path / "vacio").get(ref)
+
+
+def test_clean_markdown_reports_missing_blob(blob_dir, tmp_path, monkeypatch):
+    files = {
+        "/actual_method/method_metadata_TOC_MA 1.json": make_file_entry(
+            {"markdown_completo": blob_store.offload_text(LARGE_MARKDOWN)}
+        )
+    }
+    _on_another_host(monkeypatch, tmp_path)
+
+    result = asyncio.run(
+        clean_markdown.test_solution_clean_markdown.ainvoke(
+            _tool_call("test_solution_clean_markdown", {"source_file_name": "MA 1"}, files)
+        )
+    )
+
+    assert isinstance(result, Command)
+    assert "files" not in result.update
+    message = result.update["messages"][0].content
+    assert "AURA_BLOB_DIR" in message
+    assert "pdf_da_metadata_toc" in message
+
+
+def test_structured_extraction_reports_missing_blob(blob_dir, tmp_path, monkeypatch):
+    files = {
+        "/actual_method/test_solution_markdown_MA 1.json": make_file_entry(
+            {"items": [{"id": 0, "title": "Valoración", "markdown": blob_store.offload_text(LARGE_MARKDOWN)}]}
+        )
+    }
+    _on_another_host(monkeypatch, tmp_path)
+
+    single = asyncio.run(
+        structured_extraction.test_solution_structured_extraction.ainvoke(
+            _tool_call("test_solution_structured_extraction", {"id": 0, "source_file_name": "MA 1"}, files)
+        )
+    )
+    batch = asyncio.run(
+        structured_extraction.test_solution_structured_extraction_batch.ainvoke(
+            _tool_call("test_solution_structured_extraction_batch", {"source_file_name": "MA 1"}, files)
+        )
+    )
+
+    assert "test_solution_clean_markdown" in single.update["messages"][0].content
+    assert batch.update["files"] == {}
+    assert "IDs [0]" in batch.update["messages"][0].content
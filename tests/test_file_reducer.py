@@ -0,0 +1,44 @@
+"""``file_reducer``: deltas, tombstones y paridad con el reducer de deepagents."""
+
+from deepagents.middleware.filesystem import _file_data_reducer
+
+from src.graph.state import file_reducer
+
+
+def _entry(text):
+    return {"content": [text], "created_at": "2026-01-01T00:00:00+00:00", "modified_at": "2026-01-01T00:00:00+00:00"}
+
+
+def test_delta_overrides_and_adds_paths():
+    left = {"/a.json": _entry("a"), "/b.json": _entry("b")}
+    merged = file_reducer(left, {"/b.json": _entry("b2"), "/c.json": _entry("c")})
+
+    assert sorted(merged) == ["/a.json", "/b.json", "/c.json"]
+    assert merged["/b.json"]["content"] == ["b2"]
+    assert merged["/a.json"] is left["/a.json"]
+
+
+def test_tombstone_removes_path_without_mutating_left():
+    left = {"/a.json": _entry("a"), "/tmp.json": _entry("tmp")}
+    merged = file_reducer(left, {"/tmp.json": None, "/never_existed.json": None})
+
+    assert list(merged) == ["/a.json"]
+    assert "/tmp.json" in left
+
+
+def test_initial_merge_drops_tombstones():
+    assert file_reducer(None, {"/a.json": _entry("a"), "/b.json": None}) == {"/a.json": _entry("a")}
+
+
+def test_empty_sides():
+    left = {"/a.json": _entry("a")}
+    assert file_reducer(left, None) is left
+    assert file_reducer(left, {}) == left
+
+
+def test_matches_deepagents_reducer():
+    left = {"/a.json": _entry("a"), "/b.json": _entry("b"), "/c.json": _entry("c")}
+    delta = {"/a.json": None, "/b.json": _entry("b2"), "/d.json": _entry("d")}
+
+    assert file_reducer(left, delta) == _file_data_reducer(left, delta)
+    assert file_reducer(None, delta) == _file_data_reducer(None, delta)
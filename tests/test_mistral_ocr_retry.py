@@ -0,0 +1,78 @@
+"""Reintentos y bisección de ``mistral_ocr`` según el tipo de error, sin llamar a Mistral."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import mistral_ocr
+
+
+class _ApiError(Exception):
+    def __init__(self, status_code, message="error"):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _FakeOcr:
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def process(self, **kwargs):
+        self.calls += 1
+        raise self.error
+
+
+class _FakeJob:
+    extraction_model = None
+
+    def chunk_source(self, start, end):
+        return f"%PDF {start}-{end}".encode()
+
+    def label(self, start, end):
+        return f"chunk {start}-{end}"
+
+    def finish(self, response, start):
+        return response
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    monkeypatch.setenv("AURA_CACHE_DISABLED", "1")
+    monkeypatch.setattr(mistral_ocr.time, "sleep", lambda seconds: None)
+
+    def install(error):
+        ocr = _FakeOcr(error)
+        monkeypatch.setattr(mistral_ocr, "get_ocr_client", lambda: SimpleNamespace(ocr=ocr))
+        return ocr
+
+    return install
+
+
+def test_client_errors_fail_without_retry(fake_ocr):
+    ocr = fake_ocr(_ApiError(400, "invalid document"))
+
+    assert mistral_ocr.process_chunk(b"%PDF", None, chunk_retry_attempts=3) is None
+    assert ocr.calls == 1
+
+
+def test_transient_errors_are_retried(fake_ocr):
+    ocr = fake_ocr(_ApiError(503, "service unavailable"))
+
+    assert mistral_ocr.process_chunk(b"%PDF", None, chunk_retry_attempts=3) is None
+    assert ocr.calls == 3
+
+
+def test_planned_chunk_does_not_bisect_client_errors(fake_ocr):
+    ocr = fake_ocr(_ApiError(401, "unauthorized"))
+
+    assert mistral_ocr._run_planned_chunk(_FakeJob(), 0, 4) == []
+    assert ocr.calls == 1
+
+
+def test_planned_chunk_bisects_oversized_payloads(fake_ocr):
+    ocr = fake_ocr(_ApiError(413, "payload too large"))
+
+    assert mistral_ocr._run_planned_chunk(_FakeJob(), 0, 4) == []
+    # 0-4, 0-2, 2-4 y las cuatro páginas sueltas; un 413 no se reintenta
+    assert ocr.calls == 7
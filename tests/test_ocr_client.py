@@ -0,0 +1,27 @@
+import asyncio
+
+from src.utils import ocr_client
+
+
+def test_async_client_is_built_per_event_loop_and_closed():
+    ocr_client.set_ocr_client(None)
+    try:
+        async def grab():
+            first = ocr_client.get_async_ocr_client()
+            assert ocr_client.get_async_ocr_client() is first
+            return first
+
+        client_a = asyncio.run(grab())
+        client_b = asyncio.run(grab())
+        assert client_a is not client_b
+        assert client_a.sdk_configuration.async_client is not client_b.sdk_configuration.async_client
+        shared = ocr_client.get_ocr_client()
+        assert client_b.sdk_configuration.client is shared.sdk_configuration.client
+
+        sync_pool = shared.sdk_configuration.client
+        ocr_client._close_client(shared)
+        ocr_client._close_async_pool(client_b)
+        assert sync_pool.is_closed
+        assert client_b.sdk_configuration.async_client.is_closed
+    finally:
+        ocr_client.set_ocr_client(None)
@@ -0,0 +1,83 @@
+"""Ruta async (``ainvoke``) de las herramientas de metadata + TOC, sin llamar a Mistral."""
+
+import asyncio
+import importlib
+
+import pytest
+from langgraph.types import Command
+from PyPDF2 import PdfWriter
+
+from src.utils.vfs import read_file_data
+
+# ``src.tools`` re-exporta la herramienta con el mismo nombre que el módulo
+metadata_toc = importlib.import_module("src.tools.pdf_da_metadata_toc")
+
+
+def _ocr_response(markdown: str):
+    return {
+        "document_annotation": {"titulo": "Metodo de prueba"},
+        "pages": [{"index": 0, "markdown": markdown}],
+    }
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    writer = PdfWriter()
+    writer.add_blank_page(width=72, height=72)
+    path = tmp_path / "MA 100000346.pdf"
+    with open(path, "wb") as handle:
+        writer.write(handle)
+    return str(path)
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    async def fake_document_streaming(pdf_path, extraction_model, sink, **kwargs):
+        sink.start(1, 1)
+        sink.add(0, [_ocr_response(f"# {pdf_path}")])
+
+    async def fake_documents_streaming(documents, extraction_model, **kwargs):
+        for pdf_path, sink in documents:
+            await fake_document_streaming(pdf_path, extraction_model, sink)
+
+    monkeypatch.setattr(metadata_toc, "aprocess_document_streaming", fake_document_streaming)
+    monkeypatch.setattr(metadata_toc, "aprocess_documents_streaming", fake_documents_streaming)
+
+
+def _tool_call(name, args):
+    return {"type": "tool_call", "id": "call-1", "name": name, "args": {**args, "state": {"messages": [], "files": {}}}}
+
+
+def test_pdf_da_metadata_toc_ainvoke(pdf_path, fake_ocr):
+    result = asyncio.run(
+        metadata_toc.pdf_da_metadata_toc.ainvoke(
+            _tool_call("pdf_da_metadata_toc", {"dir_method": pdf_path})
+        )
+    )
+
+    assert isinstance(result, Command)
+    files = result.update["files"]
+    assert list(files) == ["/actual_method/method_metadata_TOC_MA 100000346.json"]
+    entry = next(iter(files.values()))
+    assert read_file_data(entry)["source_file_name"] == "MA 100000346"
+    assert result.update["messages"][0].tool_call_id == "call-1"
+
+
+def test_pdf_da_metadata_toc_batch_ainvoke(pdf_path, tmp_path, fake_ocr):
+    missing = str(tmp_path / "missing.pdf")
+    result = asyncio.run(
+        metadata_toc.pdf_da_metadata_toc_batch.ainvoke(
+            _tool_call(
+                "pdf_da_metadata_toc_batch",
+                {"dir_methods": [pdf_path, missing], "base_path": "/proposed_method"},
+            )
+        )
+    )
+
+    assert isinstance(result, Command)
+    assert list(result.update["files"]) == [
+        "/proposed_method/method_metadata_TOC_MA 100000346.json"
+    ]
+    message = result.update["messages"][0].content
+    assert "Lote procesado: 1 documento(s)." in message
+    assert "missing.pdf" in message
@@ -0,0 +1,88 @@
+"""Entradas del VFS tras un checkpoint: serializador de LangGraph + reducer y lectura de deepagents."""
+
+from types import SimpleNamespace
+
+from deepagents.backends.state import StateBackend
+from deepagents.middleware.filesystem import _file_data_reducer
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from src.utils.vfs import list_paths, make_file_entry, read_file_data, read_file_text
+
+
+def _checkpoint_round_trip(files):
+    serde = JsonPlusSerializer()
+    return serde.loads_typed(serde.dumps_typed(files))
+
+
+def _restored_files():
+    files = _file_data_reducer(
+        None,
+        {
+            "/actual_method/method.json": make_file_entry({"pruebas": [{"id": 1, "nombre": "Valoración"}]}),
+            "/actual_method/log.txt": make_file_entry("linea 1\nlinea 2"),
+        },
+    )
+    return _checkpoint_round_trip(files)
+
+
+def test_entry_is_plain_file_data():
+    entry = make_file_entry({"id": 1})
+
+    assert set(entry) == {"content", "created_at", "modified_at"}
+    assert entry["content"] == ["{", '  "id": 1', "}"]
+    assert entry["created_at"] == entry["modified_at"]
+    assert _checkpoint_round_trip(entry) == entry
+
+
+def test_restored_entries_are_readable_by_tools():
+    files = _restored_files()
+
+    assert read_file_data(files["/actual_method/method.json"]) == {
+        "pruebas": [{"id": 1, "nombre": "Valoración"}]
+    }
+    assert read_file_text(files["/actual_method/log.txt"]) == "linea 1\nlinea 2"
+
+
+def test_restored_entries_are_readable_by_deepagents():
+    files = _file_data_reducer(_restored_files(), {"/otro.json": make_file_entry([])})
+    backend = StateBackend(SimpleNamespace(state={"files": files}))
+
+    assert "Valoración" in backend.read("/actual_method/method.json")
+    matches = backend.grep_raw("linea 2", path="/actual_method")
+    assert [(match["path"], match["line"]) for match in matches] == [("/actual_method/log.txt", 2)]
+    edit = backend.edit("/actual_method/log.txt", "linea 2", "linea dos")
+    assert edit.error is None
+
+
+def test_read_file_data_accepts_legacy_shapes():
+    assert read_file_data({"content": ["x"], "data": {"a": 1}}) == {"a": 1}
+    assert read_file_data({"content": '{"a": 1}'}) == {"a": 1}
+    assert read_file_data({"content": ["{", '"a": 1', "}"]}) == {"a": 1}
+    assert read_file_data({"a": 1}) == {"a": 1}
+    assert read_file_data({"content": "no es json"}, "/x.json") is None
+
+
+def test_read_file_data_returns_a_fresh_object():
+    entry = make_file_entry({"pruebas": []})
+    read_file_data(entry)["pruebas"].append({"id": 1})
+
+    assert read_file_data(entry) == {"pruebas": []}
+
+
+def test_list_paths_filters_by_prefix_in_order():
+    files = {
+        "/temp_actual_method/MA 1/2.json": make_file_entry({}),
+        "/temp_actual_method/MA 1/10.json": make_file_entry({}),
+        "/temp_actual_method_old/1.json": make_file_entry({}),
+        "/actual_method/method.json": make_file_entry({}),
+    }
+
+    assert list_paths(files, "/temp_actual_method/") == [
+        "/temp_actual_method/MA 1/10.json",
+        "/temp_actual_method/MA 1/2.json",
+    ]
+    assert list_paths(files, ("/actual_method/", "/temp_actual_method_old/")) == [
+        "/actual_method/method.json",
+        "/temp_actual_method_old/1.json",
+    ]
+    assert list_paths(None, "/") == []